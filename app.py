@@ -1,13 +1,62 @@
-import io
-import os
 import re
-import zipfile
+import hmac
+import json
+import time
+import uuid
 import hashlib
+import logging
+import threading
+from collections import deque
+from contextlib import nullcontext
 from dataclasses import dataclass
 from typing import List, Tuple, Dict, Optional
 
 import streamlit as st
-from PIL import Image, ImageSequence
+
+from engine import (
+    DEFAULT_BOTTOM_PAD,
+    DEFAULT_GAP,
+    DEFAULT_TOP_PAD,
+    JOB_CANCELLED,
+    CANVAS_WIDTH,
+    DEFAULT_ENCODE_PROFILE,
+    DEFAULT_PAD_MODE,
+    ENCODE_PROFILES,
+    JOB_DONE,
+    JOB_FAILED,
+    JOB_RUNNING,
+    JPEG_MAX_DIMENSION,
+    LONG_JPG_SPLIT_HEIGHT,
+    MAX_PER_PSD,
+    MAX_TOTAL_IMAGES,
+    PREVIEW_MARK_STEP,
+    PAD_MODES,
+    PSD_MAX_CANVAS_HEIGHT,
+    RENDITION_WIDTHS,
+    SLICE_DEFAULT_HEIGHT,
+    SLICE_MIN_HEIGHT,
+    THUMB_W,
+    BuildMemo,
+    BuildStats,
+    GenerationJob,
+    ImgItem,
+    SessionFootprint,
+    StoredFile,
+    ZipIngestReport,
+    _get_artifact_cache,
+    _iter_zip_images,
+    _sanitize_filename,
+    _sha1,
+    _thumb_from_bytes,
+    get_job_queue,
+    get_memory_governor,
+    get_result_store,
+    items_from_zip_folder,
+    make_item,
+    plan_page,
+    zip_declared_image_bytes,
+    zip_product_folders,
+)
 
 
 # =========================================================
@@ -16,26 +65,58 @@ from PIL import Image, ImageSequence
 APP_TITLE = "MISHARP 상세페이지 생성기"
 APP_SUBTITLE = "MISHARP PSD GENERATOR V3"
 
-CANVAS_WIDTH = 900
-
-# ✅ 분할 규칙 (현재 운영 방식 유지: 10장 초과 시 PSD 2개로 분할, 최대 20장)
-MAX_PER_PSD = 10
-MAX_TOTAL_IMAGES = 20
-
-DEFAULT_TOP_PAD = 180
-DEFAULT_BOTTOM_PAD = 250
-DEFAULT_GAP = 300
-
-# ✅ 썸네일 (현재 안정버전 기준: 70)
-THUMB_W = 70
+# ✅ 성능 계측 로그 (관리자 패널에 최근 N건 표시 + 구조화 로그 출력)
+PERF_LOG_MAX = 200
+
+# ✅ 로그인 시도 제한 (최근 AUTH_WINDOW_SECONDS 동안)
+#   - 세션별 실패 AUTH_MAX_FAILURES회 → 그 세션 잠금
+#   - IP별 실패 AUTH_IP_MAX_FAILURES회 → 그 IP 잠금 (사무실 NAT를 여럿이 공유하므로 훨씬 높게)
+#   - IP는 신뢰하는 프록시가 붙인 X-Forwarded-For 항목만 사용: 프록시 단계 수 AUTH_TRUSTED_PROXY_HOPS
+#     (Secrets TRUSTED_PROXY_HOPS로 변경) → 0(프록시 없음)이면 IP 제한 없이 세션별 제한만 동작
+#     (새로고침하면 새 세션이라 실패 횟수도 새로 시작 → 외부 공개 시에는 프록시 뒤에 두고 설정할 것)
+#   - 믿을 수 있는 IP가 없는 시도는 프로세스 전체 실패 AUTH_GLOBAL_MAX_FAILURES회 → 그런 시도 전부 잠금
+#     (세션을 새로 만들어도 전체 시도 속도는 이 이하로 묶임)
+AUTH_MAX_FAILURES = 5
+AUTH_IP_MAX_FAILURES = 50
+AUTH_GLOBAL_MAX_FAILURES = 30
+AUTH_WINDOW_SECONDS = 300
+AUTH_TRUSTED_PROXY_HOPS = 0
+AUTH_THROTTLE_MAX_KEYS = 10000
+AUTH_INDEX_PREFIX = 8  # 해시 인덱스 버킷 키 길이(hex)
+
+# ✅ 백그라운드 생성 작업 (진행률 갱신 주기 / 세션당 대기+실행 상한 / 세션에 남기는 완료 작업 수)
+JOB_POLL_SECONDS = 1.0
+JOB_MAX_ACTIVE_PER_SESSION = 10
+JOB_HISTORY_MAX = 10
+
+# ✅ JPG 저장 설정 표시 이름 (engine.ENCODE_PROFILES 키 → 화면 표시)
+ENCODE_PROFILE_LABELS = {
+    "archive": "보관용(고화질)",
+    "marketplace": "오픈마켓 업로드용",
+    "fast-preview": "빠른 확인용",
+}
+PAD_MODE_LABELS = {
+    "scale": "폭 비율대로 줄이기",
+    "fixed": "입력값 그대로",
+}
 
 STATE_ITEMS = "img_items"
 STATE_SEEN = "seen_hashes"
+STATE_THUMBS = "thumb_cache"
 STATE_LAST_PREVIEW = "last_preview_jpg"
-STATE_LAST_ZIP = "last_bundle_zip"
+STATE_LAST_JPG = "last_full_jpg"  # StoredFile 핸들 (bytes는 ResultStore)
+STATE_LAST_ZIP = "last_bundle_zip"  # StoredFile 핸들
 STATE_LAST_META = "last_meta"
+STATE_BUILD_MEMO = "build_memo"
+STATE_LAST_PERF = "last_perf"
 STATE_AUTH_OK = "auth_ok"
 STATE_AUTH_LABEL = "auth_label"
+STATE_AUTH_SID = "auth_sid"
+STATE_JOBS = "gen_jobs"
+STATE_JOBS_PICKED = "gen_jobs_picked"
+STATE_LIST_CLICK = "list_click_stats"
+STATE_DOWNLOAD_READY = "download_ready_key"
+STATE_MEMORY = "memory_footprint"
 
 
 # =========================================================
@@ -60,47 +141,220 @@ def _sha256(s: str) -> str:
     return hashlib.sha256(s.encode("utf-8")).hexdigest()
 
 
-def _load_auth_secrets() -> Tuple[bool, Dict[str, str], set]:
+@dataclass
+class AuthSecrets:
+    enabled: bool
+    by_prefix: Dict[str, List[Tuple[str, str]]]  # sha256 앞 AUTH_INDEX_PREFIX자리 → [(전체 해시, label)]
+    revoked: set
+    admins: set
+    fingerprint: int = 0
+    proxy_hops: int = AUTH_TRUSTED_PROXY_HOPS
+
+
+def _parse_auth_secrets(enabled, hashes, revoked, admins, fingerprint: int, proxy_hops=AUTH_TRUSTED_PROXY_HOPS) -> AuthSecrets:
+    auth_map: Dict[str, str] = {}
+    if isinstance(hashes, (list, tuple)):
+        for x in hashes:
+            if not isinstance(x, str) or ":" not in x:
+                continue
+            label, h = x.split(":", 1)
+            label = label.strip()
+            h = h.strip().lower()
+            if label and h:
+                auth_map[label] = h
+
+    by_prefix: Dict[str, List[Tuple[str, str]]] = {}
+    for label, h in auth_map.items():
+        by_prefix.setdefault(h[:AUTH_INDEX_PREFIX], []).append((h, label))
+
+    def _label_set(v) -> set:
+        if not isinstance(v, (list, tuple)):
+            return set()
+        return set([str(x).strip() for x in v if str(x).strip()])
+
+    try:
+        hops = max(0, int(proxy_hops))
+    except (TypeError, ValueError):
+        hops = AUTH_TRUSTED_PROXY_HOPS
+
+    return AuthSecrets(
+        enabled=_truthy(enabled),
+        by_prefix=by_prefix,
+        revoked=_label_set(revoked),
+        admins=_label_set(admins),
+        fingerprint=fingerprint,
+        proxy_hops=hops,
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def _get_auth_cache() -> Dict:
+    """프로세스 전체에서 공유하는 파싱 결과 (secrets 값이 바뀌면 fingerprint로 감지해 재파싱)"""
+    return {}
+
+
+def _load_auth_secrets() -> AuthSecrets:
     """
     Secrets 예시:
     AUTH_ENABLED = true
     ACCESS_CODE_HASHES = ["code01:abcd...", ...]
     REVOKED_LABELS = ["code02", ...]
+    ADMIN_LABELS = ["code01", ...]
+    TRUSTED_PROXY_HOPS = 1   # (선택) 앞단 리버스 프록시 단계 수, 없으면 AUTH_TRUSTED_PROXY_HOPS
+    - 파싱은 프로세스당 1회, 원본 값의 fingerprint가 바뀔 때만 다시 파싱
+    - st.secrets는 다시 읽기 전까지 같은 객체를 돌려줌 → 직전과 같은 객체면 fingerprint 계산도 생략
+      (rerun마다 require_login / _is_admin이 불러도 항목 전체를 다시 훑지 않음)
     """
     try:
-        enabled = _truthy(st.secrets.get("AUTH_ENABLED", False))
+        enabled = st.secrets.get("AUTH_ENABLED", False)
         hashes = st.secrets.get("ACCESS_CODE_HASHES", [])
         revoked = st.secrets.get("REVOKED_LABELS", [])
+        admins = st.secrets.get("ADMIN_LABELS", [])
+        proxy_hops = st.secrets.get("TRUSTED_PROXY_HOPS", AUTH_TRUSTED_PROXY_HOPS)
     except Exception:
-        enabled, hashes, revoked = False, [], []
+        enabled, hashes, revoked, admins = False, [], [], []
+        proxy_hops = AUTH_TRUSTED_PROXY_HOPS
 
-    auth_map: Dict[str, str] = {}
-    if isinstance(hashes, (list, tuple)):
-        for x in hashes:
-            if not isinstance(x, str) or ":" not in x:
-                continue
-            label, h = x.split(":", 1)
-            label = label.strip()
-            h = h.strip()
-            if label and h:
-                auth_map[label] = h
+    raw = (enabled, hashes, revoked, admins, proxy_hops)
+    cache = _get_auth_cache()
+    cur = cache.get("secrets")
+    last_raw = cache.get("raw")
+    if cur is not None and last_raw is not None and all(a is b for a, b in zip(raw, last_raw)):
+        return cur
+
+    def _freeze(v):
+        return tuple(str(x) for x in v) if isinstance(v, (list, tuple)) else str(v)
+
+    fingerprint = hash((str(enabled), _freeze(hashes), _freeze(revoked), _freeze(admins), str(proxy_hops)))
+    if cur is None or cur.fingerprint != fingerprint:
+        cur = _parse_auth_secrets(enabled, hashes, revoked, admins, fingerprint, proxy_hops)
+        cache["secrets"] = cur
+    cache["raw"] = raw  # 객체를 붙잡아 두므로 id 재사용으로 잘못 일치하는 일 없음
+    return cur
 
-    revoked_set = set()
-    if isinstance(revoked, (list, tuple)):
-        revoked_set = set([str(x).strip() for x in revoked if str(x).strip()])
 
-    return enabled, auth_map, revoked_set
+def _match_access_code(secrets: AuthSecrets, raw_code: str) -> Optional[str]:
+    """
+    - 입력 코드 sha256의 앞자리로 버킷 조회 (label 전체를 훑지 않음)
+    - 버킷 안에서는 전체 해시를 hmac.compare_digest로 비교 (상수 시간, 중간에 끊지 않음)
+    """
+    entered_hash = _sha256(raw_code)
+    matched: Optional[str] = None
+    for saved_hash, label in secrets.by_prefix.get(entered_hash[:AUTH_INDEX_PREFIX], ()):
+        if hmac.compare_digest(entered_hash, saved_hash) and matched is None:
+            matched = label
+    return matched
+
+
+class AuthThrottle:
+    """
+    로그인 실패 기록 (프로세스 전체 공유)
+    - key별 최근 실패 시각을 보관, window 안에서 max_failures회 이상이면 잠금
+    - 대기(sleep) 없이 즉시 거절 → 무차별 대입이 서버 스레드를 붙잡지 않음
+    """
+
+    def __init__(self, max_failures: int, window: float, max_keys: int):
+        self.max_failures = max_failures
+        self.window = window
+        self.max_keys = max_keys
+        self._fails: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def _recent(self, key: str, now: float) -> Optional[deque]:
+        q = self._fails.get(key)
+        if q is None:
+            return None
+        while q and now - q[0] > self.window:
+            q.popleft()
+        if not q:
+            del self._fails[key]
+            return None
+        return q
+
+    def retry_after(self, keys: List[str]) -> float:
+        """잠긴 key가 있으면 남은 초, 없으면 0"""
+        now = time.monotonic()
+        wait = 0.0
+        with self._lock:
+            for key in keys:
+                q = self._recent(key, now)
+                if q is not None and len(q) >= self.max_failures:
+                    wait = max(wait, self.window - (now - q[-self.max_failures]))
+        return wait
+
+    def fail(self, keys: List[str]):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._fails) >= self.max_keys and any(k not in self._fails for k in keys):
+                for key in list(self._fails):
+                    self._recent(key, now)
+                while len(self._fails) >= self.max_keys:
+                    self._fails.pop(next(iter(self._fails)))
+            for key in keys:
+                self._fails.setdefault(key, deque(maxlen=self.max_failures)).append(now)
+
+    def reset(self, keys: List[str]):
+        with self._lock:
+            for key in keys:
+                self._fails.pop(key, None)
+
+
+@st.cache_resource(show_spinner=False)
+def _get_auth_throttle() -> AuthThrottle:
+    """세션별 실패 기록"""
+    return AuthThrottle(AUTH_MAX_FAILURES, AUTH_WINDOW_SECONDS, AUTH_THROTTLE_MAX_KEYS)
+
+
+@st.cache_resource(show_spinner=False)
+def _get_ip_throttle() -> AuthThrottle:
+    """IP별 실패 기록 (같은 IP를 쓰는 직원이 많으므로 상한이 훨씬 높음)"""
+    return AuthThrottle(AUTH_IP_MAX_FAILURES, AUTH_WINDOW_SECONDS, AUTH_THROTTLE_MAX_KEYS)
+
+
+@st.cache_resource(show_spinner=False)
+def _get_global_throttle() -> AuthThrottle:
+    """IP를 모르는 시도 전체의 실패 기록 (key 1개 = 프로세스 전체 슬라이딩 윈도)"""
+    return AuthThrottle(AUTH_GLOBAL_MAX_FAILURES, AUTH_WINDOW_SECONDS, 1)
+
+
+def _client_ip(proxy_hops: int) -> str:
+    """
+    신뢰하는 프록시가 기록한 클라이언트 IP (알 수 없으면 빈 문자열 → IP별 제한 안 함)
+    - X-Forwarded-For 앞쪽 항목은 클라이언트가 마음대로 넣을 수 있음
+      → 프록시가 덧붙인 오른쪽에서 proxy_hops번째 항목만 사용
+    - proxy_hops=0(프록시 없음)이거나 항목 수가 모자라면 헤더를 믿지 않음
+    """
+    if proxy_hops <= 0:
+        return ""
+    try:
+        fwd = st.context.headers.get("X-Forwarded-For") or ""
+    except Exception:
+        return ""
+    hops = [h.strip() for h in fwd.split(",") if h.strip()]
+    if len(hops) < proxy_hops:
+        return ""
+    return hops[-proxy_hops]
+
+
+def _session_id() -> str:
+    """세션 고유 id (로그인 시도 제한 / 생성 작업 소유자 구분)"""
+    if STATE_AUTH_SID not in st.session_state:
+        st.session_state[STATE_AUTH_SID] = uuid.uuid4().hex
+    return st.session_state[STATE_AUTH_SID]
 
 
 def require_login():
     """
     - AUTH_ENABLED=true면 로그인 화면 강제
     - 성공 시 session_state에 auth_ok/auth_label 저장
+    - 세션별 / IP별 실패 횟수 제한 (AUTH_MAX_FAILURES / AUTH_IP_MAX_FAILURES, AUTH_WINDOW_SECONDS)
+      (IP는 AUTH_TRUSTED_PROXY_HOPS가 설정된 경우만, 성공하면 두 기록 모두 초기화)
+    - IP를 모르면 프로세스 전체 실패 횟수 제한 (AUTH_GLOBAL_MAX_FAILURES, 성공해도 초기화하지 않음)
     """
-    enabled, auth_map, revoked_set = _load_auth_secrets()
+    secrets = _load_auth_secrets()
 
     # 로그인 OFF면 통과
-    if not enabled:
+    if not secrets.enabled:
         st.session_state[STATE_AUTH_OK] = True
         st.session_state[STATE_AUTH_LABEL] = "AUTH_OFF"
         return
@@ -128,34 +382,60 @@ def require_login():
     if not login_clicked:
         st.stop()
 
+    session_throttle, ip_throttle = _get_auth_throttle(), _get_ip_throttle()
+    sid_keys = [f"sid:{_session_id()}"]
+    ip = _client_ip(secrets.proxy_hops)
+    ip_keys = [f"ip:{ip}"] if ip else []
+    global_throttle = _get_global_throttle()
+    global_keys = [] if ip else ["global"]
+    wait = max(
+        session_throttle.retry_after(sid_keys),
+        ip_throttle.retry_after(ip_keys),
+        global_throttle.retry_after(global_keys),
+    )
+    if wait > 0:
+        st.error(f"로그인 시도가 너무 많습니다. {int(wait) + 1}초 후 다시 시도하세요.")
+        st.stop()
+
     raw = (code or "").strip().upper()
     raw = re.sub(r"\s+", "", raw)
     if not raw:
         st.error("코드를 입력해 주세요.")
         st.stop()
 
-    entered_hash = _sha256(raw)
-
-    matched_label: Optional[str] = None
-    for label, saved_hash in auth_map.items():
-        if entered_hash == saved_hash:
-            matched_label = label
-            break
+    matched_label = _match_access_code(secrets, raw)
 
     if matched_label is None:
+        session_throttle.fail(sid_keys)
+        ip_throttle.fail(ip_keys)
+        global_throttle.fail(global_keys)
         st.error("코드가 올바르지 않습니다.")
         st.stop()
 
-    if matched_label in revoked_set:
+    if matched_label in secrets.revoked:
         st.error("해당 코드는 차단되었습니다. 관리자에게 문의하세요.")
         st.stop()
 
+    session_throttle.reset(sid_keys)
+    ip_throttle.reset(ip_keys)
     st.session_state[STATE_AUTH_OK] = True
     st.session_state[STATE_AUTH_LABEL] = matched_label
     st.success("로그인 성공! 프로그램으로 이동합니다.")
     st.rerun()
 
 
+def _is_admin() -> bool:
+    """
+    Secrets 예시:
+    ADMIN_LABELS = ["code01", ...]
+    - 로그인 OFF(AUTH_OFF) 환경은 관리자 취급
+    """
+    label = st.session_state.get(STATE_AUTH_LABEL)
+    if label == "AUTH_OFF":
+        return True
+    return label in _load_auth_secrets().admins
+
+
 def sidebar_auth_box():
     with st.sidebar:
         st.markdown("### 접근 상태")
@@ -165,250 +445,218 @@ def sidebar_auth_box():
             st.session_state.pop(STATE_AUTH_LABEL, None)
             st.rerun()
 
+        if _is_admin():
+            _sidebar_perf_panel()
+            _sidebar_memory_panel()
+
 
 # =========================================================
-# IMAGE UTIL
+# PERF LOG
 # =========================================================
-@dataclass
-class ImgItem:
-    name: str
-    bytes_data: bytes
-    pil: Image.Image
-    ext: str
-    sha1: str
-
-
-def _sha1(data: bytes) -> str:
-    return hashlib.sha1(data).hexdigest()
-
-
-def _sanitize_filename(name: str) -> str:
-    name = (name or "").strip()
-    if not name:
-        return "misharp_detailpage"
-    name = re.sub(r"\s+", "_", name)
-    name = re.sub(r"[^0-9A-Za-z가-힣_\-]+", "", name)
-    return name[:80] or "misharp_detailpage"
-
-
-def _is_image_filename(fn: str) -> bool:
-    fn_l = fn.lower()
-    return fn_l.endswith((".jpg", ".jpeg", ".png", ".gif", ".webp"))
-
-
-def _open_image_any(data: bytes) -> Image.Image:
-    im = Image.open(io.BytesIO(data))
-    if getattr(im, "is_animated", False):
-        frame0 = next(ImageSequence.Iterator(im))
-        im = frame0.copy()
-    if im.mode not in ("RGB", "RGBA"):
-        im = im.convert("RGB")
-    return im
-
-
-def _fit_to_width_900(im: Image.Image, width: int = CANVAS_WIDTH) -> Image.Image:
-    w, h = im.size
-    if w == width:
-        return im.convert("RGB") if im.mode != "RGB" else im
-    scale = width / float(w)
-    new_h = int(round(h * scale))
-    resized = im.resize((width, new_h), resample=Image.Resampling.LANCZOS)
-    return resized.convert("RGB")
-
-
-def _make_thumb(im: Image.Image, w: int = THUMB_W) -> bytes:
-    thumb = im.copy()
-    scale = w / float(thumb.size[0])
-    th = max(1, int(round(thumb.size[1] * scale)))
-    thumb = thumb.resize((w, th), resample=Image.Resampling.LANCZOS)
-    out = io.BytesIO()
-    thumb.save(out, format="PNG")
-    return out.getvalue()
-
-
-def _extract_zip_images(zip_bytes: bytes) -> List[Tuple[str, bytes]]:
-    out: List[Tuple[str, bytes]] = []
-    with zipfile.ZipFile(io.BytesIO(zip_bytes), "r") as zf:
-        for info in zf.infolist():
-            if info.is_dir():
-                continue
-            name = info.filename
-            if _is_image_filename(name):
-                out.append((os.path.basename(name), zf.read(info)))
-    return out
-
-
-def _compose_long_jpg(resized_images: List[Image.Image], top_pad: int, bottom_pad: int, gap: int) -> Image.Image:
-    heights = [im.size[1] for im in resized_images]
-    total_h = top_pad + bottom_pad + sum(heights) + gap * (len(resized_images) - 1)
-
-    canvas = Image.new("RGB", (CANVAS_WIDTH, total_h), color=(255, 255, 255))
-    y = top_pad
-    for idx, im in enumerate(resized_images):
-        canvas.paste(im, (0, y))
-        y += im.size[1]
-        if idx != len(resized_images) - 1:
-            y += gap
-    return canvas
-
-
-def _save_jpg_bytes(im: Image.Image) -> bytes:
-    out = io.BytesIO()
-    im.save(out, format="JPEG", quality=95, subsampling=0, optimize=True)
-    return out.getvalue()
+@st.cache_resource(show_spinner=False)
+def _get_perf_log() -> deque:
+    """프로세스 전체(모든 세션) 최근 계측 기록"""
+    return deque(maxlen=PERF_LOG_MAX)
+
+
+def _get_perf_logger() -> logging.Logger:
+    logger = logging.getLogger("misharp.perf")
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+def _log_perf(event: str, stats: BuildStats, **extra) -> Dict:
+    """계측 결과를 세션/프로세스 기록에 남기고 JSON 한 줄로 로그 출력 (auth label 포함)"""
+    record = {
+        "event": event,
+        "label": st.session_state.get(STATE_AUTH_LABEL, "-"),
+        "ts": time.strftime("%Y-%m-%d %H:%M:%S"),
+        **extra,
+        **stats.summary(),
+    }
+    _get_perf_log().append(record)
+    st.session_state[STATE_LAST_PERF] = record
+    _get_perf_logger().info(json.dumps(record, ensure_ascii=False))
+    return record
 
 
-def _calc_total_height(resized_heights: List[int], top_pad: int, bottom_pad: int, gap: int) -> int:
-    if not resized_heights:
-        return 0
-    return top_pad + bottom_pad + sum(resized_heights) + gap * (len(resized_heights) - 1)
+def _sidebar_perf_panel():
+    with st.expander("성능 계측 (관리자)", expanded=False):
+        last = st.session_state.get(STATE_LAST_PERF)
+        if last:
+            st.caption(
+                f"이 세션 최근 {last['event']}: {last['wall_seconds']:.2f}s · "
+                f"최고 RSS {last['peak_rss_mb']:,.0f}MB (+{last['peak_rss_delta_mb']:,.0f}MB)"
+            )
+            st.dataframe(
+                [
+                    {
+                        "단계": name,
+                        "횟수": agg["count"],
+                        "시간(s)": agg["seconds"],
+                        "입력(KB)": round(agg["bytes_in"] / 1024),
+                        "출력(KB)": round(agg["bytes_out"] / 1024),
+                    }
+                    for name, agg in last["stages"].items()
+                ],
+                use_container_width=True,
+                hide_index=True,
+            )
+        rs = get_result_store().stats()
+        st.caption(
+            f"결과 보관소: 파일 {rs['files']}개 · {rs['bytes'] / 1024 / 1024:,.1f}MB · "
+            f"보관 {rs['ttl_seconds'] // 60}분 · 만료 삭제 {rs['expired']}개"
+        )
+        cs = _get_artifact_cache().stats()
+        lookups = cs["hits"] + cs["misses"]
+        hit_rate = f" ({cs['hits'] / lookups:.0%})" if lookups else ""
+        st.caption(
+            f"파생 캐시: 적중 {cs['hits']} / 실패 {cs['misses']}{hit_rate} · "
+            f"LRU 삭제 {cs['evictions']}개 · 항목 {cs['entries']}개 · "
+            f"{cs['bytes'] / 1024 / 1024:,.1f}/{cs['max_bytes'] / 1024 / 1024:,.0f}MB"
+        )
+        recent = list(_get_perf_log())[-30:][::-1]
+        if recent:
+            st.caption("전체 사용자 최근 기록")
+            st.dataframe(
+                [
+                    {
+                        "시각": r["ts"],
+                        "label": r["label"],
+                        "작업": r["event"],
+                        "장수": r.get("count", "-"),
+                        "시간(s)": r["wall_seconds"],
+                        "최고 RSS(MB)": r["peak_rss_mb"],
+                    }
+                    for r in recent
+                ],
+                use_container_width=True,
+                hide_index=True,
+            )
+        elif not last:
+            st.caption("아직 기록이 없습니다.")
 
 
-def _build_jsx(
-    base_name: str,
-    canvas_h: int,
-    top_pad: int,
-    gap: int,
-    heights: List[int],
-    image_files: List[str],
-    images_folder_name: str,
-) -> str:
-    y_positions = []
-    y = top_pad
-    for h in heights:
-        y_positions.append(y)
-        y += h + gap
-
-    lines = []
-    lines.append("#target photoshop")
-    lines.append("app.displayDialogs = DialogModes.NO;")
-    lines.append("")
-    lines.append("var _oldRulerUnits = app.preferences.rulerUnits;")
-    lines.append("var _oldTypeUnits  = app.preferences.typeUnits;")
-    lines.append("app.preferences.rulerUnits = Units.PIXELS;")
-    lines.append("app.preferences.typeUnits  = TypeUnits.PIXELS;")
-    lines.append("function _restoreUnits(){ app.preferences.rulerUnits=_oldRulerUnits; app.preferences.typeUnits=_oldTypeUnits; }")
-    lines.append("")
-    lines.append("function placeSmartObject(file){")
-    lines.append("  var desc=new ActionDescriptor();")
-    lines.append('  desc.putPath(charIDToTypeID("null"), file);')
-    lines.append('  desc.putEnumerated(charIDToTypeID("FTcs"), charIDToTypeID("QCSt"), charIDToTypeID("Qcs0"));')
-    lines.append("  var ofs=new ActionDescriptor();")
-    lines.append('  ofs.putUnitDouble(charIDToTypeID("Hrzn"), charIDToTypeID("#Pxl"), 0);')
-    lines.append('  ofs.putUnitDouble(charIDToTypeID("Vrtc"), charIDToTypeID("#Pxl"), 0);')
-    lines.append('  desc.putObject(charIDToTypeID("Ofst"), charIDToTypeID("Ofst"), ofs);')
-    lines.append('  executeAction(charIDToTypeID("Plc "), desc, DialogModes.NO);')
-    lines.append("}")
-    lines.append("")
-    lines.append("function safeTranslate(layer, dx, dy){")
-    lines.append("  var maxStep=5000;")
-    lines.append("  var sx=dx, sy=dy;")
-    lines.append("  while(Math.abs(sx)>maxStep || Math.abs(sy)>maxStep){")
-    lines.append("    var stepX=Math.max(-maxStep, Math.min(maxStep, sx));")
-    lines.append("    var stepY=Math.max(-maxStep, Math.min(maxStep, sy));")
-    lines.append("    layer.translate(stepX, stepY);")
-    lines.append("    sx-=stepX; sy-=stepY;")
-    lines.append("  }")
-    lines.append("  if(sx!==0 || sy!==0) layer.translate(sx, sy);")
-    lines.append("}")
-    lines.append("")
-    lines.append("function moveLayerToXY(layer, x, y){")
-    lines.append("  var b=layer.bounds;")
-    lines.append('  var left=b[0].as("px");')
-    lines.append('  var top=b[1].as("px");')
-    lines.append("  safeTranslate(layer, x-left, y-top);")
-    lines.append("}")
-    lines.append("")
-    lines.append("try {")
-    lines.append("  var jsxFile=new File($.fileName);")
-    lines.append("  var baseFolder=jsxFile.parent;")
-    lines.append(f'  var imgFolder=new Folder(baseFolder.fsName + "/{images_folder_name}");')
-    lines.append('  if(!imgFolder.exists){ alert("이미지 폴더 없음: " + imgFolder.fsName); throw new Error("Missing images folder"); }')
-    lines.append(f'  var doc=app.documents.add({CANVAS_WIDTH}, {canvas_h}, 72, "{base_name}", NewDocumentMode.RGB, DocumentFill.WHITE);')
-    lines.append("  var files=[];")
-    for fn in image_files:
-        lines.append(f'  files.push(new File(imgFolder.fsName + "/{fn}"));')
-    lines.append("  var ys=[")
-    for i, yp in enumerate(y_positions):
-        comma = "," if i != len(y_positions) - 1 else ""
-        lines.append(f"    {int(yp)}{comma}")
-    lines.append("  ];")
-    lines.append("  for(var i=0;i<files.length;i++){")
-    lines.append("    if(!files[i].exists){ alert('이미지 파일 없음: ' + files[i].fsName); throw new Error('Missing file'); }")
-    lines.append("    placeSmartObject(files[i]);")
-    lines.append("    var layer=doc.activeLayer;")
-    lines.append("    moveLayerToXY(layer, 0, ys[i]);")
-    lines.append('    layer.name="IMG_" + (i+1);')
-    lines.append("  }")
-    lines.append(f'  var outPsd=new File(baseFolder.fsName + "/{base_name}.psd");')
-    lines.append("  var psdOpt=new PhotoshopSaveOptions();")
-    lines.append("  psdOpt.embedColorProfile=true;")
-    lines.append("  psdOpt.maximizeCompatibility=true;")
-    lines.append("  doc.saveAs(outPsd, psdOpt, true, Extension.LOWERCASE);")
-    lines.append('  alert("PSD 생성 완료: " + outPsd.fsName);')
-    lines.append("} catch(e) { alert('PSD 생성 오류: ' + e); } finally { _restoreUnits(); }")
-    return "\n".join(lines)
-
-
-def _build_readme() -> str:
-    return (
-        "MISHARP 상세페이지 생성기 (내부용)\n\n"
-        "[규칙]\n"
-        "- JPG: 전체 이미지 1장으로 생성\n"
-        f"- PSD: {MAX_PER_PSD}장 초과 시 자동 2개로 분할\n"
-        f"- 최대 등록: {MAX_TOTAL_IMAGES}장\n\n"
-        "[PSD 생성 방법]\n"
-        "1) ZIP 압축 해제\n"
-        "2) Photoshop 실행(CS 이상 권장)\n"
-        "3) 파일 > 스크립트 > 찾아보기...\n"
-        "4) *_psd_build.jsx 실행\n"
-        "5) 같은 폴더에 .psd 생성\n\n"
-        "ⓒ misharpcompany. All rights reserved.\n"
-    )
+def _sidebar_memory_panel():
+    governor = get_memory_governor()
+    with st.expander("세션 메모리 (관리자)", expanded=False):
+        rows = governor.report()
+        total = sum(r["total"] for r in rows)
+        st.caption(
+            f"전체 {total / 1024 / 1024:,.0f}MB / 한도 {governor.budget_bytes / 1024 / 1024:,.0f}MB · "
+            f"세션 {len(rows)}개 · 한도 초과 시 오래 쉰 세션부터 리사이즈/결과 메모 비움"
+        )
+        if not rows:
+            return
+        mb = 1024 * 1024
+        me = _session_id()
+        st.dataframe(
+            [
+                {
+                    "label": r["label"] + (" (나)" if r["sid"] == me else ""),
+                    "원본(MB)": round(r["originals"] / mb, 1),
+                    "픽셀(MB)": round(r["pixels"] / mb, 1),
+                    "결과(MB)": round((r["artifacts"] + r["previews"]) / mb, 1),
+                    "합계(MB)": round(r["total"] / mb, 1),
+                    "마지막 활동": time.strftime("%H:%M:%S", time.localtime(r["last_active"])),
+                    "비움": r["evictions"],
+                    "비운 양(MB)": round(r["evicted_bytes"] / mb, 1),
+                    "업로드 거절": r["rejected_uploads"],
+                }
+                for r in rows
+            ],
+            use_container_width=True,
+            hide_index=True,
+        )
 
 
-def _zip_bundle(
-    base_name: str,
-    jpg_bytes: bytes,
-    jsx_entries: List[Tuple[str, str]],
-    resized_groups: List[Tuple[str, List[Tuple[str, bytes]]]],
-) -> bytes:
-    out = io.BytesIO()
-    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-        zf.writestr(f"{base_name}.jpg", jpg_bytes)
-        zf.writestr("README.txt", _build_readme())
-        for jsx_name, jsx_text in jsx_entries:
-            zf.writestr(jsx_name, jsx_text)
-        for folder_name, files in resized_groups:
-            for fn, b in files:
-                zf.writestr(f"{folder_name}/{fn}", b)
-    return out.getvalue()
+# =========================================================
+# SESSION
+# =========================================================
+def _get_thumb(it: ImgItem, w: int = THUMB_W) -> bytes:
+    """썸네일 캐시 (sha1, 폭) 기준 → 업로드 시 1회 생성, 순서변경/삭제 시 재사용"""
+    cache: Dict[Tuple[str, int], bytes] = st.session_state.setdefault(STATE_THUMBS, {})
+    key = (it.sha1, w)
+    thumb = cache.get(key)
+    if thumb is None:
+        thumb = _thumb_from_bytes(it.bytes_data, w=w)
+        cache[key] = thumb
+    return thumb
 
 
 def _init_state():
     st.session_state.setdefault(STATE_ITEMS, [])
     st.session_state.setdefault(STATE_SEEN, set())
+    st.session_state.setdefault(STATE_THUMBS, {})
     st.session_state.setdefault(STATE_LAST_PREVIEW, None)
+    st.session_state.setdefault(STATE_LAST_JPG, None)
     st.session_state.setdefault(STATE_LAST_ZIP, None)
     st.session_state.setdefault(STATE_LAST_META, None)
+    st.session_state.setdefault(STATE_BUILD_MEMO, BuildMemo(keep_bundle=False))
+    st.session_state.setdefault(STATE_JOBS, [])
+    st.session_state.setdefault(STATE_JOBS_PICKED, set())
 
 
 def _reset_all():
     st.session_state[STATE_ITEMS] = []
     st.session_state[STATE_SEEN] = set()
+    st.session_state[STATE_THUMBS] = {}
     st.session_state[STATE_LAST_PREVIEW] = None
+    st.session_state[STATE_LAST_JPG] = None
     st.session_state[STATE_LAST_ZIP] = None
     st.session_state[STATE_LAST_META] = None
+    st.session_state[STATE_BUILD_MEMO] = BuildMemo(keep_bundle=False)
+    st.session_state.pop(STATE_DOWNLOAD_READY, None)
+
+
+def _memory_footprint() -> SessionFootprint:
+    """이 세션의 메모리 사용 대상 (목록/메모/썸네일/작업 객체가 바뀌었을 수 있어 매번 참조 갱신)"""
+    fp = st.session_state.get(STATE_MEMORY)
+    if fp is None:
+        fp = st.session_state[STATE_MEMORY] = SessionFootprint(_session_id())
+    fp.label = st.session_state.get(STATE_AUTH_LABEL, "-")
+    fp.items = st.session_state[STATE_ITEMS]
+    fp.jobs = st.session_state[STATE_JOBS]
+    fp.memo = st.session_state[STATE_BUILD_MEMO]
+    fp.thumbs = st.session_state[STATE_THUMBS]
+    return fp
+
+
+def _upload_bytes(uf) -> int:
+    """업로드 1개가 목록에 올라갔을 때의 원본 크기 (ZIP은 압축 해제 후 이미지 크기 합)"""
+    if uf.name.lower().endswith(".zip"):
+        return zip_declared_image_bytes(uf.getvalue())
+    return uf.size
+
 
+def _admit_upload(uploaded_files) -> Optional[str]:
+    """업로드 전 프로세스 전체 메모리 예산 확인 → 거절 사유 (괜찮으면 None)"""
+    incoming = sum(_upload_bytes(uf) for uf in uploaded_files)
+    return get_memory_governor().admit(_memory_footprint(), incoming)
 
-def _add_one_image(name: str, raw: bytes) -> bool:
+
+def _add_one_image(name: str, raw: bytes, stats: Optional[BuildStats] = None) -> bool:
+    stats = stats or BuildStats()
     h = _sha1(raw)
     seen = st.session_state[STATE_SEEN]
     if h in seen:
         return False
-    im = _open_image_any(raw)
-    ext = os.path.splitext(name)[1].lower().lstrip(".") or "jpg"
-    st.session_state[STATE_ITEMS].append(ImgItem(name=name, bytes_data=raw, pil=im, ext=ext, sha1=h))
+    # 헤더는 정상이지만 픽셀 데이터가 깨진 파일(잘린 JPEG 등)은 썸네일 디코딩에서 걸림
+    # → 썸네일까지 만든 뒤에 목록에 추가 (깨진 항목이 목록에 남아 매 rerun마다 실패하지 않도록)
+    try:
+        with stats.stage("upload_probe", bytes_in=len(raw)):
+            it = make_item(name, raw)
+        with stats.stage("thumbnail", bytes_in=len(raw)) as rec:
+            rec["bytes_out"] = len(_get_thumb(it))
+    except (ValueError, OSError) as e:
+        st.warning(f"{name}: {e} → 건너뜀")
+        return False
+    st.session_state[STATE_ITEMS].append(it)
     seen.add(h)
     st.session_state[STATE_SEEN] = seen
     return True
@@ -417,6 +665,7 @@ def _add_one_image(name: str, raw: bytes) -> bool:
 def _add_items_from_uploads(uploaded_files) -> Tuple[int, int]:
     added = 0
     skipped_over_limit = 0
+    stats = BuildStats()
 
     for uf in uploaded_files:
         remaining = MAX_TOTAL_IMAGES - len(st.session_state[STATE_ITEMS])
@@ -428,90 +677,334 @@ def _add_items_from_uploads(uploaded_files) -> Tuple[int, int]:
         name = uf.name
 
         if name.lower().endswith(".zip"):
-            extracted = _extract_zip_images(raw)
+            report = ZipIngestReport()
+            extracted = _iter_zip_images(
+                raw,
+                seen=st.session_state[STATE_SEEN],
+                stop=lambda: len(st.session_state[STATE_ITEMS]) >= MAX_TOTAL_IMAGES,
+                report=report,
+            )
             for iname, ibytes in extracted:
-                remaining = MAX_TOTAL_IMAGES - len(st.session_state[STATE_ITEMS])
-                if remaining <= 0:
-                    skipped_over_limit += 1
-                    break
-                if _add_one_image(iname, ibytes):
+                if _add_one_image(iname, ibytes, stats):
                     added += 1
+            skipped_over_limit += report.over_limit
+            for bad_name, reason in report.rejected:
+                st.warning(f"ZIP 안의 {bad_name}: {reason} → 건너뜀")
         else:
-            if _add_one_image(name, raw):
+            if _add_one_image(name, raw, stats):
                 added += 1
 
+    _log_perf("upload", stats, count=added, files=len(uploaded_files))
     return added, skipped_over_limit
 
 
-def _build_outputs(base_name: str, top_pad: int, bottom_pad: int, gap: int):
+def _start_list_click(action: str) -> BuildStats:
+    """순서 변경/삭제 클릭 계측 시작 (클릭 콜백 → 목록 다시 그리기 끝까지 서버 시간)"""
+    stats = BuildStats()
+    st.session_state[STATE_LIST_CLICK] = (action, stats)
+    return stats
+
+
+def _move_item(i: int, delta: int):
+    with _start_list_click("move").stage("list_apply"):
+        items: List[ImgItem] = st.session_state[STATE_ITEMS]
+        j = i + delta
+        if 0 <= i < len(items) and 0 <= j < len(items):
+            items[i], items[j] = items[j], items[i]
+
+
+def _delete_item(i: int):
+    with _start_list_click("delete").stage("list_apply"):
+        items: List[ImgItem] = st.session_state[STATE_ITEMS]
+        if not 0 <= i < len(items):
+            return
+        removed = items.pop(i)
+        st.session_state[STATE_SEEN].discard(removed.sha1)
+        st.session_state[STATE_THUMBS].pop((removed.sha1, THUMB_W), None)
+
+
+@st.fragment
+def _item_list_fragment(plan_opts: Dict):
+    """
+    순서 변경 / 삭제 목록 (버튼을 누르면 이 부분만 다시 그림 → 로그인/업로드/미리보기는 다시 실행하지 않음)
+    - 버튼은 on_click 콜백으로 목록만 바꿈 / 목록이 비면 생성 버튼 상태 때문에 전체 rerun
+    - 클릭마다 서버 처리 시간을 성능 로그에 "list_click"으로 기록
+    - plan_opts: 예상 높이 안내용 레이아웃 설정 (_page_plan_notice)
+    """
     items: List[ImgItem] = st.session_state[STATE_ITEMS]
+    click = st.session_state.pop(STATE_LIST_CLICK, None)
+    if click and not items:
+        st.rerun()
+
+    with click[1].stage("list_render") if click else nullcontext():
+        _item_list_rows(items)
+        _page_plan_notice(items, plan_opts)
+
+    if click:
+        action, stats = click
+        _log_perf("list_click", stats, action=action, count=len(items))
+
+
+def _item_list_rows(items: List[ImgItem]):
+    st.caption(f"현재 목록: {len(items)}/{MAX_TOTAL_IMAGES}장")
+    if not items:
+        st.info("업로드된 이미지가 없습니다.")
+    for i, it in enumerate(items):
+        row = st.columns([0.14, 0.56, 0.10, 0.10, 0.10])
+        with row[0]:
+            st.image(_get_thumb(it), use_column_width=True)
+        with row[1]:
+            short = it.name if len(it.name) <= 44 else (it.name[:41] + "...")
+            st.markdown(f"**{i+1}. {short}**  \n원본: {it.width}×{it.height}")
+        with row[2]:
+            st.button("▲", key=f"up_{i}", disabled=(i == 0), on_click=_move_item, args=(i, -1),
+                      use_container_width=True)
+        with row[3]:
+            st.button("▼", key=f"down_{i}", disabled=(i == len(items) - 1), on_click=_move_item, args=(i, 1),
+                      use_container_width=True)
+        with row[4]:
+            st.button("삭제", key=f"del_{i}", on_click=_delete_item, args=(i,), use_container_width=True)
+
+
+def _page_plan_notice(items: List[ImgItem], plan_opts: Dict):
+    """
+    생성 전 예상 높이 (원본 헤더 기준, 디코딩 없음)
+    - 전체 높이가 JPEG 최대 높이를 넘는 폭은 전체 JPG 대신 분할 JPG로 만든다고 미리 안내
+    """
+    if not items:
+        return
+    plans = plan_page(
+        items,
+        plan_opts["top_pad"],
+        plan_opts["bottom_pad"],
+        plan_opts["gap"],
+        widths=plan_opts["widths"],
+        pad_mode=plan_opts["pad_mode"],
+    )
+    main = plans[0]
+    st.caption(f"예상 높이: 최대 {main['total_height']:,}px · PSD {len(main['part_ranges'])}개")
+    over = [f"{p['width']}px {p['total_height']:,}px" for p in plans if not p["long_jpg"]]
+    if over:
+        split = plan_opts["slice_height"] or LONG_JPG_SPLIT_HEIGHT
+        st.warning(
+            f"예상 높이가 JPG 한 장 한도({JPEG_MAX_DIMENSION:,}px)를 넘습니다 ({', '.join(over)}) → "
+            f"전체 JPG 대신 분할 JPG(높이 {split:,}px 이하)를 ZIP에 담습니다."
+        )
+
 
-    # unique by sha1 (중복 방지)
-    uniq: List[ImgItem] = []
-    seen2 = set()
-    for it in items:
-        if it.sha1 in seen2:
+def _submit_job(
+    base_name: str,
+    top_pad: int,
+    bottom_pad: int,
+    gap: int,
+    items: Optional[List[ImgItem]] = None,
+    memo: Optional[BuildMemo] = None,
+    with_psd: bool = False,
+    encode_profile: str = DEFAULT_ENCODE_PROFILE,
+    max_jpg_bytes: Optional[int] = None,
+    slice_height: Optional[int] = None,
+    widths: Optional[Tuple[int, ...]] = None,
+    pad_mode: str = DEFAULT_PAD_MODE,
+) -> GenerationJob:
+    """
+    생성 작업을 백그라운드 대기열에 넣음 (버튼을 누른 rerun은 바로 끝남)
+    - items 생략 시 현재 목록 스냅샷 + 세션 BuildMemo 사용 (재생성 시 재사용)
+    """
+    if items is None:
+        items = list(st.session_state[STATE_ITEMS])
+        memo = st.session_state.setdefault(STATE_BUILD_MEMO, BuildMemo(keep_bundle=False))
+    job = GenerationJob(
+        owner=_session_id(),
+        base_name=base_name,
+        items=items,
+        top_pad=top_pad,
+        bottom_pad=bottom_pad,
+        gap=gap,
+        memo=memo,
+        with_psd=with_psd,
+        encode_profile=encode_profile,
+        max_jpg_bytes=max_jpg_bytes,
+        slice_height=slice_height,
+        widths=widths,
+        pad_mode=pad_mode,
+    )
+    get_job_queue().submit(job)
+    st.session_state[STATE_JOBS].append(job)
+    return job
+
+
+def _queue_zip_products(uf, top_pad: int, bottom_pad: int, gap: int, **job_opts):
+    """상품별 폴더 ZIP → 폴더마다 생성 작업 1개 (세션 목록과 별개, BuildMemo 없이)"""
+    raw = uf.getvalue()
+    zip_base = _sanitize_filename(uf.name.rsplit(".", 1)[0])
+    folders = zip_product_folders(raw)
+    room = JOB_MAX_ACTIVE_PER_SESSION - len(_active_jobs())
+    if len(folders) > room:
+        st.warning(f"대기열 상한으로 {len(folders) - room}개 상품은 추가하지 않았습니다.")
+    queued = 0
+    for folder in folders[:max(0, room)]:
+        items, skipped, report = items_from_zip_folder(raw, folder)
+        name = folder.rsplit("/", 1)[-1] or zip_base
+        for bad_name, reason in report.rejected:
+            st.warning(f"{name}/{bad_name}: {reason} → 건너뜀")
+        if skipped:
+            st.warning(f"{name}: 최대 {MAX_TOTAL_IMAGES}장 제한으로 {skipped}개 이미지를 제외했습니다.")
+        if not items:
             continue
-        uniq.append(it)
-        seen2.add(it.sha1)
+        plan = plan_page(items, top_pad, bottom_pad, gap, widths=job_opts["widths"], pad_mode=job_opts["pad_mode"])[0]
+        if not plan["long_jpg"]:
+            st.info(f"{name}: 예상 높이가 JPG 한 장 한도({JPEG_MAX_DIMENSION:,}px)를 넘어 전체 JPG 대신 분할 JPG로 만듭니다.")
+        _submit_job(_sanitize_filename(name), top_pad, bottom_pad, gap, items=items, memo=BuildMemo(keep_bundle=False, keep_pixels=False), **job_opts)
+        queued += 1
+    if queued:
+        st.success(f"{queued}개 상품을 생성 대기열에 추가했습니다.")
+    else:
+        st.warning("ZIP 안에서 생성할 이미지를 찾지 못했습니다.")
 
-    resized_all = [_fit_to_width_900(it.pil) for it in uniq]
-    heights_all = [im.size[1] for im in resized_all]
 
-    # JPG 전체 1장
-    long_img = _compose_long_jpg(resized_all, top_pad=top_pad, bottom_pad=bottom_pad, gap=gap)
-    jpg_bytes = _save_jpg_bytes(long_img)
+def _active_jobs() -> List[GenerationJob]:
+    return [j for j in st.session_state[STATE_JOBS] if j.active]
+
+
+def _show_job_result(job: GenerationJob):
+    jpg_file, zip_file, meta = job.result
+    st.session_state[STATE_LAST_PREVIEW] = meta["preview_jpg"]
+    st.session_state[STATE_LAST_JPG] = jpg_file
+    st.session_state[STATE_LAST_ZIP] = zip_file
+    st.session_state[STATE_LAST_META] = meta
+    st.session_state.pop(STATE_DOWNLOAD_READY, None)
+
+
+def _collect_finished_jobs() -> List[Tuple[str, str]]:
+    """
+    지난 rerun 이후 끝난 작업 반영 → 표시할 (종류, 메시지) 목록
+    - 성공: 가장 최근 결과를 미리보기/다운로드 영역에 표시 + 계측 기록
+    - 완료 작업은 JOB_HISTORY_MAX건까지만 세션에 보관
+    """
+    jobs: List[GenerationJob] = st.session_state[STATE_JOBS]
+    picked: set = st.session_state[STATE_JOBS_PICKED]
+    messages: List[Tuple[str, str]] = []
+    for job in jobs:
+        if job.active or job.id in picked:
+            continue
+        picked.add(job.id)
+        if job.status == JOB_DONE:
+            jpg_file, zip_file, meta = job.result
+            _show_job_result(job)
+            _log_perf(
+                "generate",
+                job.stats,
+                job=job.id,
+                count=meta["count"],
+                total_height=meta["total_height"],
+                input_bytes=job.input_bytes,
+                jpg_bytes=jpg_file.size if jpg_file else 0,
+                zip_bytes=zip_file.size,
+                queued_seconds=round((job.started or job.finished) - job.created, 3),
+            )
+            messages.append(("success", f"{job.base_name}: 생성 완료! 오른쪽에서 미리보기/다운로드 하세요."))
+        elif job.status == JOB_FAILED:
+            messages.append(("error", f"{job.base_name}: 생성 실패 ({job.error})"))
+        elif job.status == JOB_CANCELLED:
+            messages.append(("info", f"{job.base_name}: 생성을 취소했습니다."))
+
+    finished = [j for j in jobs if not j.active]
+    for old in finished[:-JOB_HISTORY_MAX]:
+        jobs.remove(old)
+        picked.discard(old.id)
+    return messages
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def _job_progress_fragment():
+    """진행 중인 작업의 진행률/취소 (이 부분만 주기적으로 다시 그림, 작업이 끝나면 전체 rerun)"""
+    picked: set = st.session_state[STATE_JOBS_PICKED]
+    jobs: List[GenerationJob] = st.session_state[STATE_JOBS]
+    if any(not j.active and j.id not in picked for j in jobs):
+        st.rerun()
+
+    queue = get_job_queue()
+    for job in _active_jobs():
+        if job.status == JOB_RUNNING:
+            text = f"{job.base_name} · 이미지 {job.done}/{job.total}"
+            if job.total and job.done >= job.total:
+                text += " · JPG/ZIP 마무리 중..."
+        else:
+            text = f"{job.base_name} · 대기 중 ({queue.position(job)}번째)"
+        c1, c2 = st.columns([0.78, 0.22])
+        with c1:
+            st.progress(job.progress, text=text)
+        with c2:
+            st.button(
+                "취소",
+                key=f"cancel_{job.id}",
+                disabled=job.cancel_event.is_set(),
+                on_click=queue.cancel,
+                args=(job,),
+                use_container_width=True,
+            )
+        if job.status == JOB_RUNNING and job.preview_jpg:
+            st.image(job.preview_jpg, caption="미리보기 준비 완료 · 다운로드용 고화질 JPG 생성 중...", use_column_width=True)
+
+
+def _job_results_list():
+    """세션의 완료 작업 목록 (여러 상품을 대기열로 만든 경우 결과 전환용)"""
+    done = [j for j in st.session_state[STATE_JOBS] if j.status == JOB_DONE]
+    if len(done) < 2:
+        return
+    with st.expander(f"생성 결과 {len(done)}건", expanded=True):
+        for job in reversed(done):
+            meta = job.result[2]
+            if st.button(
+                f"{job.base_name} · {meta['count']}장 · {meta['total_height']:,}px",
+                key=f"show_{job.id}",
+                use_container_width=True,
+            ):
+                _show_job_result(job)
+                st.rerun()
 
-    # PSD 분할 (10장 초과 시 2개)
-    if len(resized_all) <= MAX_PER_PSD:
-        parts = [resized_all]
-    else:
-        parts = [resized_all[:MAX_PER_PSD], resized_all[MAX_PER_PSD:]]
-
-    jsx_entries: List[Tuple[str, str]] = []
-    resized_groups: List[Tuple[str, List[Tuple[str, bytes]]]] = []
-
-    for pi, part_imgs in enumerate(parts, start=1):
-        part_heights = [im.size[1] for im in part_imgs]
-        part_canvas_h = _calc_total_height(part_heights, top_pad, bottom_pad, gap)
-
-        part_suffix = f"part{pi}"
-        part_base = f"{base_name}_{part_suffix}" if len(parts) > 1 else base_name
-        folder_name = f"images_{part_suffix}" if len(parts) > 1 else "images"
-
-        files: List[Tuple[str, bytes]] = []
-        fns: List[str] = []
-        for idx, im in enumerate(part_imgs, start=1):
-            fn = f"img_{idx:02d}.jpg"
-            files.append((fn, _save_jpg_bytes(im)))
-            fns.append(fn)
-
-        resized_groups.append((folder_name, files))
-
-        jsx_text = _build_jsx(
-            base_name=part_base,
-            canvas_h=part_canvas_h,
-            top_pad=top_pad,
-            gap=gap,
-            heights=part_heights,
-            image_files=fns,
-            images_folder_name=folder_name,
-        )
-        jsx_entries.append((f"{part_base}_psd_build.jsx", jsx_text))
-
-    meta = {
-        "count": len(resized_all),
-        "total_height": _calc_total_height(heights_all, top_pad, bottom_pad, gap),
-        "top": top_pad,
-        "bottom": bottom_pad,
-        "gap": gap,
-        "psd_parts": len(parts),
-        "max_total": MAX_TOTAL_IMAGES,
-        "max_per_psd": MAX_PER_PSD,
-    }
 
-    zip_bytes = _zip_bundle(base_name, jpg_bytes, jsx_entries, resized_groups)
-    return jpg_bytes, zip_bytes, meta
+def _prepare_download(key: str):
+    st.session_state[STATE_DOWNLOAD_READY] = key
+
+
+@st.fragment
+def _download_fragment(files: List[Tuple[str, StoredFile, str, str]]):
+    """
+    다운로드 버튼 (이 부분만 다시 그림)
+    - 평소에는 '준비' 버튼만 표시 → 결과 bytes를 세션/화면에 올리지 않음
+    - 준비를 누른 파일 1개만 ResultStore에서 읽어 다운로드 버튼으로 표시
+    - 다운로드를 누르면 다음 실행에서 준비 상태 해제 (bytes는 다시 읽지 않음)
+    - files: [(표시 이름, 핸들, 파일명, mime)]
+    """
+    store = get_result_store()
+    ready = st.session_state.get(STATE_DOWNLOAD_READY)
+    for label, handle, file_name, mime in files:
+        dl_key = f"dl_{handle.key}"
+        if ready == handle.key and st.session_state.get(dl_key):
+            st.session_state.pop(STATE_DOWNLOAD_READY, None)
+            ready = None
+        data = store.read(handle) if ready == handle.key else None
+        if data is not None:
+            st.download_button(
+                f"{label} 다운로드 ({handle.size / 1024 / 1024:.1f}MB)",
+                data=data,
+                file_name=file_name,
+                mime=mime,
+                key=dl_key,
+                type="primary",
+                use_container_width=True,
+            )
+        elif store.exists(handle):
+            st.button(
+                f"{label} 받기 ({handle.size / 1024 / 1024:.1f}MB)",
+                key=f"prep_{handle.key}",
+                on_click=_prepare_download,
+                args=(handle.key,),
+                use_container_width=True,
+            )
+        else:
+            st.warning(f"{label}: 보관 기간이 지나 삭제되었습니다. 다시 생성해 주세요.")
 
 
 # =========================================================
@@ -523,8 +1016,10 @@ def main():
     # ✅ 로그인은 무조건 "가장 먼저" 실행 (이 아래로는 인증된 사용자만)
     require_login()
 
-    sidebar_auth_box()
     _init_state()
+    job_messages = _collect_finished_jobs()
+    get_memory_governor().track(_memory_footprint())
+    sidebar_auth_box()
 
     st.markdown(
         f"""
@@ -538,6 +1033,13 @@ def main():
 
     left, right = st.columns([1.25, 0.75], gap="large")
 
+    # 생성 진행률은 오른쪽 위에서 주기적으로 갱신 (나머지 화면은 그대로 조작 가능)
+    # - 자리만 먼저 잡고, 이번 실행에서 제출한 작업까지 반영한 뒤(왼쪽 아래) 채움
+    with right:
+        st.markdown("### 미리보기")
+        progress_slot = st.empty()
+        preview_slot = st.empty()
+
     with left:
         st.markdown("### 1) 업로드")
         cA, cB = st.columns([0.65, 0.35])
@@ -552,9 +1054,6 @@ def main():
         with cB:
             replace_mode = st.checkbox("기존 목록 비우고 새로 담기", value=False)
 
-        current_count = len(st.session_state[STATE_ITEMS])
-        st.caption(f"현재 목록: {current_count}/{MAX_TOTAL_IMAGES}장")
-
         add_clicked = st.button(
             "업로드 파일 목록에 추가",
             type="primary",
@@ -565,16 +1064,19 @@ def main():
         if add_clicked and uploaded:
             if replace_mode:
                 _reset_all()
-                current_count = 0
 
-            added, skipped_limit = _add_items_from_uploads(uploaded)
-            if added == 0:
-                st.warning("추가된 새 이미지가 없습니다. (중복 제외 또는 제한 초과)")
+            rejected = _admit_upload(uploaded)
+            if rejected:
+                st.error(rejected)
             else:
-                st.success(f"추가 완료: 새 이미지 {added}개")
+                added, skipped_limit = _add_items_from_uploads(uploaded)
+                if added == 0:
+                    st.warning("추가된 새 이미지가 없습니다. (중복 제외 또는 제한 초과)")
+                else:
+                    st.success(f"추가 완료: 새 이미지 {added}개")
 
-            if skipped_limit > 0:
-                st.warning(f"최대 {MAX_TOTAL_IMAGES}장 제한으로 {skipped_limit}개 파일(또는 ZIP 내 이미지)이 추가되지 않았습니다.")
+                if skipped_limit > 0:
+                    st.warning(f"최대 {MAX_TOTAL_IMAGES}장 제한으로 {skipped_limit}개 파일(또는 ZIP 내 이미지)이 추가되지 않았습니다.")
 
         st.markdown("### 2) 레이아웃 설정")
         c1, c2 = st.columns([0.55, 0.45])
@@ -589,48 +1091,74 @@ def main():
             top_pad = st.number_input("상단 여백(px)", min_value=0, max_value=5000, value=DEFAULT_TOP_PAD, step=10)
             bottom_pad = st.number_input("하단 여백(px)", min_value=0, max_value=5000, value=DEFAULT_BOTTOM_PAD, step=10)
 
-        st.markdown("### 3) 순서 변경 / 삭제")
-        items: List[ImgItem] = st.session_state[STATE_ITEMS]
+        with_psd = st.checkbox(
+            "PSD 파일도 바로 만들기 (Photoshop 스크립트 실행 불필요)",
+            value=False,
+            help="ZIP에 레이어 PSD(Background + IMG_1, IMG_2 ...)를 함께 넣습니다. 생성 시간과 ZIP 크기가 늘어납니다.",
+        )
 
-        if not items:
-            st.info("업로드된 이미지가 없습니다.")
-        else:
-            for i, it in enumerate(items):
-                row = st.columns([0.14, 0.56, 0.10, 0.10, 0.10])
-                with row[0]:
-                    st.image(_make_thumb(it.pil), use_column_width=True)
-                with row[1]:
-                    short = it.name if len(it.name) <= 44 else (it.name[:41] + "...")
-                    st.markdown(f"**{i+1}. {short}**  \n원본: {it.pil.size[0]}×{it.pil.size[1]}")
-                with row[2]:
-                    up = st.button("▲", key=f"up_{i}", disabled=(i == 0), use_container_width=True)
-                with row[3]:
-                    down = st.button("▼", key=f"down_{i}", disabled=(i == len(items) - 1), use_container_width=True)
-                with row[4]:
-                    delete = st.button("삭제", key=f"del_{i}", use_container_width=True)
-
-                if up:
-                    items[i - 1], items[i] = items[i], items[i - 1]
-                    st.session_state[STATE_ITEMS] = items
-                    st.rerun()
-                if down:
-                    items[i + 1], items[i] = items[i], items[i + 1]
-                    st.session_state[STATE_ITEMS] = items
-                    st.rerun()
-                if delete:
-                    removed = items.pop(i)
-                    st.session_state[STATE_ITEMS] = items
-                    seen = st.session_state[STATE_SEEN]
-                    if removed.sha1 in seen:
-                        seen.remove(removed.sha1)
-                    st.session_state[STATE_SEEN] = seen
-                    st.rerun()
+        with st.expander("JPG 저장 설정", expanded=False):
+            profiles = list(ENCODE_PROFILES)
+            encode_profile = st.selectbox(
+                "용도",
+                profiles,
+                index=profiles.index(DEFAULT_ENCODE_PROFILE),
+                format_func=lambda p: ENCODE_PROFILE_LABELS.get(p, p),
+            )
+            max_jpg_mb = st.number_input(
+                "전체 JPG 최대 용량(MB, 0=제한 없음)",
+                min_value=0.0,
+                max_value=200.0,
+                value=0.0,
+                step=0.5,
+                help="넘으면 화질(quality)을 자동으로 낮춰 맞춥니다. 개별 이미지(images/)에는 적용되지 않습니다.",
+            )
+            with_slices = st.checkbox(
+                "오픈마켓용 분할 JPG도 만들기",
+                value=False,
+                help="전체 JPG를 높이 상한 이하로 잘라 ZIP에 {파일명}_01.jpg, _02.jpg ...로 넣습니다. "
+                "가능하면 이미지 사이 흰 여백에서 자릅니다.",
+            )
+            slice_height = st.number_input(
+                "분할 높이 상한(px)",
+                min_value=SLICE_MIN_HEIGHT,
+                max_value=20000,
+                value=SLICE_DEFAULT_HEIGHT,
+                step=100,
+                disabled=not with_slices,
+            )
+        with st.expander("여러 폭 동시 생성", expanded=False):
+            widths = st.multiselect(
+                "폭(px) - 첫 번째 폭이 기본 결과, 나머지는 ZIP의 {폭}px/ 폴더",
+                list(RENDITION_WIDTHS),
+                default=[CANVAS_WIDTH],
+            )
+            pad_mode = st.radio(
+                "여백/간격",
+                list(PAD_MODES),
+                index=list(PAD_MODES).index(DEFAULT_PAD_MODE),
+                format_func=lambda m: PAD_MODE_LABELS.get(m, m),
+                horizontal=True,
+                help=f"폭 비율대로 줄이기: {CANVAS_WIDTH}px 기준 여백/간격을 폭에 맞춰 조정합니다.",
+            )
+        job_opts = {
+            "with_psd": with_psd,
+            "encode_profile": encode_profile,
+            "max_jpg_bytes": int(max_jpg_mb * 1024 * 1024) or None,
+            "slice_height": int(slice_height) if with_slices else None,
+            "widths": tuple(widths) or (CANVAS_WIDTH,),
+            "pad_mode": pad_mode,
+        }
+
+        st.markdown("### 3) 순서 변경 / 삭제")
+        _item_list_fragment(dict(job_opts, top_pad=int(top_pad), bottom_pad=int(bottom_pad), gap=int(gap)))
 
         st.divider()
 
+        queue_full = len(_active_jobs()) >= JOB_MAX_ACTIVE_PER_SESSION
         cX, cY = st.columns([0.7, 0.3])
         with cX:
-            disabled = (len(st.session_state[STATE_ITEMS]) == 0) or (not base_name.strip())
+            disabled = (len(st.session_state[STATE_ITEMS]) == 0) or (not base_name.strip()) or queue_full
             gen = st.button("상세페이지 생성하기", type="primary", use_container_width=True, disabled=disabled)
         with cY:
             if st.button("전체 초기화", use_container_width=True):
@@ -638,41 +1166,81 @@ def main():
                 st.rerun()
 
         if gen:
-            jpg_bytes, zip_bytes, meta = _build_outputs(base_name, int(top_pad), int(bottom_pad), int(gap))
-            st.session_state[STATE_LAST_PREVIEW] = jpg_bytes
-            st.session_state[STATE_LAST_ZIP] = zip_bytes
-            st.session_state[STATE_LAST_META] = meta
-            st.success("생성 완료! 오른쪽에서 미리보기/다운로드 하세요.")
+            _submit_job(base_name, int(top_pad), int(bottom_pad), int(gap), **job_opts)
+            st.info("생성을 시작했습니다. 진행 상황은 오른쪽에서 확인하세요. (생성 중에도 계속 작업 가능)")
 
-    with right:
-        st.markdown("### 미리보기")
-        meta = st.session_state[STATE_LAST_META]
-        jpg_bytes = st.session_state[STATE_LAST_PREVIEW]
-        zip_bytes = st.session_state[STATE_LAST_ZIP]
+        for kind, msg in job_messages:
+            getattr(st, kind)(msg)
 
-        if meta and jpg_bytes:
-            parts_txt = "1개" if meta.get("psd_parts", 1) == 1 else f"{meta['psd_parts']}개(자동 분할)"
+        with st.expander("여러 상품 한 번에 생성 (상품별 폴더 ZIP)", expanded=False):
             st.caption(
-                f"총 {meta['count']}장 · 최종 높이 {meta['total_height']:,}px · "
-                f"상단 {meta['top']} / 하단 {meta['bottom']} / 간격 {meta['gap']}px · PSD: {parts_txt}"
+                f"ZIP 안의 폴더 1개 = 상품 1개 · 폴더 이름이 파일명이 됩니다 · "
+                f"위 여백/간격 설정 사용 · 한 번에 최대 {JOB_MAX_ACTIVE_PER_SESSION}개"
             )
-            st.image(jpg_bytes, use_column_width=True)
+            multi_zip = st.file_uploader("상품별 폴더 ZIP", type=["zip"], key="multi_uploader", label_visibility="collapsed")
+            if st.button("상품별로 생성 대기열에 추가", use_container_width=True, disabled=(multi_zip is None) or queue_full):
+                _queue_zip_products(multi_zip, int(top_pad), int(bottom_pad), int(gap), **job_opts)
+
+    # 진행 중인 작업이 있을 때만 주기 갱신 fragment 사용 (대기 중인 탭은 서버 왕복 없음)
+    # → 마지막 작업이 끝나면 fragment가 전체 rerun → 이 조건이 거짓이 되어 갱신 중단
+    if _active_jobs():
+        with progress_slot.container():
+            _job_progress_fragment()
+
+    with right:
+        meta = st.session_state[STATE_LAST_META]
+        preview_bytes = st.session_state[STATE_LAST_PREVIEW]
+        jpg_file: Optional[StoredFile] = st.session_state[STATE_LAST_JPG]
+        zip_file: Optional[StoredFile] = st.session_state[STATE_LAST_ZIP]
+
+        if meta and zip_file:
+            parts_txt = "1개"
+            if meta.get("psd_parts", 1) > 1:
+                part_heights = " / ".join(f"{h:,}" for h in meta.get("psd_part_heights", []))
+                parts_txt = f"{meta['psd_parts']}개(자동 분할: {part_heights}px)"
+            with preview_slot.container():
+                st.caption(
+                    f"총 {meta['count']}장 · 최종 높이 {meta['total_height']:,}px · "
+                    f"상단 {meta['top']} / 하단 {meta['bottom']} / 간격 {meta['gap']}px · PSD: {parts_txt}"
+                )
+                profile_txt = ENCODE_PROFILE_LABELS.get(meta.get("encode_profile"), meta.get("encode_profile", "-"))
+                if jpg_file:
+                    jpg_txt = f"JPG {jpg_file.size / 1024 / 1024:.1f}MB · {profile_txt} · quality {meta.get('jpg_quality', '-')}"
+                    if meta.get("max_jpg_bytes"):
+                        jpg_txt += f" (목표 {meta['max_jpg_bytes'] / 1024 / 1024:.1f}MB"
+                        jpg_txt += " 이하)" if meta.get("target_met") else " → 최저 화질로도 초과)"
+                    st.caption(jpg_txt)
+                else:
+                    st.caption(
+                        f"전체 높이가 JPG 한 장 한도({JPEG_MAX_DIMENSION:,}px)를 넘어 전체 JPG 없이 "
+                        f"분할 JPG로 ZIP에 담았습니다 · {profile_txt}"
+                    )
+                if meta.get("slice_heights"):
+                    st.caption(
+                        f"분할 JPG {len(meta['slice_heights'])}장 (상한 {meta['slice_height']:,}px, ZIP에 포함): "
+                        + " / ".join(f"{h:,}" for h in meta["slice_heights"])
+                    )
+                if len(meta.get("renditions", [])) > 1:
+                    st.caption(
+                        "함께 생성된 폭 (ZIP 안 폴더): "
+                        + " · ".join(
+                            f"{r['width']}px {r['total_height']:,}px ({r['folder'] or '최상위'})"
+                            for r in meta["renditions"]
+                        )
+                    )
+                if meta.get("psd_skipped"):
+                    st.caption(f"PSD 높이 한도 초과로 JSX만 포함: {', '.join(meta['psd_skipped'])}")
+                st.caption(f"미리보기는 축소본입니다 (빨간 눈금: 원본 {PREVIEW_MARK_STEP:,}px 간격)")
+                st.image(preview_bytes, use_column_width=True)
+
+            _job_results_list()
 
             st.markdown("### 다운로드")
-            st.download_button(
-                "JPG 다운로드",
-                data=jpg_bytes,
-                file_name=f"{base_name}.jpg",
-                mime="image/jpeg",
-                use_container_width=True,
-            )
-            st.download_button(
-                "ZIP(PSD용 JSX + images 포함) 다운로드",
-                data=zip_bytes,
-                file_name=f"{base_name}_bundle.zip",
-                mime="application/zip",
-                use_container_width=True,
-            )
+            result_name = meta.get("base_name", base_name)
+            files = [("ZIP(PSD용 JSX + images 포함)", zip_file, f"{result_name}_bundle.zip", "application/zip")]
+            if jpg_file:
+                files.insert(0, ("JPG", jpg_file, f"{result_name}.jpg", "image/jpeg"))
+            _download_fragment(files)
         else:
             st.info("아직 생성된 결과가 없습니다. 왼쪽에서 생성 버튼을 눌러주세요.")
 
@@ -682,14 +1250,21 @@ def main():
 **업로드 규칙**
 - 권장: 보통 5장 내외
 - 최대: {MAX_TOTAL_IMAGES}장까지 목록 등록 가능
-- {MAX_PER_PSD}장 초과 시: PSD는 자동으로 2개로 분할 생성
+- PSD 1개당 최대 {MAX_PER_PSD}장 · 캔버스 높이 {PSD_MAX_CANVAS_HEIGHT:,}px 이하: 넘으면 높이가 고르게 여러 개로 자동 분할
+- 전체 JPG 높이는 최대 {JPEG_MAX_DIMENSION:,}px: 넘으면 전체 JPG 대신 분할 JPG(`파일명_01.jpg` ..., {LONG_JPG_SPLIT_HEIGHT:,}px 이하)를 ZIP에 담습니다 (예상 높이는 목록 아래에 표시)
 
 **사용 순서**
 1) 업로드 → ‘업로드 파일 목록에 추가’  
 2) 순서/여백 확인  
 3) ‘상세페이지 생성하기’ → 오른쪽에서 다운로드
 
+**오픈마켓 업로드**
+- ‘JPG 저장 설정’에서 ‘오픈마켓용 분할 JPG도 만들기’를 켜면 ZIP에 `파일명_01.jpg`, `_02.jpg` ...가 함께 들어갑니다
+- ‘여러 폭 동시 생성’에서 860 / 640px를 함께 고르면 한 번에 만들어 ZIP의 `860px/`, `640px/` 폴더에 넣습니다
+
 **PSD 만들기(중요)**
+- ‘PSD 파일도 바로 만들기’를 켰다면: ZIP 안의 `*.psd`를 바로 열면 됩니다 (픽셀 레이어)
+- Smart Object PSD가 필요하면:
 1) ZIP 압축 해제  
 2) Photoshop 실행(CS 이상 권장)  
 3) `파일 > 스크립트 > 찾아보기...`  
@@ -0,0 +1,2538 @@
+"""
+MISHARP 상세페이지 생성 엔진 (Streamlit 없이 사용 가능)
+
+- app.py(UI)와 tools/batch_generate.py(일괄 처리 CLI)가 함께 사용
+- 세션 상태에 의존하지 않음: 메모/캐시는 인자(BuildMemo)로 주고받음
+
+사용 예:
+    from engine import render_page
+    jpg_bytes, zip_bytes, meta = render_page(["a.jpg", "b.png"], "misharp_detailpage")
+"""
+import io
+import os
+import re
+import zipfile
+import hashlib
+import tempfile
+import threading
+import time
+import uuid
+import warnings
+import weakref
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from PIL import ExifTags, Image, ImageDraw, ImageFile, ImageFont, ImageSequence
+
+from psd_writer import PSD_MAX_DIMENSION, write_layered_psd
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+CANVAS_WIDTH = 900
+
+# ✅ 여러 폭 동시 생성 (자사몰 900 / 오픈마켓 860 / 모바일 피드 640)
+# - 첫 번째 폭 결과는 ZIP 최상위, 나머지는 {폭}px/ 폴더에 같은 구성으로 생성
+# - 여백/간격: "scale" = 폭 비율대로 조정 / "fixed" = 입력값 그대로
+RENDITION_WIDTHS = (900, 860, 640)
+PAD_MODES = ("scale", "fixed")
+DEFAULT_PAD_MODE = "scale"
+
+# ✅ PSD 분할 규칙: 이미지 순서대로 연속 구간으로 나누고, PSD마다 레이어 수/캔버스 높이 상한 적용
+# (파트 수는 최소, 파트끼리 높이는 최대한 고르게)
+MAX_PER_PSD = 10  # PSD 1개당 최대 이미지(레이어) 수
+PSD_MAX_CANVAS_HEIGHT = 30000  # PSD 1개 캔버스 최대 높이(px) (Photoshop PSD 형식 한도)
+# 전체 등록 상한: PSD 파트 수에는 제한이 없고, 전체 JPG가 JPEG 최대 높이를 넘으면 분할 JPG로 대신 제공
+# (LONG_JPG_SPLIT_HEIGHT) → 장수 상한은 높이 한도가 아니라 세션 메모리/생성 시간 기준 (PSD 6개 분량)
+MAX_TOTAL_IMAGES = MAX_PER_PSD * 6
+
+DEFAULT_TOP_PAD = 180
+DEFAULT_BOTTOM_PAD = 250
+DEFAULT_GAP = 300
+
+# ✅ 썸네일 (현재 안정버전 기준: 70)
+THUMB_W = 70
+
+# ✅ JPEG 축소 디코딩 여유 배율
+# (DCT 축소 결과가 최종 폭의 1.5배 이상일 때만 사용 → 900px 결과 화질 유지)
+DRAFT_HEADROOM = 1.5
+
+# ✅ 큰 원본 축소(PNG/WebP/GIF 등 축소 디코딩이 없는 형식 포함): 정수 배율 box 축소(reduce) → LANCZOS 2단계
+# (마지막 LANCZOS 단계가 최소 RESAMPLE_REDUCING_GAP배 축소가 되도록 reduce 배율 선택 → 화질 유지)
+RESAMPLE_REDUCING_GAP = 2.0
+
+# ✅ 축소 피라미드: 원본을 1/2씩 줄인 단계(reduce)를 여러 폭이 공유
+# (각 폭은 자기 폭의 PYRAMID_HEADROOM배 이상인 가장 작은 단계에서 LANCZOS → 화질 유지)
+PYRAMID_HEADROOM = 2.0
+
+# ✅ JPEG 저장 프로필 (img_NN.jpg / 전체 JPG 공통, 레이아웃 설정에서 선택)
+# - archive: 원본 보관용 (기존 기본값)
+# - marketplace: 오픈마켓 업로드용 (4:2:0, 용량 우선)
+# - fast-preview: 빠른 확인용 (허프만 최적화 생략)
+ENCODE_PROFILES: Dict[str, Dict] = {
+    "archive": {"quality": 95, "subsampling": 0, "optimize": True},
+    "marketplace": {"quality": 85, "subsampling": 2, "optimize": True},
+    "fast-preview": {"quality": 75, "subsampling": 2, "optimize": False},
+}
+DEFAULT_ENCODE_PROFILE = "archive"
+JPEG_SETTINGS = ENCODE_PROFILES[DEFAULT_ENCODE_PROFILE]
+
+# ✅ 전체 JPG 목표 용량 모드: quality를 낮춰 가며 max_bytes 이하가 되는 가장 높은 값 탐색
+JPEG_TARGET_MIN_QUALITY = 40  # 이보다 낮추지 않음 (못 맞추면 이 값으로 저장)
+JPEG_TARGET_PARALLEL = 3  # 탐색 1회에 동시에 시험 인코딩하는 quality 개수
+
+# ✅ 파생 결과물 디스크 캐시 (세션 간 공유, 용량 초과 시 LRU 삭제)
+ARTIFACT_CACHE_DIR = os.environ.get(
+    "MISHARP_CACHE_DIR", os.path.join(tempfile.gettempdir(), "misharp_artifact_cache")
+)
+ARTIFACT_CACHE_MAX_BYTES = int(os.environ.get("MISHARP_CACHE_MAX_MB", "1024")) * 1024 * 1024
+ARTIFACT_CACHE_TMP_MAX_AGE = 600  # 이보다 오래된 .tmp_* (중단된 쓰기)는 시작 시 삭제
+
+# ✅ 생성 결과(JPG/ZIP) 임시 보관소: 세션에는 핸들만 두고 다운로드할 때 읽음
+# (마지막 접근 후 TTL이 지나면 백그라운드에서 삭제)
+RESULT_STORE_DIR = os.environ.get(
+    "MISHARP_RESULT_DIR", os.path.join(tempfile.gettempdir(), "misharp_results")
+)
+RESULT_STORE_TTL_SECONDS = int(os.environ.get("MISHARP_RESULT_TTL_MIN", "120")) * 60
+RESULT_STORE_SWEEP_SECONDS = 300
+
+# ✅ 이미지별 디코딩/리사이즈/인코딩 병렬 작업 수 (프로세스 전체 공유)
+# 1 이하 → 순차 처리 (디버깅용)
+BUILD_WORKERS = int(os.environ.get("MISHARP_BUILD_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+# ✅ 긴 페이지는 가로 띠(band) 단위로 합성 + JPEG 스트리밍 인코딩
+# (전체 높이만큼의 캔버스를 만들지 않음 → 메모리 사용량이 페이지 높이와 무관)
+STREAM_COMPOSE_MIN_HEIGHT = 16000
+STREAM_BAND_HEIGHT = 512  # 16의 배수 (JPEG MCU 경계)
+JPEG_MAX_DIMENSION = 65500
+
+# ✅ 전체 높이가 JPEG_MAX_DIMENSION을 넘는 페이지: 전체 JPG는 만들지 않고 분할 JPG({파일명}_01.jpg ...)로 대신 제공
+# (분할 높이를 따로 고르지 않았으면 이 높이 이하로 자름 → 분할 1장은 한 번에 합성하는 캔버스와 같은 크기)
+# - 판정은 생성 전 원본 헤더 기준 높이(plan_page)로 함 → 화면 안내와 실제 결과가 같음
+LONG_JPG_SPLIT_HEIGHT = STREAM_COMPOSE_MIN_HEIGHT
+
+# ✅ 오픈마켓용 분할 JPG ({파일명}_01.jpg ...): 높이 상한 이하로 자르고, 가능하면 이미지 사이 흰 여백에서 자름
+SLICE_DEFAULT_HEIGHT = 3000
+SLICE_MIN_HEIGHT = 500
+
+# ✅ 미리보기 전용 저해상도 JPG (다운로드용 원본 JPG와 별도)
+PREVIEW_WIDTH = 450
+PREVIEW_QUALITY = 70
+PREVIEW_MARK_STEP = 1000  # 원본 기준 높이 눈금 간격(px)
+
+# ✅ ZIP 번들: 메모리에서 작성하다 이 크기를 넘으면 임시파일(디스크)로 전환
+ZIP_SPOOL_MAX_BYTES = 64 * 1024 * 1024
+# ✅ ZIP 업로드 안전장치 (압축 해제 전에 검사)
+ZIP_MAX_ENTRY_BYTES = 256 * 1024 * 1024  # 항목 1개 압축 해제 크기 상한
+ZIP_MAX_RATIO = 100  # 압축률(해제 크기 / 압축 크기) 상한
+ZIP_HEADER_PROBE_BYTES = 256 * 1024  # 픽셀 수 확인용으로 읽는 앞부분 최대 크기
+MAX_SOURCE_PIXELS = 120_000_000  # 원본 이미지 1장 픽셀 수 상한 (약 120MP, JPEG은 축소 디코딩으로 예산 안에 들면 허용)
+MAX_DECODE_PIXELS = 50_000_000  # 한 번에 디코딩하는 픽셀 예산: JPEG은 넘으면 축소 디코딩(draft)으로 줄여서 엶
+
+# ✅ 백그라운드 생성 작업: 프로세스 전체 동시 실행 수 (세션당 동시 실행은 1개)
+MAX_RUNNING_JOBS = int(os.environ.get("MISHARP_MAX_JOBS", "2"))
+
+# ✅ 세션 메모리 예산 (프로세스 전체: 모든 세션의 원본 업로드 + 리사이즈 픽셀 + 메모 결과 합계)
+# - 넘으면 오래 쉬고 있는 세션부터 다시 만들 수 있는 것(리사이즈 픽셀/메모/썸네일)을 비움
+# - 비워도 넘으면 새 업로드 거절
+SESSION_MEMORY_BUDGET_BYTES = int(os.environ.get("MISHARP_MEMORY_BUDGET_MB", "1536")) * 1024 * 1024
+
+
+# =========================================================
+# INSTRUMENTATION
+# =========================================================
+def _rss_bytes() -> int:
+    """현재 프로세스 RSS (Linux는 /proc, 그 외는 최고치로 대체)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        try:
+            import resource
+
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except Exception:
+            return 0
+
+
+class BuildStats:
+    """
+    생성 1회(또는 업로드 1회) 단계별 계측
+    - stage(): 소요 시간 / 입력·출력 바이트 기록 (작업 풀 스레드에서도 사용 가능)
+    - peak_rss: 단계가 끝날 때마다 RSS를 읽어 최고치 기록 (다른 세션 작업도 포함된 프로세스 값)
+    """
+
+    def __init__(self):
+        self.records: List[Dict] = []
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self.rss_start = _rss_bytes()
+        self.peak_rss = self.rss_start
+
+    @contextmanager
+    def stage(self, name: str, bytes_in: int = 0):
+        rec = {"stage": name, "bytes_in": bytes_in, "bytes_out": 0}
+        t0 = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            rec["seconds"] = time.perf_counter() - t0
+            rss = _rss_bytes()
+            with self._lock:
+                self.records.append(rec)
+                self.peak_rss = max(self.peak_rss, rss)
+
+    def summary(self) -> Dict:
+        """단계 이름별 합계 (count / seconds / bytes_in / bytes_out) + 전체 소요 시간 / 최고 RSS"""
+        stages: Dict[str, Dict] = {}
+        with self._lock:
+            for r in self.records:
+                agg = stages.setdefault(r["stage"], {"count": 0, "seconds": 0.0, "bytes_in": 0, "bytes_out": 0})
+                agg["count"] += 1
+                agg["seconds"] += r["seconds"]
+                agg["bytes_in"] += r["bytes_in"]
+                agg["bytes_out"] += r["bytes_out"]
+            peak = self.peak_rss
+        for agg in stages.values():
+            agg["seconds"] = round(agg["seconds"], 4)
+        return {
+            "wall_seconds": round(time.perf_counter() - self._t0, 4),
+            "peak_rss_mb": round(peak / 1e6, 1),
+            "peak_rss_delta_mb": round((peak - self.rss_start) / 1e6, 1),
+            "stages": stages,
+        }
+
+
+# =========================================================
+# IMAGE UTIL
+# =========================================================
+@dataclass
+class ImgItem:
+    """
+    - 세션에는 압축된 원본 bytes + 헤더에서 읽은 메타데이터만 보관
+    - 픽셀은 썸네일/리사이즈/생성 단계에서 _decode_item()으로 필요할 때만 디코딩
+    """
+    name: str
+    bytes_data: bytes
+    ext: str
+    sha1: str
+    width: int
+    height: int
+    mode: str
+    format: str
+    n_frames: int = 1
+
+
+def _sha1(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+def _sanitize_filename(name: str) -> str:
+    name = (name or "").strip()
+    if not name:
+        return "misharp_detailpage"
+    name = re.sub(r"\s+", "_", name)
+    name = re.sub(r"[^0-9A-Za-z가-힣_\-]+", "", name)
+    return name[:80] or "misharp_detailpage"
+
+
+def _is_image_filename(fn: str) -> bool:
+    fn_l = fn.lower()
+    return fn_l.endswith((".jpg", ".jpeg", ".png", ".gif", ".webp"))
+
+
+def _source_pixel_problem(w: int, h: int, fmt: str) -> Optional[str]:
+    """
+    원본 픽셀 수 검사 (헤더 크기만 사용, 디코딩 전) → 문제가 있으면 사유 문자열
+    - MAX_SOURCE_PIXELS 이하: 통과
+    - JPEG: 1/8 축소 디코딩으로 MAX_DECODE_PIXELS 이하가 되면 통과 (_open_image_any가 줄여서 엶)
+    """
+    pixels = w * h
+    if pixels <= MAX_SOURCE_PIXELS:
+        return None
+    if fmt == "JPEG" and (w // 8) * (h // 8) <= MAX_DECODE_PIXELS:
+        return None
+    return f"픽셀 수 초과({pixels / 1e6:.0f}MP)"
+
+
+def _open_image_any(data: bytes, min_width: Optional[int] = None) -> Image.Image:
+    """
+    - min_width 지정 시 JPEG은 DCT 축소 디코딩(draft) 사용
+      → 폭이 min_width × DRAFT_HEADROOM 이상인 가장 작은 1/2, 1/4, 1/8 배율로 디코딩
+    - JPEG이 MAX_DECODE_PIXELS를 넘으면 예산 안에 드는 배율까지 축소 디코딩 (min_width와 관계없이)
+    - 픽셀 예산을 넘는 원본은 픽셀 메모리를 잡기 전에 ValueError
+    - 최종 리사이즈(reduce → LANCZOS)는 호출하는 쪽에서 수행
+    """
+    im = Image.open(io.BytesIO(data))
+    w, h = im.size
+    problem = _source_pixel_problem(w, h, im.format or "")
+    if problem:
+        raise ValueError(problem)
+    if im.format == "JPEG":
+        target = None
+        if min_width:
+            draft_w = int(min_width * DRAFT_HEADROOM)
+            if w >= draft_w * 2:
+                target = (draft_w, max(1, int(h * draft_w / float(w))))
+        if w * h > MAX_DECODE_PIXELS:
+            f = 2
+            while f < 8 and (w // f) * (h // f) > MAX_DECODE_PIXELS:
+                f *= 2
+            budget = (-(-w // f), -(-h // f))
+            if target is None or budget[0] < target[0]:
+                target = budget
+        if target:
+            im.draft("RGB", target)
+    if getattr(im, "is_animated", False):
+        frame0 = next(ImageSequence.Iterator(im))
+        im = frame0.copy()
+    if im.mode not in ("RGB", "RGBA"):
+        im = im.convert("RGB")
+    return im
+
+
+def _probe_image(data: bytes) -> Tuple[int, int, str, str, int]:
+    """
+    헤더만 읽어 (width, height, mode, format, n_frames) 반환 (픽셀 디코딩 없음)
+    - 픽셀 수는 호출하는 쪽에서 _source_pixel_problem()으로 검사 (Pillow 경고는 생략)
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+        im = Image.open(io.BytesIO(data))
+    with im:
+        return im.size[0], im.size[1], im.mode, im.format or "", int(getattr(im, "n_frames", 1) or 1)
+
+
+def _decode_item(it: ImgItem, min_width: Optional[int] = None) -> Image.Image:
+    """ImgItem 픽셀 디코딩 (결과는 호출한 쪽에서 쓰고 버림 → 세션에 보관하지 않음)"""
+    return _open_image_any(it.bytes_data, min_width=min_width)
+
+
+def _resize_to_width(im: Image.Image, width: int) -> Image.Image:
+    """폭 맞춤 축소 (큰 원본은 reduce로 정수 배율 box 축소 후 LANCZOS, 모드는 그대로)"""
+    w, h = im.size
+    new_h = max(1, int(round(h * width / float(w))))
+    return im.resize((width, new_h), resample=Image.Resampling.LANCZOS, reducing_gap=RESAMPLE_REDUCING_GAP)
+
+
+def _fit_to_width_900(im: Image.Image, width: int = CANVAS_WIDTH) -> Image.Image:
+    if im.size[0] == width:
+        return im.convert("RGB") if im.mode != "RGB" else im
+    return _resize_to_width(im, width).convert("RGB")
+
+
+def _downscale_pyramid(im: Image.Image, widths: Iterable[int]) -> Dict[int, Image.Image]:
+    """
+    한 번 디코딩한 이미지 → 폭별 RGB 이미지 {폭: 이미지}
+    - 큰 폭부터 처리하면서 필요한 만큼만 reduce(2) 단계를 추가 (단계는 모든 폭이 공유)
+    - 원본이 목표 폭의 PYRAMID_HEADROOM배보다 작으면 원본에서 바로 리사이즈 (기존과 동일)
+    """
+    levels = [im]
+    out: Dict[int, Image.Image] = {}
+    for w in sorted(set(widths), reverse=True):
+        while levels[-1].size[0] // 2 >= w * PYRAMID_HEADROOM:
+            levels.append(levels[-1].reduce(2))
+        out[w] = _fit_to_width_900(levels[-1], width=w)
+    return out
+
+
+def _make_thumb(im: Image.Image, w: int = THUMB_W) -> bytes:
+    thumb = _resize_to_width(im, w)
+    out = io.BytesIO()
+    thumb.save(out, format="PNG")
+    return out.getvalue()
+
+
+def _exif_thumb(data: bytes, min_width: int = THUMB_W) -> Optional[Image.Image]:
+    """
+    JPEG 내장 EXIF 썸네일 추출 (전체 디코딩 생략용)
+    - 폭이 min_width 이상이고 원본과 비율이 같을 때만 사용 (레터박스 썸네일 제외)
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as im:
+            if im.format != "JPEG":
+                return None
+            raw_exif = im.info.get("exif") or b""
+            src_w, src_h = im.size
+            ifd1 = im.getexif().get_ifd(ExifTags.IFD.IFD1)
+        offset = ifd1.get(0x0201)
+        length = ifd1.get(0x0202)
+        if not offset or not length or not raw_exif.startswith(b"Exif\x00\x00"):
+            return None
+        tiff = raw_exif[6:]
+        thumb = Image.open(io.BytesIO(tiff[offset:offset + length]))
+        thumb.load()
+    except Exception:
+        return None
+    tw, th = thumb.size
+    if tw < min_width or abs(tw / float(th) - src_w / float(src_h)) > 0.02 * (src_w / float(src_h)):
+        return None
+    return thumb.convert("RGB") if thumb.mode not in ("RGB", "RGBA") else thumb
+
+
+def _thumb_from_bytes(data: bytes, w: int = THUMB_W) -> bytes:
+    im = _exif_thumb(data, min_width=w)
+    if im is None:
+        im = _open_image_any(data, min_width=w)
+    return _make_thumb(im, w=w)
+
+
+@dataclass
+class ZipIngestReport:
+    """ZIP 업로드 처리 결과 (건너뛴 항목 집계)"""
+    rejected: List[Tuple[str, str]] = field(default_factory=list)  # (파일명, 사유)
+    duplicates: int = 0
+    over_limit: int = 0
+
+
+def _is_zip_image_entry(info: zipfile.ZipInfo) -> bool:
+    if info.is_dir():
+        return False
+    name = info.filename
+    base = os.path.basename(name)
+    if not base or base.startswith(".") or "__MACOSX/" in name:
+        return False
+    return _is_image_filename(name)
+
+
+def _zip_entry_pixels(zf: zipfile.ZipFile, info: zipfile.ZipInfo) -> Optional[Tuple[int, int, str]]:
+    """
+    헤더 부분만 압축 해제해 (가로, 세로, 형식) 확인 (ZIP_HEADER_PROBE_BYTES 안에서 못 찾으면 None)
+    - Pillow 자체 한도를 넘으면 DecompressionBombError 그대로 전달
+    """
+    parser = ImageFile.Parser()
+    read = 0
+    with zf.open(info) as f, warnings.catch_warnings():
+        warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+        while read < ZIP_HEADER_PROBE_BYTES and parser.image is None:
+            chunk = f.read(16 * 1024)
+            if not chunk:
+                break
+            read += len(chunk)
+            try:
+                parser.feed(chunk)
+            except Image.DecompressionBombError:
+                raise
+            except Exception:
+                return None
+    if parser.image is None:
+        return None
+    w, h = parser.image.size
+    return w, h, parser.image.format or ""
+
+
+def _zip_entry_problem(zf: zipfile.ZipFile, info: zipfile.ZipInfo) -> Optional[str]:
+    """압축 폭탄 검사 → 문제가 있으면 사유 문자열"""
+    if info.file_size > ZIP_MAX_ENTRY_BYTES:
+        return f"압축 해제 크기 초과({info.file_size / 1e6:.0f}MB)"
+    if info.compress_size and info.file_size / float(info.compress_size) > ZIP_MAX_RATIO:
+        return f"비정상 압축률({info.file_size / float(info.compress_size):.0f}배)"
+    try:
+        size = _zip_entry_pixels(zf, info)
+    except Image.DecompressionBombError:
+        return "픽셀 수 초과"
+    if size is None:
+        return "이미지 헤더를 읽을 수 없음"
+    return _source_pixel_problem(*size)
+
+
+def _iter_zip_images(
+    zip_bytes: bytes,
+    seen: Optional[set] = None,
+    stop: Optional[Callable[[], bool]] = None,
+    report: Optional[ZipIngestReport] = None,
+    folder: Optional[str] = None,
+):
+    """
+    ZIP 안의 이미지를 하나씩 (파일명, bytes)로 yield (필요할 때만 압축 해제)
+    - folder를 주면 그 폴더 바로 아래 이미지만 (상품별 폴더 ZIP)
+    - __MACOSX / 숨김 파일은 읽지 않고 건너뜀
+    - 크기/압축률/픽셀 수 검사를 통과한 항목만 압축 해제
+    - seen(sha1 집합)에 있거나 ZIP 안에서 중복된 이미지는 건너뜀
+    - stop()이 True가 된 뒤에는 yield하지 않고, 검사를 통과한 중복 아닌 이미지만 report.over_limit에 셈
+      (거절/중복 항목은 제한 초과로 세지 않음 → 남은 항목도 1개씩 압축 해제해 확인)
+    """
+    report = report if report is not None else ZipIngestReport()
+    seen_local = set(seen or ())
+    with zipfile.ZipFile(io.BytesIO(zip_bytes), "r") as zf:
+        infos = [info for info in zf.infolist() if _is_zip_image_entry(info)]
+        if folder is not None:
+            infos = [info for info in infos if _zip_entry_folder(info) == folder]
+        for info in infos:
+            name = os.path.basename(info.filename)
+            problem = _zip_entry_problem(zf, info)
+            if problem:
+                report.rejected.append((name, problem))
+                continue
+            with zf.open(info) as f:
+                data = f.read(ZIP_MAX_ENTRY_BYTES + 1)
+            if len(data) > ZIP_MAX_ENTRY_BYTES:
+                report.rejected.append((name, "압축 해제 크기 초과"))
+                continue
+            h = _sha1(data)
+            if h in seen_local:
+                report.duplicates += 1
+                continue
+            seen_local.add(h)
+            if stop is not None and stop():
+                report.over_limit += 1
+                continue
+            yield name, data
+
+
+def _extract_zip_images(zip_bytes: bytes) -> List[Tuple[str, bytes]]:
+    return list(_iter_zip_images(zip_bytes))
+
+
+def _zip_entry_folder(info: zipfile.ZipInfo) -> str:
+    return os.path.dirname(info.filename.replace("\\", "/").rstrip("/"))
+
+
+def zip_declared_image_bytes(zip_bytes: bytes, limit: int = MAX_TOTAL_IMAGES) -> int:
+    """
+    ZIP 안 이미지를 모두 풀었을 때의 크기 (헤더의 file_size 합, 압축 해제 없이)
+    - 크기/압축률 검사로 거절될 항목은 제외, 앞에서부터 limit개까지만 (그 뒤는 어차피 올리지 않음)
+    - ZIP이 아니면 파일 크기 그대로
+    """
+    total = 0
+    count = 0
+    try:
+        zf = zipfile.ZipFile(io.BytesIO(zip_bytes), "r")
+    except zipfile.BadZipFile:
+        return len(zip_bytes)
+    with zf:
+        for info in zf.infolist():
+            if count >= limit:
+                break
+            if not _is_zip_image_entry(info) or info.file_size > ZIP_MAX_ENTRY_BYTES:
+                continue
+            if info.compress_size and info.file_size / float(info.compress_size) > ZIP_MAX_RATIO:
+                continue
+            total += info.file_size
+            count += 1
+    return total
+
+
+def zip_product_folders(zip_bytes: bytes) -> List[str]:
+    """
+    상품별 폴더 ZIP → 이미지가 들어 있는 폴더 목록 (ZIP 안 순서)
+    - 최상위에 바로 이미지가 있으면 "" (상품 1개)
+    """
+    folders: List[str] = []
+    with zipfile.ZipFile(io.BytesIO(zip_bytes), "r") as zf:
+        for info in zf.infolist():
+            if not _is_zip_image_entry(info):
+                continue
+            d = _zip_entry_folder(info)
+            if d not in folders:
+                folders.append(d)
+    return folders
+
+
+def _compose_long_jpg(
+    resized_images: List[Image.Image], top_pad: int, bottom_pad: int, gap: int, width: int = CANVAS_WIDTH
+) -> Image.Image:
+    heights = [im.size[1] for im in resized_images]
+    total_h = top_pad + bottom_pad + sum(heights) + gap * (len(resized_images) - 1)
+
+    canvas = Image.new("RGB", (width, total_h), color=(255, 255, 255))
+    y = top_pad
+    for idx, im in enumerate(resized_images):
+        canvas.paste(im, (0, y))
+        y += im.size[1]
+        if idx != len(resized_images) - 1:
+            y += gap
+    return canvas
+
+
+def _save_jpg_bytes(im: Image.Image, settings: Optional[Dict] = None) -> bytes:
+    out = io.BytesIO()
+    im.save(out, format="JPEG", **(settings or JPEG_SETTINGS))
+    return out.getvalue()
+
+
+def _encode_profile(name: Optional[str]) -> Dict:
+    """프로필 이름 → JPEG 저장 설정 (없는 이름이면 ValueError)"""
+    name = name or DEFAULT_ENCODE_PROFILE
+    if name not in ENCODE_PROFILES:
+        raise ValueError(f"알 수 없는 저장 프로필: {name} (가능: {', '.join(ENCODE_PROFILES)})")
+    return ENCODE_PROFILES[name]
+
+
+def _encode_to_target(
+    encode: Callable[[int], bytes],
+    quality: int,
+    max_bytes: int,
+    min_quality: int = JPEG_TARGET_MIN_QUALITY,
+) -> Tuple[bytes, int, bool]:
+    """
+    encode(quality) 결과가 max_bytes 이하가 되는 가장 높은 quality 탐색
+    - 먼저 지정 quality로 1회 → 넘으면 [min_quality, quality-1] 구간을 k등분 탐색
+    - 한 라운드의 후보 quality들은 작업 풀에서 동시에 인코딩 (라운드 수 ≈ log_(k+1) 구간 길이)
+    - 반환: (jpg bytes, 사용한 quality, 목표 달성 여부) / 못 맞추면 min_quality 결과
+    """
+    data = encode(quality)
+    if len(data) <= max_bytes or quality <= min_quality:
+        return data, quality, len(data) <= max_bytes
+    best: Optional[Tuple[int, bytes]] = None
+    lowest: Tuple[int, bytes] = (quality, data)
+    lo, hi = min_quality, quality - 1
+    fanout = max(1, min(JPEG_TARGET_PARALLEL, BUILD_WORKERS))
+    while lo <= hi:
+        span = hi - lo + 1
+        k = min(fanout, span)
+        qs = sorted({lo + (span * (i + 1)) // (k + 1) for i in range(k)})
+        results = list(_imap_ordered(lambda q: (q, encode(q)), qs))
+        lowest = min(lowest, results[0], key=lambda r: r[0])
+        fails = [i for i, (_, b) in enumerate(results) if len(b) > max_bytes]
+        first_fail = fails[0] if fails else len(results)
+        if first_fail > 0:
+            best = results[first_fail - 1]
+            lo = best[0] + 1
+        if first_fail < len(results):
+            hi = results[first_fail][0] - 1
+    if best is None:
+        return lowest[1], lowest[0], False
+    return best[1], best[0], True
+
+
+def _calc_total_height(resized_heights: List[int], top_pad: int, bottom_pad: int, gap: int) -> int:
+    if not resized_heights:
+        return 0
+    return top_pad + bottom_pad + sum(resized_heights) + gap * (len(resized_heights) - 1)
+
+
+def _greedy_psd_parts(
+    heights: List[int], top_pad: int, bottom_pad: int, gap: int, max_height: int, max_layers: int
+) -> List[Tuple[int, int]]:
+    """앞에서부터 상한을 넘기 직전까지 채워 나가는 분할 (이미지 1장이 상한보다 크면 단독 파트)"""
+    parts: List[Tuple[int, int]] = []
+    start = 0
+    acc = 0
+    for i, h in enumerate(heights):
+        if i > start:
+            grown = top_pad + bottom_pad + acc + h + gap * (i - start)
+            if i - start >= max_layers or grown > max_height:
+                parts.append((start, i))
+                start, acc = i, 0
+        acc += h
+    parts.append((start, len(heights)))
+    return parts
+
+
+def _partition_psd_parts(
+    heights: List[int],
+    top_pad: int,
+    bottom_pad: int,
+    gap: int,
+    max_canvas_height: int = PSD_MAX_CANVAS_HEIGHT,
+    max_layers: int = MAX_PER_PSD,
+) -> List[Tuple[int, int]]:
+    """
+    PSD 분할 구간 [(시작, 끝), ...] (이미지 순서 유지)
+    - 파트 수: 상한(레이어 수 / 캔버스 높이)을 지키는 최소 개수
+    - 같은 파트 수 안에서 가장 높은 파트가 최소가 되도록 높이 상한을 이분 탐색
+    """
+    if not heights:
+        return [(0, 0)]
+    max_layers = max(1, max_layers)
+    parts = _greedy_psd_parts(heights, top_pad, bottom_pad, gap, max_canvas_height, max_layers)
+    if len(parts) == 1:
+        return parts
+    k = len(parts)
+    lo = max(top_pad + bottom_pad + h for h in heights)
+    hi = max(_calc_total_height(heights[a:b], top_pad, bottom_pad, gap) for a, b in parts)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if len(_greedy_psd_parts(heights, top_pad, bottom_pad, gap, mid, max_layers)) <= k:
+            hi = mid
+        else:
+            lo = mid + 1
+    return _greedy_psd_parts(heights, top_pad, bottom_pad, gap, lo, max_layers)
+
+
+def _layout_y_positions(heights: List[int], top_pad: int, gap: int) -> List[int]:
+    ys = []
+    y = top_pad
+    for h in heights:
+        ys.append(y)
+        y += h + gap
+    return ys
+
+
+def _iter_page_bands(
+    heights: List[int],
+    load: Callable[[int], Image.Image],
+    top_pad: int,
+    bottom_pad: int,
+    gap: int,
+    band_h: int = STREAM_BAND_HEIGHT,
+    width: int = CANVAS_WIDTH,
+):
+    """
+    _compose_long_jpg와 같은 배치를 가로 띠 단위로 생성 (yield: (y0, band 이미지))
+    - load(i): i번째 리사이즈 이미지를 필요할 때 가져옴 (띠를 벗어나면 바로 놓아줌)
+    """
+    total_h = _calc_total_height(heights, top_pad, bottom_pad, gap)
+    ys = _layout_y_positions(heights, top_pad, gap)
+    idx = 0
+    loaded: Dict[int, Image.Image] = {}
+    for b0 in range(0, total_h, band_h):
+        b1 = min(total_h, b0 + band_h)
+        band = Image.new("RGB", (width, b1 - b0), color=(255, 255, 255))
+        while idx < len(heights) and ys[idx] + heights[idx] <= b0:
+            loaded.pop(idx, None)
+            idx += 1
+        j = idx
+        while j < len(heights) and ys[j] < b1:
+            src_top = max(b0, ys[j]) - ys[j]
+            src_bottom = min(b1, ys[j] + heights[j]) - ys[j]
+            if src_bottom > src_top:
+                if j not in loaded:
+                    loaded[j] = load(j)
+                strip = loaded[j].crop((0, src_top, width, src_bottom))
+                band.paste(strip, (0, ys[j] + src_top - b0))
+            j += 1
+        yield b0, band
+
+
+def _slice_cuts(heights: List[int], top_pad: int, bottom_pad: int, gap: int, max_height: int) -> List[int]:
+    """
+    분할 JPG 경계 y 좌표 [0, ..., 전체 높이] (각 구간 높이 <= max_height)
+    - 상한 안에서 가장 아래쪽 이미지 사이 간격을 골라 그 가운데에서 자름 (간격 0이면 이미지 경계)
+    - 상한 안에 간격이 없을 때만(이미지 1장이 상한보다 김) 상한 위치에서 자름
+    """
+    total_h = _calc_total_height(heights, top_pad, bottom_pad, gap)
+    if max_height < 1:
+        raise ValueError(f"분할 높이가 잘못되었습니다: {max_height}")
+    ys = _layout_y_positions(heights, top_pad, gap)
+    gaps = [(y0 + h, y1) for y0, h, y1 in zip(ys, heights, ys[1:])]
+    cuts = [0]
+    y = 0
+    while total_h - y > max_height:
+        limit = y + max_height
+        cut = limit
+        for w0, w1 in gaps:
+            # 지금 구간 시작보다 아래에서 시작하는 간격만 (같은 간격에서 다시 자르지 않음)
+            if y < w0 <= limit:
+                cut = min((w0 + w1) // 2, limit)
+        cuts.append(cut)
+        y = cut
+    cuts.append(total_h)
+    return cuts
+
+
+def _tap_page_regions(bands, cuts: List[int], on_region: Callable[[Image.Image], None], width: int = CANVAS_WIDTH):
+    """
+    띠 스트림을 그대로 넘겨주면서, cuts 경계 구간 이미지가 완성될 때마다 on_region(구간 이미지) 호출
+    - 미리보기 생성과 같은 합성 패스에서 분할 이미지를 만듦 (다시 합성하지 않음)
+    """
+    seg = 0
+    region: Optional[Image.Image] = None
+    for b0, band in bands:
+        b1 = b0 + band.size[1]
+        y = b0
+        while seg < len(cuts) - 1 and y < b1:
+            s0, s1 = cuts[seg], cuts[seg + 1]
+            if region is None:
+                region = Image.new("RGB", (width, s1 - s0), color=(255, 255, 255))
+            take = min(b1, s1)
+            region.paste(band.crop((0, y - b0, width, take - b0)), (0, y - s0))
+            y = take
+            if take == s1:
+                on_region(region)
+                region = None
+                seg += 1
+        yield b0, band
+
+
+def _jpeg_split(data: bytes) -> Tuple[bytes, bytes]:
+    """JPEG 바이트를 (SOI~SOS 헤더, 엔트로피 데이터)로 분리 (EOI 제외)"""
+    pos = 2
+    while True:
+        if data[pos] != 0xFF:
+            raise ValueError("JPEG marker expected")
+        marker = data[pos + 1]
+        seg_len = int.from_bytes(data[pos + 2:pos + 4], "big")
+        pos += 2 + seg_len
+        if marker == 0xDA:
+            break
+    end = data.rfind(b"\xff\xd9")
+    return data[:pos], data[pos:end]
+
+
+def _jpeg_patch_height(header: bytes, height: int) -> bytes:
+    pos = 2
+    while pos < len(header):
+        marker = header[pos + 1]
+        seg_len = int.from_bytes(header[pos + 2:pos + 4], "big")
+        if marker in (0xC0, 0xC1, 0xC2):
+            h_at = pos + 5
+            return header[:h_at] + height.to_bytes(2, "big") + header[h_at + 2:]
+        pos += 2 + seg_len
+    raise ValueError("SOF marker not found")
+
+
+_RST_RE = re.compile(b"\xff[\xd0-\xd7]")
+
+
+def _write_banded_jpg(bands, width: int, total_h: int, fp, settings: Optional[Dict] = None) -> int:
+    """
+    띠 이미지들을 이어 하나의 baseline JPEG으로 기록 (스트리밍)
+    - 각 띠를 MCU 한 줄마다 restart marker가 들어가게 인코딩 → 엔트로피 데이터를 그대로 이어 붙임
+    - 허프만 테이블은 표준 테이블 사용(optimize 불가), 화질/서브샘플링은 settings(기본 JPEG_SETTINGS)와 동일
+    - 반환: 기록한 바이트 수
+    """
+    if total_h > JPEG_MAX_DIMENSION:
+        raise ValueError(f"JPEG 최대 높이({JPEG_MAX_DIMENSION}px)를 초과했습니다: {total_h}px")
+    settings = dict(settings or JPEG_SETTINGS, optimize=False, restart_marker_rows=1)
+    rst_no = 0
+    written = 0
+    first = True
+    for _, band in bands:
+        buf = io.BytesIO()
+        band.save(buf, format="JPEG", **settings)
+        header, scan = _jpeg_split(buf.getvalue())
+        if first:
+            out = _jpeg_patch_height(header, total_h)
+            first = False
+        else:
+            out = bytes([0xFF, 0xD0 + (rst_no % 8)])
+            rst_no += 1
+
+        def renumber(_m):
+            nonlocal rst_no
+            mk = bytes([0xFF, 0xD0 + (rst_no % 8)])
+            rst_no += 1
+            return mk
+
+        out += _RST_RE.sub(renumber, scan)
+        fp.write(out)
+        written += len(out)
+    fp.write(b"\xff\xd9")
+    return written + 2
+
+
+def _stream_long_jpg_bytes(
+    heights: List[int],
+    load: Callable[[int], Image.Image],
+    top_pad: int,
+    bottom_pad: int,
+    gap: int,
+    settings: Optional[Dict] = None,
+    width: int = CANVAS_WIDTH,
+) -> bytes:
+    total_h = _calc_total_height(heights, top_pad, bottom_pad, gap)
+    out = io.BytesIO()
+    bands = _iter_page_bands(heights, load, top_pad, bottom_pad, gap, width=width)
+    _write_banded_jpg(bands, width, total_h, out, settings=settings)
+    return out.getvalue()
+
+
+def _draw_height_marks(preview: Image.Image, total_h: int, step: int = PREVIEW_MARK_STEP) -> Image.Image:
+    """미리보기 오른쪽 가장자리에 원본 기준 높이 눈금(step px마다) 표시"""
+    scale = preview.size[1] / float(total_h)
+    draw = ImageDraw.Draw(preview)
+    font = ImageFont.load_default()
+    pw = preview.size[0]
+    for y_full in range(step, total_h, step):
+        y = int(round(y_full * scale))
+        draw.line([(pw - 14, y), (pw - 1, y)], fill=(255, 64, 64), width=1)
+        label = f"{y_full:,}"
+        tw = draw.textlength(label, font=font)
+        draw.text((pw - 18 - tw, y - 6), label, fill=(255, 64, 64), font=font)
+    return preview
+
+
+def _preview_size(total_h: int, width: int = CANVAS_WIDTH) -> Tuple[int, int]:
+    pw = min(PREVIEW_WIDTH, width)
+    return pw, max(1, int(round(total_h * pw / float(width))))
+
+
+def _preview_from_canvas(canvas: Image.Image) -> Image.Image:
+    pw, ph = _preview_size(canvas.size[1], canvas.size[0])
+    preview = canvas.resize((pw, ph), resample=Image.Resampling.LANCZOS, reducing_gap=2.0)
+    return _draw_height_marks(preview, canvas.size[1])
+
+
+def _preview_from_bands(bands, total_h: int, width: int = CANVAS_WIDTH) -> Image.Image:
+    """_iter_page_bands 결과를 띠 단위로 축소해 미리보기 생성 (전체 캔버스 없이)"""
+    pw, ph = _preview_size(total_h, width)
+    scale = ph / float(total_h)
+    preview = Image.new("RGB", (pw, ph), color=(255, 255, 255))
+    for b0, band in bands:
+        y0 = int(round(b0 * scale))
+        y1 = int(round((b0 + band.size[1]) * scale))
+        if y1 > y0:
+            small = band.resize((pw, y1 - y0), resample=Image.Resampling.LANCZOS, reducing_gap=2.0)
+            preview.paste(small, (0, y0))
+    return _draw_height_marks(preview, total_h)
+
+
+def _save_preview_jpg_bytes(im: Image.Image) -> bytes:
+    out = io.BytesIO()
+    im.save(out, format="JPEG", quality=PREVIEW_QUALITY, progressive=True, optimize=True)
+    return out.getvalue()
+
+
+def _render_long_page(
+    heights: List[int],
+    load: Callable[[int], Image.Image],
+    top_pad: int,
+    bottom_pad: int,
+    gap: int,
+    on_preview: Optional[Callable[[bytes], None]] = None,
+    stats: Optional[BuildStats] = None,
+    settings: Optional[Dict] = None,
+    max_bytes: Optional[int] = None,
+    slice_cuts: Optional[List[int]] = None,
+    width: int = CANVAS_WIDTH,
+    with_full: bool = True,
+) -> Tuple[bytes, bytes, Dict, List[bytes]]:
+    """
+    전체 JPG + 미리보기 JPG (+ 분할 JPG) 생성 → (jpg_bytes, preview_bytes, 인코딩 정보, 분할 JPG 목록)
+    - heights / load(i): 리사이즈 이미지 높이 목록과 i번째 이미지를 가져오는 함수
+      → 긴 페이지(STREAM_COMPOSE_MIN_HEIGHT 이상)는 띠 1개 + 그 띠에 걸친 이미지만 메모리에 둠
+      (load가 메모에 든 이미지를 돌려주면 그만큼은 메모가 들고 있음 → BuildMemo.keep_pixels)
+    - 미리보기를 먼저 만들어 on_preview로 넘긴 뒤, 고화질 인코딩 진행
+    - max_bytes: 전체 JPG 목표 용량 → quality 탐색 (시험 인코딩은 합성된 캔버스를 그대로 재사용)
+    - slice_cuts: _slice_cuts 경계 → 합성된 캔버스(긴 페이지는 미리보기용 띠)에서 잘라 구간별로 병렬 인코딩
+      (분할 JPG는 목표 용량과 무관하게 프로필 quality 사용)
+    - with_full=False: 전체 JPG는 만들지 않음(b"") → 미리보기 + 분할 JPG만 (JPEG 최대 높이를 넘는 페이지)
+    """
+    stats = stats or BuildStats()
+    settings = settings or JPEG_SETTINGS
+    total_h = _calc_total_height(heights, top_pad, bottom_pad, gap)
+    raw_size = width * total_h * 3
+
+    def encode_slice(region: Image.Image) -> bytes:
+        with stats.stage("encode_slice_jpg", bytes_in=width * region.size[1] * 3) as rec:
+            data = _save_jpg_bytes(region, settings)
+            rec["bytes_out"] = len(data)
+        return data
+
+    slicer = _OrderedSubmitter(encode_slice) if slice_cuts else None
+    if total_h >= STREAM_COMPOSE_MIN_HEIGHT:
+        with stats.stage("preview", bytes_in=raw_size) as rec:
+            bands = _iter_page_bands(heights, load, top_pad, bottom_pad, gap, width=width)
+            if slicer:
+                bands = _tap_page_regions(bands, slice_cuts, slicer.submit, width=width)
+            preview_bytes = _save_preview_jpg_bytes(_preview_from_bands(bands, total_h, width=width))
+            rec["bytes_out"] = len(preview_bytes)
+        if on_preview:
+            on_preview(preview_bytes)
+        stage_name = "compose+encode_long_jpg(stream)"
+
+        def encode(q: int) -> bytes:
+            # 띠 합성은 붙여넣기뿐이라 시험 인코딩마다 다시 해도 인코딩보다 훨씬 쌈 (전체 캔버스 없이)
+            with stats.stage(stage_name, bytes_in=raw_size) as rec:
+                data = _stream_long_jpg_bytes(
+                    heights,
+                    load,
+                    top_pad,
+                    bottom_pad,
+                    gap,
+                    settings=dict(settings, quality=q),
+                    width=width,
+                )
+                rec["bytes_out"] = len(data)
+            return data
+    else:
+        with stats.stage("compose", bytes_in=sum(width * h * 3 for h in heights)) as rec:
+            resized = [load(i) for i in range(len(heights))]
+            long_img = _compose_long_jpg(resized, top_pad=top_pad, bottom_pad=bottom_pad, gap=gap, width=width)
+            resized = None
+            rec["bytes_out"] = raw_size
+        with stats.stage("preview", bytes_in=raw_size) as rec:
+            preview_bytes = _save_preview_jpg_bytes(_preview_from_canvas(long_img))
+            rec["bytes_out"] = len(preview_bytes)
+        if on_preview:
+            on_preview(preview_bytes)
+        if slicer:
+            for s0, s1 in zip(slice_cuts, slice_cuts[1:]):
+                slicer.submit(long_img.crop((0, s0, width, s1)))
+        stage_name = "encode_long_jpg"
+
+        def encode(q: int) -> bytes:
+            with stats.stage(stage_name, bytes_in=raw_size) as rec:
+                data = _save_jpg_bytes(long_img, dict(settings, quality=q))
+                rec["bytes_out"] = len(data)
+            return data
+
+    quality = settings["quality"]
+    if not with_full:
+        return b"", preview_bytes, {"jpg_quality": 0, "target_met": True}, slicer.results() if slicer else []
+    if max_bytes:
+        jpg_bytes, quality, target_met = _encode_to_target(encode, quality, max_bytes)
+    else:
+        jpg_bytes, target_met = encode(quality), True
+    slices = slicer.results() if slicer else []
+    return jpg_bytes, preview_bytes, {"jpg_quality": quality, "target_met": target_met}, slices
+
+
+def _build_jsx(
+    base_name: str,
+    canvas_h: int,
+    top_pad: int,
+    gap: int,
+    heights: List[int],
+    image_files: List[str],
+    images_folder_name: str,
+    canvas_w: int = CANVAS_WIDTH,
+) -> str:
+    y_positions = _layout_y_positions(heights, top_pad, gap)
+
+    lines = []
+    lines.append("#target photoshop")
+    lines.append("app.displayDialogs = DialogModes.NO;")
+    lines.append("")
+    lines.append("var _oldRulerUnits = app.preferences.rulerUnits;")
+    lines.append("var _oldTypeUnits  = app.preferences.typeUnits;")
+    lines.append("app.preferences.rulerUnits = Units.PIXELS;")
+    lines.append("app.preferences.typeUnits  = TypeUnits.PIXELS;")
+    lines.append("function _restoreUnits(){ app.preferences.rulerUnits=_oldRulerUnits; app.preferences.typeUnits=_oldTypeUnits; }")
+    lines.append("")
+    lines.append("function placeSmartObject(file){")
+    lines.append("  var desc=new ActionDescriptor();")
+    lines.append('  desc.putPath(charIDToTypeID("null"), file);')
+    lines.append('  desc.putEnumerated(charIDToTypeID("FTcs"), charIDToTypeID("QCSt"), charIDToTypeID("Qcs0"));')
+    lines.append("  var ofs=new ActionDescriptor();")
+    lines.append('  ofs.putUnitDouble(charIDToTypeID("Hrzn"), charIDToTypeID("#Pxl"), 0);')
+    lines.append('  ofs.putUnitDouble(charIDToTypeID("Vrtc"), charIDToTypeID("#Pxl"), 0);')
+    lines.append('  desc.putObject(charIDToTypeID("Ofst"), charIDToTypeID("Ofst"), ofs);')
+    lines.append('  executeAction(charIDToTypeID("Plc "), desc, DialogModes.NO);')
+    lines.append("}")
+    lines.append("")
+    lines.append("function safeTranslate(layer, dx, dy){")
+    lines.append("  var maxStep=5000;")
+    lines.append("  var sx=dx, sy=dy;")
+    lines.append("  while(Math.abs(sx)>maxStep || Math.abs(sy)>maxStep){")
+    lines.append("    var stepX=Math.max(-maxStep, Math.min(maxStep, sx));")
+    lines.append("    var stepY=Math.max(-maxStep, Math.min(maxStep, sy));")
+    lines.append("    layer.translate(stepX, stepY);")
+    lines.append("    sx-=stepX; sy-=stepY;")
+    lines.append("  }")
+    lines.append("  if(sx!==0 || sy!==0) layer.translate(sx, sy);")
+    lines.append("}")
+    lines.append("")
+    lines.append("function moveLayerToXY(layer, x, y){")
+    lines.append("  var b=layer.bounds;")
+    lines.append('  var left=b[0].as("px");')
+    lines.append('  var top=b[1].as("px");')
+    lines.append("  safeTranslate(layer, x-left, y-top);")
+    lines.append("}")
+    lines.append("")
+    lines.append("try {")
+    lines.append("  var jsxFile=new File($.fileName);")
+    lines.append("  var baseFolder=jsxFile.parent;")
+    lines.append(f'  var imgFolder=new Folder(baseFolder.fsName + "/{images_folder_name}");')
+    lines.append('  if(!imgFolder.exists){ alert("이미지 폴더 없음: " + imgFolder.fsName); throw new Error("Missing images folder"); }')
+    lines.append(f'  var doc=app.documents.add({canvas_w}, {canvas_h}, 72, "{base_name}", NewDocumentMode.RGB, DocumentFill.WHITE);')
+    lines.append("  var files=[];")
+    for fn in image_files:
+        lines.append(f'  files.push(new File(imgFolder.fsName + "/{fn}"));')
+    lines.append("  var ys=[")
+    for i, yp in enumerate(y_positions):
+        comma = "," if i != len(y_positions) - 1 else ""
+        lines.append(f"    {int(yp)}{comma}")
+    lines.append("  ];")
+    lines.append("  for(var i=0;i<files.length;i++){")
+    lines.append("    if(!files[i].exists){ alert('이미지 파일 없음: ' + files[i].fsName); throw new Error('Missing file'); }")
+    lines.append("    placeSmartObject(files[i]);")
+    lines.append("    var layer=doc.activeLayer;")
+    lines.append("    moveLayerToXY(layer, 0, ys[i]);")
+    lines.append('    layer.name="IMG_" + (i+1);')
+    lines.append("  }")
+    lines.append(f'  var outPsd=new File(baseFolder.fsName + "/{base_name}.psd");')
+    lines.append("  var psdOpt=new PhotoshopSaveOptions();")
+    lines.append("  psdOpt.embedColorProfile=true;")
+    lines.append("  psdOpt.maximizeCompatibility=true;")
+    lines.append("  doc.saveAs(outPsd, psdOpt, true, Extension.LOWERCASE);")
+    lines.append('  alert("PSD 생성 완료: " + outPsd.fsName);')
+    lines.append("} catch(e) { alert('PSD 생성 오류: ' + e); } finally { _restoreUnits(); }")
+    return "\n".join(lines)
+
+
+def _build_readme(
+    with_psd: bool = False,
+    slice_height: int = 0,
+    widths: Tuple[int, ...] = (CANVAS_WIDTH,),
+    split_widths: Tuple[int, ...] = (),
+) -> str:
+    """split_widths: 전체 높이가 JPEG 최대 높이를 넘어 전체 JPG 대신 분할 JPG만 넣은 폭"""
+    psd_note = (
+        "[PSD 파일 포함]\n"
+        "- 레이어 PSD(*.psd)가 함께 들어 있습니다 → Photoshop에서 바로 열기 (스크립트 실행 불필요)\n"
+        "- 레이어: Background(흰색) + IMG_1, IMG_2 ... (픽셀 레이어)\n"
+        "- Smart Object가 필요하면 아래 방법으로 JSX 실행\n\n"
+        if with_psd else ""
+    )
+    slice_note = (
+        f"- 분할 JPG: {{파일명}}_01.jpg ... (높이 {slice_height:,}px 이하, 이미지 사이 흰 여백에서 자름)\n"
+        if slice_height else ""
+    )
+    split_note = (
+        f"- 전체 높이가 {JPEG_MAX_DIMENSION:,}px를 넘어 전체 JPG 대신 분할 JPG로 제공: "
+        + ", ".join(f"{w}px" for w in split_widths)
+        + f" ({{파일명}}_01.jpg ..., 높이 {slice_height or LONG_JPG_SPLIT_HEIGHT:,}px 이하)\n"
+        if split_widths else ""
+    )
+    width_note = (
+        f"- 폭: {widths[0]}px (최상위) / "
+        + ", ".join(f"{w}px ({w}px/ 폴더)" for w in widths[1:])
+        + " - 폴더마다 같은 구성(JPG / images / JSX / PSD)\n"
+        if len(widths) > 1 else ""
+    )
+    return (
+        "MISHARP 상세페이지 생성기 (내부용)\n\n"
+        "[규칙]\n"
+        f"- JPG: 전체 이미지 1장으로 생성 (JPEG 최대 높이 {JPEG_MAX_DIMENSION:,}px)\n"
+        f"{split_note}"
+        f"{width_note}"
+        f"{slice_note}"
+        f"- PSD: 1개당 최대 {MAX_PER_PSD}장 · 캔버스 높이 {PSD_MAX_CANVAS_HEIGHT:,}px 이하로 자동 분할\n"
+        f"- 최대 등록: {MAX_TOTAL_IMAGES}장\n\n"
+        f"{psd_note}"
+        "[PSD 생성 방법]\n"
+        "1) ZIP 압축 해제\n"
+        "2) Photoshop 실행(CS 이상 권장)\n"
+        "3) 파일 > 스크립트 > 찾아보기...\n"
+        "4) *_psd_build.jsx 실행\n"
+        "5) 같은 폴더에 .psd 생성\n\n"
+        "ⓒ misharpcompany. All rights reserved.\n"
+    )
+
+
+class BundleWriter:
+    """
+    ZIP 번들을 항목 단위로 바로 기록 (이미지 인코딩이 끝나는 대로 추가)
+    - 이미 압축된 JPG/PSD(RLE)는 STORED, 텍스트(JSX/README)만 DEFLATE
+    - SpooledTemporaryFile 사용 → spool_max_bytes 초과 시 디스크로 넘김
+    """
+
+    STORED_EXTS = (".jpg", ".jpeg", ".psd")
+
+    def __init__(self, spool_max_bytes: int = ZIP_SPOOL_MAX_BYTES):
+        self._fp = tempfile.SpooledTemporaryFile(max_size=spool_max_bytes)
+        self._zf = zipfile.ZipFile(self._fp, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def _compress_type(self, name: str) -> int:
+        return zipfile.ZIP_STORED if name.lower().endswith(self.STORED_EXTS) else zipfile.ZIP_DEFLATED
+
+    def add_file(self, name: str, data: bytes):
+        self._zf.writestr(name, data, compress_type=self._compress_type(name))
+
+    def open_entry(self, name: str):
+        """크기를 미리 모르는 항목을 스트리밍으로 기록할 쓰기 전용 파일 객체 (with 블록으로 사용)"""
+        info = zipfile.ZipInfo(name, date_time=time.localtime(time.time())[:6])
+        info.compress_type = self._compress_type(name)
+        return self._zf.open(info, "w", force_zip64=True)
+
+    def add_text(self, name: str, text: str):
+        self._zf.writestr(name, text.encode("utf-8"), compress_type=zipfile.ZIP_DEFLATED)
+
+    def close(self):
+        """중앙 디렉터리 기록 후 처음 위치로 되감은 파일 객체 반환"""
+        if self._zf is not None:
+            self._zf.close()
+            self._zf = None
+        self._fp.seek(0)
+        return self._fp
+
+    def getvalue(self) -> bytes:
+        fp = self.close()
+        data = fp.read()
+        fp.close()
+        return data
+
+
+def _zip_bundle(
+    base_name: str,
+    jpg_bytes: bytes,
+    jsx_entries: List[Tuple[str, str]],
+    resized_groups: List[Tuple[str, List[Tuple[str, bytes]]]],
+) -> bytes:
+    bundle = BundleWriter()
+    bundle.add_file(f"{base_name}.jpg", jpg_bytes)
+    bundle.add_text("README.txt", _build_readme())
+    for jsx_name, jsx_text in jsx_entries:
+        bundle.add_text(jsx_name, jsx_text)
+    for folder_name, files in resized_groups:
+        for fn, b in files:
+            bundle.add_file(f"{folder_name}/{fn}", b)
+    return bundle.getvalue()
+
+
+# =========================================================
+# ARTIFACT CACHE (CROSS-SESSION, CONTENT-ADDRESSED)
+# =========================================================
+class ArtifactCache:
+    """
+    원본 sha1 + 목표 폭 + 인코딩 설정을 키로 하는 디스크 캐시
+    - 프로세스 내 모든 세션/작업이 공유 (_get_artifact_cache)
+    - 임시파일 작성 후 os.replace → 동시 세션에서도 깨진 파일을 읽지 않음
+    - max_bytes 초과 시 가장 오래 사용하지 않은 항목부터 삭제
+    - 시작 시 중단된 쓰기가 남긴 임시파일 정리 (ARTIFACT_CACHE_TMP_MAX_AGE보다 오래된 것만)
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        os.makedirs(root, exist_ok=True)
+        self._scan()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def _scan(self):
+        found = []
+        now = time.time()
+        for dirpath, _, filenames in os.walk(self.root):
+            for fn in filenames:
+                p = os.path.join(dirpath, fn)
+                try:
+                    stt = os.stat(p)
+                except OSError:
+                    continue
+                if fn.startswith("."):
+                    # 다른 프로세스가 쓰는 중일 수 있으므로 오래된 임시파일만 삭제
+                    if fn.startswith(".tmp_") and now - stt.st_mtime > ARTIFACT_CACHE_TMP_MAX_AGE:
+                        try:
+                            os.remove(p)
+                        except OSError:
+                            pass
+                    continue
+                found.append((stt.st_mtime, fn, stt.st_size))
+        for _, key, size in sorted(found):
+            self._index[key] = size
+            self._total += size
+        with self._lock:
+            self._evict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        p = self._path(key)
+        try:
+            with open(p, "rb") as f:
+                data = f.read()
+            os.utime(p, None)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+                size = self._index.pop(key, None)
+                if size is not None:
+                    self._total -= size
+            return None
+        with self._lock:
+            self.hits += 1
+            if key not in self._index:
+                self._index[key] = len(data)
+                self._total += len(data)
+            self._index.move_to_end(key)
+        return data
+
+    def put(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        p = self._path(key)
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".tmp_", dir=os.path.dirname(p))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, p)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            old = self._index.pop(key, None)
+            if old is not None:
+                self._total -= old
+            self._index[key] = len(data)
+            self._total += len(data)
+            self._evict()
+
+    def _evict(self):
+        while self._total > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._total -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._index),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_artifact_cache: Optional[ArtifactCache] = None
+_artifact_cache_lock = threading.Lock()
+
+
+def _get_artifact_cache() -> ArtifactCache:
+    """프로세스 전체에서 하나만 생성 (모듈은 Streamlit rerun 사이에도 유지됨)"""
+    global _artifact_cache
+    with _artifact_cache_lock:
+        if _artifact_cache is None:
+            _artifact_cache = ArtifactCache(ARTIFACT_CACHE_DIR, ARTIFACT_CACHE_MAX_BYTES)
+        return _artifact_cache
+
+
+def _artifact_key(kind: str, src_sha1: str, width: int, settings: Optional[Dict] = None) -> str:
+    settings_txt = ",".join(f"{k}={v}" for k, v in sorted((settings or {}).items()))
+    return _sha1(f"{kind}|{src_sha1}|{width}|{settings_txt}".encode("utf-8"))
+
+
+def _resized_for(
+    it: ImgItem,
+    width: int = CANVAS_WIDTH,
+    cache: Optional[ArtifactCache] = None,
+    stats: Optional[BuildStats] = None,
+) -> Image.Image:
+    """폭 맞춤 RGB 이미지 (캐시에는 무손실 PNG로 보관)"""
+    return _resized_set_for(it, [width], cache=cache, stats=stats)[width]
+
+
+def _resized_set_for(
+    it: ImgItem,
+    widths: List[int],
+    cache: Optional[ArtifactCache] = None,
+    stats: Optional[BuildStats] = None,
+) -> Dict[int, Image.Image]:
+    """
+    여러 폭의 폭 맞춤 RGB 이미지 {폭: 이미지}
+    - 캐시에 없는 폭만 만들되, 원본은 한 번만 디코딩(가장 큰 폭 기준 축소 디코딩)하고 축소 피라미드를 공유
+    """
+    cache = cache or _get_artifact_cache()
+    stats = stats or BuildStats()
+    out: Dict[int, Image.Image] = {}
+    missing = []
+    for w in widths:
+        cached = cache.get(_artifact_key("resized", it.sha1, w))
+        if cached is None:
+            missing.append(w)
+            continue
+        with stats.stage("resize(cache_hit)", bytes_in=len(cached)):
+            im = Image.open(io.BytesIO(cached))
+            im.load()
+            out[w] = im.convert("RGB") if im.mode != "RGB" else im
+    if not missing:
+        return out
+    with stats.stage("decode+resize", bytes_in=len(it.bytes_data)) as rec:
+        made = _downscale_pyramid(_decode_item(it, min_width=max(missing)), missing)
+        rec["bytes_out"] = sum(im.size[0] * im.size[1] * 3 for im in made.values())
+    for w, im in made.items():
+        buf = io.BytesIO()
+        im.save(buf, format="PNG", compress_level=1)
+        cache.put(_artifact_key("resized", it.sha1, w), buf.getvalue())
+    out.update(made)
+    return out
+
+
+def _encoded_for(
+    it: ImgItem,
+    resized: Image.Image,
+    width: int = CANVAS_WIDTH,
+    cache: Optional[ArtifactCache] = None,
+    stats: Optional[BuildStats] = None,
+    settings: Optional[Dict] = None,
+) -> bytes:
+    """img_NN.jpg 인코딩 결과 (원본 sha1 + 폭 + 저장 설정 기준 캐시)"""
+    cache = cache or _get_artifact_cache()
+    stats = stats or BuildStats()
+    settings = settings or JPEG_SETTINGS
+    key = _artifact_key("jpg", it.sha1, width, settings)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    with stats.stage("encode_img_jpg", bytes_in=resized.size[0] * resized.size[1] * 3) as rec:
+        data = _save_jpg_bytes(resized, settings)
+        rec["bytes_out"] = len(data)
+    cache.put(key, data)
+    return data
+
+
+# =========================================================
+# RESULT STORE (DOWNLOADS, TTL)
+# =========================================================
+@dataclass(frozen=True)
+class StoredFile:
+    """결과 보관소 파일 핸들 (세션/작업에는 이것만 보관)"""
+    key: str
+    size: int
+
+
+class ResultStore:
+    """
+    생성 결과(JPG/ZIP) 디스크 보관소
+    - put(): 파일로 한 번 기록 → StoredFile 핸들 반환 (임시파일 + os.replace)
+    - read()/open(): 다운로드할 때만 읽음, 읽을 때마다 만료 시각 연장
+    - 마지막 접근 후 ttl초가 지난 파일은 백그라운드 스레드가 sweep_seconds마다 삭제
+      (이전 프로세스가 남긴 파일도 같은 기준으로 정리)
+    """
+
+    def __init__(self, root: str, ttl: float, sweep_seconds: float = RESULT_STORE_SWEEP_SECONDS):
+        self.root = root
+        self.ttl = ttl
+        self.sweep_seconds = sweep_seconds
+        self.expired = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        os.makedirs(root, exist_ok=True)
+        self.sweep()
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="misharp-result-sweep", daemon=True)
+        self._sweeper.start()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def put(self, data: bytes, suffix: str = "") -> StoredFile:
+        key = uuid.uuid4().hex + suffix
+        fd, tmp = tempfile.mkstemp(prefix=".tmp_", dir=self.root)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        return StoredFile(key, len(data))
+
+    def open(self, handle: StoredFile):
+        """읽기용 파일 객체 (만료되어 없으면 None)"""
+        p = self._path(handle.key)
+        try:
+            f = open(p, "rb")
+        except OSError:
+            return None
+        try:
+            os.utime(p, None)
+        except OSError:
+            pass
+        return f
+
+    def read(self, handle: StoredFile) -> Optional[bytes]:
+        f = self.open(handle)
+        if f is None:
+            return None
+        with f:
+            return f.read()
+
+    def exists(self, handle: Optional[StoredFile]) -> bool:
+        return handle is not None and os.path.exists(self._path(handle.key))
+
+    def discard(self, handle: Optional[StoredFile]):
+        if handle is None:
+            return
+        try:
+            os.remove(self._path(handle.key))
+        except OSError:
+            pass
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """만료 파일 삭제 → 삭제한 개수"""
+        now = time.time() if now is None else now
+        removed = 0
+        with self._lock:
+            try:
+                names = os.listdir(self.root)
+            except OSError:
+                return 0
+            for fn in names:
+                p = os.path.join(self.root, fn)
+                try:
+                    if now - os.stat(p).st_mtime > self.ttl:
+                        os.remove(p)
+                        removed += 1
+                except OSError:
+                    continue
+            self.expired += removed
+        return removed
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_seconds):
+            self.sweep()
+
+    def stats(self) -> Dict[str, int]:
+        files = 0
+        total = 0
+        with self._lock:
+            for fn in os.listdir(self.root):
+                try:
+                    total += os.stat(os.path.join(self.root, fn)).st_size
+                    files += 1
+                except OSError:
+                    continue
+            return {"files": files, "bytes": total, "expired": self.expired, "ttl_seconds": int(self.ttl)}
+
+
+_result_store: Optional[ResultStore] = None
+_result_store_lock = threading.Lock()
+
+
+def get_result_store() -> ResultStore:
+    """프로세스 전체 공유 결과 보관소"""
+    global _result_store
+    with _result_store_lock:
+        if _result_store is None:
+            _result_store = ResultStore(RESULT_STORE_DIR, RESULT_STORE_TTL_SECONDS)
+        return _result_store
+
+
+# =========================================================
+# WORKER POOL
+# =========================================================
+_build_pool: Optional[ThreadPoolExecutor] = None
+_build_pool_lock = threading.Lock()
+
+
+def _get_build_pool() -> ThreadPoolExecutor:
+    """
+    프로세스 전체가 공유하는 작업 풀 (동시 접속자가 많아도 스레드 수는 BUILD_WORKERS로 고정)
+    - Pillow의 resize / JPEG encode는 GIL을 풀기 때문에 스레드로 병렬 처리됨
+    """
+    global _build_pool
+    with _build_pool_lock:
+        if _build_pool is None:
+            _build_pool = ThreadPoolExecutor(max_workers=max(1, BUILD_WORKERS), thread_name_prefix="misharp-build")
+        return _build_pool
+
+
+def _imap_ordered(fn: Callable, args: List):
+    """
+    fn(arg)를 병렬 실행하고 입력 순서대로 결과를 하나씩 반환 (BUILD_WORKERS <= 1이면 순차)
+    - 앞쪽 결과가 끝나는 즉시 꺼내 쓸 수 있음
+    """
+    if BUILD_WORKERS <= 1 or len(args) <= 1:
+        return (fn(a) for a in args)
+    return _get_build_pool().map(fn, args)
+
+
+class _OrderedSubmitter:
+    """
+    입력이 하나씩 생길 때마다 작업 풀에 넣고, 결과는 넣은 순서대로 모음 (BUILD_WORKERS <= 1이면 바로 실행)
+    - 끝나지 않은 작업이 window개를 넘으면 가장 오래된 작업을 기다림 → 대기 중인 입력(이미지)이 쌓이지 않음
+    """
+
+    def __init__(self, fn: Callable, window: Optional[int] = None):
+        self.fn = fn
+        self.window = window or max(1, BUILD_WORKERS)
+        self._done: List = []
+        self._pending: deque = deque()
+
+    def submit(self, arg):
+        if BUILD_WORKERS <= 1:
+            self._done.append(self.fn(arg))
+            return
+        while len(self._pending) >= self.window:
+            self._done.append(self._pending.popleft().result())
+        self._pending.append(_get_build_pool().submit(self.fn, arg))
+
+    def results(self) -> List:
+        while self._pending:
+            self._done.append(self._pending.popleft().result())
+        return self._done
+
+
+# =========================================================
+# BUILD
+# =========================================================
+@dataclass
+class BuildMemo:
+    """
+    재생성 시 재사용할 결과 (UI에서는 세션마다 하나씩 보관)
+    - items: (sha1, 폭, 저장 설정) → (리사이즈 이미지, img_NN.jpg bytes, 리사이즈 높이)
+    - keep_pixels: False면 리사이즈 이미지는 보관하지 않음(None) → 긴 JPG/PSD 합성 때
+      아티팩트 캐시(없으면 원본 디코딩)에서 한 장씩 다시 가져옴 (일회성 생성: CLI / 상품별 일괄 작업)
+    - last: 직전 생성의 키와 결과
+    - keep_bundle: False면 직전 ZIP bytes는 보관하지 않음 (결과를 ResultStore에 따로 두는 경우)
+      → 완전히 같은 입력이어도 ZIP만 다시 묶음 (이미지/전체 JPG는 그대로 재사용)
+    - lock: 생성 중에는 잡혀 있음 (메모리 거버너는 잡혀 있지 않을 때만 비움)
+    """
+    items: Dict[Tuple[str, int, Tuple], Tuple[Optional[Image.Image], bytes, int]] = field(default_factory=dict)
+    last: Optional[Dict] = None
+    keep_bundle: bool = True
+    keep_pixels: bool = True
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+
+def make_item(name: str, raw: bytes) -> ImgItem:
+    """
+    업로드 bytes → ImgItem (헤더만 읽음, 픽셀 디코딩 없음)
+    - 픽셀 예산(MAX_SOURCE_PIXELS)을 넘는 원본은 ValueError (ZIP 항목과 같은 기준)
+    """
+    try:
+        w, h, mode, fmt, n_frames = _probe_image(raw)
+    except Image.DecompressionBombError:
+        raise ValueError("픽셀 수 초과") from None
+    problem = _source_pixel_problem(w, h, fmt)
+    if problem:
+        raise ValueError(problem)
+    ext = os.path.splitext(name)[1].lower().lstrip(".") or "jpg"
+    return ImgItem(
+        name=name,
+        bytes_data=raw,
+        ext=ext,
+        sha1=_sha1(raw),
+        width=w,
+        height=h,
+        mode=mode,
+        format=fmt,
+        n_frames=n_frames,
+    )
+
+
+def _iter_item_artifacts(
+    items: List[ImgItem],
+    memo: BuildMemo,
+    widths: Tuple[int, ...] = (CANVAS_WIDTH,),
+    stats: Optional[BuildStats] = None,
+    settings: Optional[Dict] = None,
+):
+    """
+    이미지별 작업(디코딩 + 폭별 리사이즈 + img_NN.jpg 인코딩) 메모
+    - 여백/간격/순서/파일명만 바뀐 재생성 시 이미지별 작업 생략
+    - 메모에 없는 (이미지, 폭)만 작업 풀에서 병렬 처리 (이미지 1장은 한 번만 디코딩)
+      (메모 읽기/쓰기는 호출한 스레드에서만)
+    - items 순서대로 [(resized 또는 None, jpg bytes, 높이) 폭 순서대로]를 완료되는 즉시 yield
+      (memo.keep_pixels가 False면 리사이즈 이미지는 높이만 남기고 바로 놓아줌)
+    """
+    cache = _get_artifact_cache()
+    settings = settings or JPEG_SETTINGS
+    settings_key = tuple(sorted(settings.items()))
+
+    def work(job: Tuple[ImgItem, List[int]]) -> Dict[int, Tuple[Image.Image, bytes]]:
+        it, todo_widths = job
+        resized = _resized_set_for(it, todo_widths, cache=cache, stats=stats)
+        return {
+            w: (im, _encoded_for(it, im, width=w, cache=cache, stats=stats, settings=settings))
+            for w, im in resized.items()
+        }
+
+    jobs = []
+    for it in items:
+        todo_widths = [w for w in widths if (it.sha1, w, settings_key) not in memo.items]
+        if todo_widths:
+            jobs.append((it, todo_widths))
+    results = _imap_ordered(work, jobs)
+    pending = {it.sha1 for it, _ in jobs}
+    for it in items:
+        if it.sha1 in pending:
+            pending.discard(it.sha1)
+            for w, (im, jpg) in next(results).items():
+                memo.items[(it.sha1, w, settings_key)] = (im if memo.keep_pixels else None, jpg, im.size[1])
+        yield [memo.items[(it.sha1, w, settings_key)] for w in widths]
+
+
+def _rendition_pads(width: int, top_pad: int, bottom_pad: int, gap: int, pad_mode: str) -> Tuple[int, int, int]:
+    """폭별 (상단, 하단, 간격): "scale"이면 CANVAS_WIDTH 기준 비율로 조정"""
+    if pad_mode == "fixed" or width == CANVAS_WIDTH:
+        return top_pad, bottom_pad, gap
+    scale = width / float(CANVAS_WIDTH)
+    return tuple(int(round(v * scale)) for v in (top_pad, bottom_pad, gap))
+
+
+def _normalize_widths(widths: Optional[Iterable[int]]) -> Tuple[int, ...]:
+    """폭 목록 정리 (순서 유지, 중복 제거) / 비어 있으면 CANVAS_WIDTH"""
+    out: List[int] = []
+    for w in widths or (CANVAS_WIDTH,):
+        w = int(w)
+        if not 1 <= w <= PSD_MAX_DIMENSION:
+            raise ValueError(f"폭이 잘못되었습니다: {w}")
+        if w not in out:
+            out.append(w)
+    return tuple(out)
+
+
+def _unique_items(items: List[ImgItem]) -> List[ImgItem]:
+    """sha1 기준 중복 제거 (처음 나온 순서 유지)"""
+    uniq: List[ImgItem] = []
+    seen = set()
+    for it in items:
+        if it.sha1 in seen:
+            continue
+        uniq.append(it)
+        seen.add(it.sha1)
+    return uniq
+
+
+def _planned_heights(items: List[ImgItem], width: int) -> List[int]:
+    """
+    원본 헤더 크기로 계산한 폭 맞춤 높이 상한 (픽셀 디코딩 없음)
+    - 축소 디코딩(draft) / 피라미드 단계의 올림 때문에 실제 높이가 1px 더 클 수 있음 → 1px 여유 포함
+    """
+    return [max(1, int(round(it.height * width / float(it.width)))) + 1 for it in items]
+
+
+def plan_page(
+    items: List[ImgItem],
+    top_pad: int = DEFAULT_TOP_PAD,
+    bottom_pad: int = DEFAULT_BOTTOM_PAD,
+    gap: int = DEFAULT_GAP,
+    widths: Optional[Iterable[int]] = None,
+    pad_mode: str = DEFAULT_PAD_MODE,
+) -> List[Dict]:
+    """
+    생성 전에 원본 헤더만으로 정하는 폭별 계획 (UI 안내 / build_outputs 공통)
+    - 반환: 폭 순서대로 {"width", "pads", "heights", "total_height", "long_jpg", "part_ranges"}
+      heights / total_height는 실제 결과 이상인 상한 (_planned_heights)
+    - long_jpg: False면 전체 높이가 JPEG_MAX_DIMENSION을 넘음 → 전체 JPG 대신 분할 JPG
+    - part_ranges: PSD 분할 구간 → 이미지 작업이 끝나기 전에 img_NN.jpg 경로를 정할 수 있음
+    """
+    if pad_mode not in PAD_MODES:
+        raise ValueError(f"알 수 없는 여백 모드: {pad_mode} (가능: {', '.join(PAD_MODES)})")
+    uniq = _unique_items(items)
+    plans = []
+    for width in _normalize_widths(widths):
+        pads = _rendition_pads(width, top_pad, bottom_pad, gap, pad_mode)
+        heights = _planned_heights(uniq, width)
+        total_h = _calc_total_height(heights, *pads)
+        plans.append({
+            "width": width,
+            "pads": pads,
+            "heights": heights,
+            "total_height": total_h,
+            "long_jpg": total_h <= JPEG_MAX_DIMENSION,
+            "part_ranges": _partition_psd_parts(heights, *pads),
+        })
+    return plans
+
+
+def _part_names(base_name: str, pi: int, multi: bool) -> Tuple[str, str]:
+    """파트 번호 → (파트 파일명, images 폴더명) (파트가 1개면 번호 없음)"""
+    part_suffix = f"part{pi}"
+    part_base = f"{base_name}_{part_suffix}" if multi else base_name
+    folder_name = f"images_{part_suffix}" if multi else "images"
+    return part_base, folder_name
+
+
+def _image_entry_names(folder: str, base_name: str, part_ranges: List[Tuple[int, int]]) -> List[str]:
+    """이미지 순서대로 ZIP 안 img_NN.jpg 경로 (파트별 폴더, 파트 안에서 1부터 번호)"""
+    multi = len(part_ranges) > 1
+    names = []
+    for pi, (p0, p1) in enumerate(part_ranges, start=1):
+        _, folder_name = _part_names(base_name, pi, multi)
+        names.extend(f"{folder}{folder_name}/img_{idx:02d}.jpg" for idx in range(1, p1 - p0 + 1))
+    return names
+
+
+def build_outputs(
+    items: List[ImgItem],
+    base_name: str,
+    top_pad: int = DEFAULT_TOP_PAD,
+    bottom_pad: int = DEFAULT_BOTTOM_PAD,
+    gap: int = DEFAULT_GAP,
+    memo: Optional[BuildMemo] = None,
+    on_preview: Optional[Callable[[bytes], None]] = None,
+    stats: Optional[BuildStats] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    with_psd: bool = False,
+    encode_profile: str = DEFAULT_ENCODE_PROFILE,
+    max_jpg_bytes: Optional[int] = None,
+    slice_height: Optional[int] = None,
+    widths: Optional[Iterable[int]] = None,
+    pad_mode: str = DEFAULT_PAD_MODE,
+) -> Tuple[bytes, bytes, Dict]:
+    """
+    - 반환: (jpg_bytes, zip_bytes, meta) / 미리보기 JPG는 meta["preview_jpg"]
+    - with_psd: 파트마다 레이어 PSD({파트명}.psd)를 직접 만들어 ZIP에 포함 (JSX 실행 불필요)
+    - encode_profile: ENCODE_PROFILES 이름 (img_NN.jpg / 전체 JPG 공통)
+    - max_jpg_bytes: 전체 JPG 목표 용량 → 넘으면 quality를 낮춰 맞춤 (meta["jpg_quality"] / meta["target_met"])
+    - slice_height: 오픈마켓용 분할 JPG({파일명}_01.jpg ...) 높이 상한 (None/0이면 분할 안 함)
+    - widths: 생성할 폭 목록 (기본 CANVAS_WIDTH 1개) → 첫 번째 폭이 ZIP 최상위 + 반환 jpg/meta,
+      나머지는 {폭}px/ 폴더에 {파일명}_{폭}px.jpg / images / JSX / PSD (meta["renditions"])
+    - pad_mode: 폭별 여백/간격 "scale"(폭 비율) / "fixed"(그대로)
+    - PSD 분할 / 전체 JPG 생략 여부는 원본 헤더 기준 높이(plan_page)로 먼저 정함
+      → img_NN.jpg는 이미지 작업이 끝나는 즉시 ZIP에 기록
+    - 전체 높이가 JPEG_MAX_DIMENSION을 넘는 폭은 전체 JPG 대신 분할 JPG (slice_height 없으면 LONG_JPG_SPLIT_HEIGHT)
+      → 기본 폭이 그렇다면 반환 jpg_bytes는 b"" (meta["long_jpg"] False)
+    - memo: 직전 결과 재사용용 (None이면 매번 새로 생성)
+    - on_preview: 미리보기가 준비되는 즉시 호출 (고화질 인코딩 완료 전)
+    - stats: 단계별 계측 기록 (BuildStats)
+    - on_progress(완료 이미지 수, 전체 수): 이미지마다 + 긴 JPG/ZIP 마무리 전에 호출
+      (BuildCancelled를 발생시키면 그 자리에서 중단)
+    """
+    memo = memo if memo is not None else BuildMemo(keep_pixels=False)
+    stats = stats or BuildStats()
+    progress = on_progress or (lambda done, total: None)
+    settings = _encode_profile(encode_profile)
+    settings_key = tuple(sorted(settings.items()))
+    widths = _normalize_widths(widths)
+    if pad_mode not in PAD_MODES:
+        raise ValueError(f"알 수 없는 여백 모드: {pad_mode} (가능: {', '.join(PAD_MODES)})")
+    slice_height = slice_height or 0
+    if slice_height and not SLICE_MIN_HEIGHT <= slice_height <= JPEG_MAX_DIMENSION:
+        raise ValueError(f"분할 높이는 {SLICE_MIN_HEIGHT:,}~{JPEG_MAX_DIMENSION:,}px 사이여야 합니다: {slice_height}")
+    # unique by sha1 (중복 방지)
+    uniq = _unique_items(items)
+    seen2 = {it.sha1 for it in uniq}
+
+    # 입력이 직전 생성과 같으면 그대로 반환 / 폭별 레이아웃이 같으면 전체 JPG 재사용
+    sha1s = tuple(it.sha1 for it in uniq)
+    build_key = (
+        base_name, MAX_PER_PSD, PSD_MAX_CANVAS_HEIGHT, with_psd, sha1s, top_pad, bottom_pad, gap,
+        widths, pad_mode, settings_key, max_jpg_bytes or 0, slice_height,
+    )
+    last = memo.last
+    if last and last["build_key"] == build_key and last["zip"] is not None:
+        if on_preview:
+            on_preview(last["meta"]["preview_jpg"])
+        return last["jpg"], last["zip"], last["meta"]
+    last_pages = last["pages"] if last else {}
+
+    # 목록에서 빠진 이미지 / 빠진 폭 / 다른 저장 설정의 메모 정리
+    for key in [k for k in memo.items if k[0] not in seen2 or k[1] not in widths or k[2] != settings_key]:
+        memo.items.pop(key, None)
+
+    n = len(uniq)
+    plans = plan_page(uniq, top_pad, bottom_pad, gap, widths=widths, pad_mode=pad_mode)
+    split_widths = tuple(plan["width"] for plan in plans if not plan["long_jpg"])
+    bundle = BundleWriter()
+    bundle.add_text("README.txt", _build_readme(with_psd, slice_height, widths, split_widths))
+
+    # 폭별 ZIP 위치 (첫 번째 폭은 최상위) / img_NN.jpg 경로는 헤더 기준 PSD 분할로 미리 정함
+    folders = ["" if ri == 0 else f"{w}px/" for ri, w in enumerate(widths)]
+    names = [base_name if ri == 0 else f"{base_name}_{w}px" for ri, w in enumerate(widths)]
+    entry_names = [
+        _image_entry_names(folder, name, plan["part_ranges"]) for folder, name, plan in zip(folders, names, plans)
+    ]
+    arts_by_width: List[List[Tuple[Optional[Image.Image], bytes, int]]] = [[] for _ in widths]
+    arts = _iter_item_artifacts(uniq, memo, widths=widths, stats=stats, settings=settings)
+    try:
+        progress(0, n)
+        for i, per_width in enumerate(arts):
+            for lst, entries, art in zip(arts_by_width, entry_names, per_width):
+                lst.append(art)
+                with stats.stage("zip_write", bytes_in=len(art[1])):
+                    bundle.add_file(entries[i], art[1])
+            progress(i + 1, n)
+    except BaseException:
+        # 중단 시 아직 시작하지 않은 이미지 작업은 취소
+        arts.close()
+        raise
+
+    pages: Dict[Tuple, Tuple] = {}
+    renditions: List[Dict] = []
+    for ri, (plan, width_arts) in enumerate(zip(plans, arts_by_width)):
+        primary = ri == 0
+        width, pads = plan["width"], plan["pads"]
+        page_key = (sha1s, width) + pads + (settings_key, max_jpg_bytes or 0, slice_height)
+        page, rendition = _write_rendition(
+            bundle,
+            folder=folders[ri],
+            base_name=names[ri],
+            width=width,
+            items=uniq,
+            arts=width_arts,
+            pads=pads,
+            part_ranges=plan["part_ranges"],
+            long_jpg=plan["long_jpg"],
+            stats=stats,
+            settings=settings,
+            max_jpg_bytes=max_jpg_bytes,
+            slice_height=slice_height,
+            with_psd=with_psd,
+            reuse=last_pages.get(page_key),
+            on_preview=on_preview if primary else None,
+            on_progress=lambda: progress(n, n),
+        )
+        pages[page_key] = page
+        renditions.append(rendition)
+        if primary:
+            jpg_bytes, preview_bytes = page[0], page[1]
+
+    main = renditions[0]
+    meta = {
+        "base_name": base_name,
+        "count": n,
+        "total_height": main["total_height"],
+        "top": top_pad,
+        "bottom": bottom_pad,
+        "gap": gap,
+        "psd_parts": main["psd_parts"],
+        "psd_part_heights": main["psd_part_heights"],
+        "max_total": MAX_TOTAL_IMAGES,
+        "max_per_psd": MAX_PER_PSD,
+        "max_psd_height": PSD_MAX_CANVAS_HEIGHT,
+        "psd_files": main["psd_files"],
+        "psd_skipped": main["psd_skipped"],
+        "encode_profile": encode_profile,
+        "max_jpg_bytes": max_jpg_bytes or 0,
+        "jpg_quality": main["jpg_quality"],
+        "target_met": main["target_met"],
+        "slice_height": main["slice_height"],
+        "slice_heights": main["slice_heights"],
+        "long_jpg": main["long_jpg"],
+        "widths": list(widths),
+        "pad_mode": pad_mode,
+        "renditions": renditions,
+        "preview_jpg": preview_bytes,
+    }
+
+    with stats.stage("zip_write") as rec:
+        zip_bytes = bundle.getvalue()
+        rec["bytes_out"] = len(zip_bytes)
+    memo.last = {
+        "build_key": build_key,
+        "pages": pages,
+        "jpg": jpg_bytes,
+        "zip": zip_bytes if memo.keep_bundle else None,
+        "meta": meta,
+    }
+    return jpg_bytes, zip_bytes, meta
+
+
+def _page_loader(
+    items: List[ImgItem],
+    arts: List[Tuple[Optional[Image.Image], bytes, int]],
+    width: int,
+    stats: BuildStats,
+) -> Callable[[int], Image.Image]:
+    """
+    i번째 리사이즈 이미지를 필요할 때 가져오는 load(i)
+    - 메모에 이미지가 있으면 그대로, 없으면(keep_pixels=False) 아티팩트 캐시 → 원본 디코딩 순으로 가져옴
+    """
+    cache = _get_artifact_cache()
+
+    def load(i: int) -> Image.Image:
+        im = arts[i][0]
+        return im if im is not None else _resized_for(items[i], width, cache=cache, stats=stats)
+
+    return load
+
+
+def _write_rendition(
+    bundle: "BundleWriter",
+    folder: str,
+    base_name: str,
+    width: int,
+    items: List[ImgItem],
+    arts: List[Tuple[Optional[Image.Image], bytes, int]],
+    pads: Tuple[int, int, int],
+    part_ranges: List[Tuple[int, int]],
+    long_jpg: bool,
+    stats: BuildStats,
+    settings: Dict,
+    max_jpg_bytes: Optional[int],
+    slice_height: int,
+    with_psd: bool,
+    reuse: Optional[Tuple] = None,
+    on_preview: Optional[Callable[[bytes], None]] = None,
+    on_progress: Optional[Callable[[], None]] = None,
+) -> Tuple[Tuple, Dict]:
+    """
+    폭 1개 결과를 ZIP의 folder 아래에 기록 (전체 JPG / 분할 JPG / JSX / PSD, images는 build_outputs가 먼저 기록)
+    - part_ranges / long_jpg: plan_page 결과 (JSX / PSD / 파트 높이는 실제 리사이즈 높이 기준)
+    - long_jpg가 False면 전체 JPG 없이 분할 JPG만 (분할 높이는 slice_height 또는 LONG_JPG_SPLIT_HEIGHT)
+    - reuse: 같은 폭·레이아웃의 직전 (jpg, preview, 인코딩 정보, 분할 JPG) → 전체 JPG 다시 만들지 않음
+    - 긴 JPG/PSD 합성은 리사이즈 이미지를 load(i)로 한 장씩 가져옴 (_page_loader)
+    - 반환: ((jpg, preview, 인코딩 정보, 분할 JPG), 폭별 meta)
+    """
+    top_pad, bottom_pad, gap = pads
+    progress = on_progress or (lambda: None)
+    heights_all = [h for _, _, h in arts]
+    load = _page_loader(items, arts, width, stats)
+    multi = len(part_ranges) > 1
+
+    def part_names(pi: int) -> Tuple[str, str]:
+        return _part_names(base_name, pi, multi)
+
+    # JPG 전체 1장 (+ 분할 JPG) / 전체 높이가 JPEG 한도를 넘으면 분할 JPG만
+    split_height = slice_height or (0 if long_jpg else LONG_JPG_SPLIT_HEIGHT)
+    slice_cuts = _slice_cuts(heights_all, top_pad, bottom_pad, gap, split_height) if split_height else []
+    if reuse:
+        jpg_bytes, preview_bytes, encode_info, slices = reuse
+        if on_preview:
+            on_preview(preview_bytes)
+    else:
+        jpg_bytes, preview_bytes, encode_info, slices = _render_long_page(
+            heights_all,
+            load,
+            top_pad,
+            bottom_pad,
+            gap,
+            on_preview=on_preview,
+            stats=stats,
+            settings=settings,
+            max_bytes=max_jpg_bytes,
+            slice_cuts=slice_cuts,
+            width=width,
+            with_full=long_jpg,
+        )
+    if jpg_bytes:
+        with stats.stage("zip_write", bytes_in=len(jpg_bytes)):
+            bundle.add_file(f"{folder}{base_name}.jpg", jpg_bytes)
+    digits = max(2, len(str(len(slices))))
+    for si, b in enumerate(slices, start=1):
+        with stats.stage("zip_write", bytes_in=len(b)):
+            bundle.add_file(f"{folder}{base_name}_{si:0{digits}d}.jpg", b)
+    progress()
+
+    for pi, (p0, p1) in enumerate(part_ranges, start=1):
+        part_base, folder_name = part_names(pi)
+        part_heights = heights_all[p0:p1]
+        with stats.stage("jsx_build") as rec:
+            jsx_text = _build_jsx(
+                base_name=part_base,
+                canvas_h=_calc_total_height(part_heights, top_pad, bottom_pad, gap),
+                top_pad=top_pad,
+                gap=gap,
+                heights=part_heights,
+                image_files=[f"img_{idx:02d}.jpg" for idx in range(1, p1 - p0 + 1)],
+                images_folder_name=folder_name,
+                canvas_w=width,
+            )
+            rec["bytes_out"] = len(jsx_text)
+        with stats.stage("zip_write", bytes_in=len(jsx_text)):
+            bundle.add_text(f"{folder}{part_base}_psd_build.jsx", jsx_text)
+
+    # 레이어 PSD (선택) - 파트 캔버스 높이가 PSD 한도를 넘으면 해당 파트는 JSX만 제공
+    psd_skipped: List[str] = []
+    if with_psd:
+        for pi, (p0, p1) in enumerate(part_ranges, start=1):
+            part_base, _ = part_names(pi)
+            entry = f"{folder}{part_base}.psd"
+            part_load = (lambda i, p0=p0: load(p0 + i))
+            if not _write_part_psd(bundle, entry, heights_all[p0:p1], part_load, top_pad, bottom_pad, gap, stats, width=width):
+                psd_skipped.append(part_base)
+            progress()
+
+    rendition = {
+        "width": width,
+        "folder": folder,
+        "base_name": base_name,
+        "top": top_pad,
+        "bottom": bottom_pad,
+        "gap": gap,
+        "total_height": _calc_total_height(heights_all, top_pad, bottom_pad, gap),
+        "jpg_bytes": len(jpg_bytes),
+        "jpg_quality": encode_info["jpg_quality"],
+        "target_met": encode_info["target_met"],
+        "long_jpg": long_jpg,
+        "slice_height": split_height,
+        "slice_heights": [b - a for a, b in zip(slice_cuts, slice_cuts[1:])],
+        "psd_parts": len(part_ranges),
+        "psd_part_heights": [_calc_total_height(heights_all[a:b], top_pad, bottom_pad, gap) for a, b in part_ranges],
+        "psd_files": len(part_ranges) - len(psd_skipped) if with_psd else 0,
+        "psd_skipped": psd_skipped,
+    }
+    return (jpg_bytes, preview_bytes, encode_info, slices), rendition
+
+
+def _write_part_psd(
+    bundle: "BundleWriter",
+    entry_name: str,
+    heights: List[int],
+    load: Callable[[int], Image.Image],
+    top_pad: int,
+    bottom_pad: int,
+    gap: int,
+    stats: BuildStats,
+    width: int = CANVAS_WIDTH,
+) -> bool:
+    """
+    PSD 파트 1개를 ZIP 항목으로 바로 기록 (레이어 IMG_1.. 위치는 _build_jsx와 같은 _layout_y_positions)
+    - 캔버스가 PSD 한도를 넘으면 기록하지 않고 False
+    - 레이어 픽셀은 파트 안 이미지만 load(i)로 가져옴 (레이어 수 상한 MAX_PER_PSD)
+    """
+    canvas_h = _calc_total_height(heights, top_pad, bottom_pad, gap)
+    if canvas_h > PSD_MAX_DIMENSION:
+        return False
+    resized = [load(i) for i in range(len(heights))]
+    ys = _layout_y_positions(heights, top_pad, gap)
+    layers = [(f"IMG_{i + 1}", y, im) for i, (y, im) in enumerate(zip(ys, resized))]
+    bands = _iter_page_bands(heights, lambda i: resized[i], top_pad, bottom_pad, gap, width=width)
+    with stats.stage("psd_write", bytes_in=width * canvas_h * 3) as rec:
+        with bundle.open_entry(entry_name) as f:
+            rec["bytes_out"] = write_layered_psd(f, width, canvas_h, layers, bands)
+    return True
+
+
+def _read_source(src: Union[str, Tuple[str, bytes]]) -> Tuple[str, bytes]:
+    if isinstance(src, (tuple, list)):
+        return src[0], src[1]
+    with open(src, "rb") as f:
+        return os.path.basename(src), f.read()
+
+
+def items_from_sources(
+    sources: Iterable[Union[str, Tuple[str, bytes]]],
+    limit: int = MAX_TOTAL_IMAGES,
+) -> Tuple[List[ImgItem], int]:
+    """
+    이미지 소스(파일 경로 또는 (이름, bytes)) → ImgItem 목록
+    - ZIP은 내부 이미지로 펼침 / sha1 중복 제외 / limit 초과분은 건너뜀
+    - 반환: (items, 제한 초과로 건너뛴 개수)
+    """
+    items: List[ImgItem] = []
+    seen = set()
+    skipped = 0
+    for src in sources:
+        name, raw = _read_source(src)
+        if name.lower().endswith(".zip"):
+            report = ZipIngestReport()
+            entries = _iter_zip_images(raw, seen=seen, stop=lambda: len(items) >= limit, report=report)
+        else:
+            report, entries = None, [(name, raw)]
+        for iname, ibytes in entries:
+            if len(items) >= limit:
+                skipped += 1
+                continue
+            it = make_item(iname, ibytes)
+            if it.sha1 in seen:
+                continue
+            items.append(it)
+            seen.add(it.sha1)
+        if report is not None:
+            skipped += report.over_limit
+    return items, skipped
+
+
+def items_from_zip_folder(
+    zip_bytes: bytes,
+    folder: str,
+    limit: int = MAX_TOTAL_IMAGES,
+) -> Tuple[List[ImgItem], int, ZipIngestReport]:
+    """상품별 폴더 ZIP의 폴더 1개 → (items, 제한 초과로 건너뛴 개수, ZIP 검사 결과)"""
+    items: List[ImgItem] = []
+    report = ZipIngestReport()
+    for iname, ibytes in _iter_zip_images(zip_bytes, stop=lambda: len(items) >= limit, report=report, folder=folder):
+        items.append(make_item(iname, ibytes))
+    return items, report.over_limit, report
+
+
+def render_page(
+    sources: Iterable[Union[str, Tuple[str, bytes]]],
+    base_name: str,
+    top_pad: int = DEFAULT_TOP_PAD,
+    bottom_pad: int = DEFAULT_BOTTOM_PAD,
+    gap: int = DEFAULT_GAP,
+    with_psd: bool = False,
+    encode_profile: str = DEFAULT_ENCODE_PROFILE,
+    max_jpg_bytes: Optional[int] = None,
+    slice_height: Optional[int] = None,
+    widths: Optional[Iterable[int]] = None,
+    pad_mode: str = DEFAULT_PAD_MODE,
+) -> Tuple[bytes, bytes, Dict]:
+    """순서대로 나열된 이미지 소스 → (jpg_bytes, zip_bytes, meta)"""
+    items, skipped = items_from_sources(sources)
+    if not items:
+        raise ValueError("이미지가 없습니다.")
+    jpg_bytes, zip_bytes, meta = build_outputs(
+        items,
+        _sanitize_filename(base_name),
+        top_pad,
+        bottom_pad,
+        gap,
+        with_psd=with_psd,
+        encode_profile=encode_profile,
+        max_jpg_bytes=max_jpg_bytes,
+        slice_height=slice_height,
+        widths=widths,
+        pad_mode=pad_mode,
+    )
+    meta["skipped_over_limit"] = skipped
+    return jpg_bytes, zip_bytes, meta
+
+
+# =========================================================
+# GENERATION JOBS
+# =========================================================
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+
+class BuildCancelled(Exception):
+    """생성 작업 취소 (build_outputs의 on_progress에서 발생)"""
+
+
+@dataclass
+class GenerationJob:
+    """
+    백그라운드 생성 작업 1건
+    - owner: 제출한 세션 id (세션당 동시 실행 1개 기준)
+    - 상태/진행률은 작업 스레드가 갱신, UI는 다음 rerun에서 읽기만 함
+    - result: (JPG 핸들, ZIP 핸들, meta) - bytes는 ResultStore에만 있음 (전체 JPG를 생략했으면 JPG 핸들은 None)
+    """
+    owner: str
+    base_name: str
+    items: List[ImgItem]
+    top_pad: int = DEFAULT_TOP_PAD
+    bottom_pad: int = DEFAULT_BOTTOM_PAD
+    gap: int = DEFAULT_GAP
+    memo: Optional[BuildMemo] = None
+    with_psd: bool = False
+    encode_profile: str = DEFAULT_ENCODE_PROFILE
+    max_jpg_bytes: Optional[int] = None
+    slice_height: Optional[int] = None
+    widths: Optional[Tuple[int, ...]] = None
+    pad_mode: str = DEFAULT_PAD_MODE
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    status: str = JOB_QUEUED
+    done: int = 0
+    total: int = 0
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    preview_jpg: Optional[bytes] = None
+    result: Optional[Tuple[Optional[StoredFile], StoredFile, Dict]] = None
+    error: str = ""
+    input_bytes: int = 0
+    stats: BuildStats = field(default_factory=BuildStats, repr=False)
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def __post_init__(self):
+        self.input_bytes = sum(len(it.bytes_data) for it in self.items)
+        self.total = len(self.items)
+
+    @property
+    def active(self) -> bool:
+        return self.status in (JOB_QUEUED, JOB_RUNNING)
+
+    @property
+    def progress(self) -> float:
+        return 0.0 if not self.total else min(1.0, self.done / self.total)
+
+
+class JobQueue:
+    """
+    프로세스 전체가 공유하는 생성 작업 대기열
+    - 동시 실행은 max_running개 (작업 스레드 수 고정)
+    - 같은 세션의 작업은 한 번에 1개만 실행 → 한 사용자가 여러 건을 넣어도 다른 세션이 먼저 차례를 받음
+    - 완료된 작업은 대기열에서 빠짐 (결과는 GenerationJob 객체를 가진 쪽이 보관)
+    """
+
+    def __init__(self, max_running: int):
+        self.max_running = max(1, max_running)
+        self._pending: List[GenerationJob] = []
+        self._running: Dict[str, GenerationJob] = {}
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+
+    def _ensure_workers(self):
+        while len(self._threads) < self.max_running:
+            t = threading.Thread(target=self._worker, name=f"misharp-job-{len(self._threads)}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, job: GenerationJob) -> GenerationJob:
+        with self._cond:
+            self._ensure_workers()
+            self._pending.append(job)
+            self._cond.notify_all()
+        return job
+
+    def cancel(self, job: GenerationJob) -> bool:
+        """대기 중이면 바로 취소, 실행 중이면 다음 이미지 경계에서 중단"""
+        job.cancel_event.set()
+        with self._cond:
+            if job in self._pending:
+                self._pending.remove(job)
+                job.status = JOB_CANCELLED
+                job.finished = time.time()
+                return True
+        return job.status == JOB_RUNNING
+
+    def position(self, job: GenerationJob) -> int:
+        """대기 순번 (1부터, 대기 중이 아니면 0)"""
+        with self._cond:
+            try:
+                return self._pending.index(job) + 1
+            except ValueError:
+                return 0
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "running": len(self._running),
+                "pending": len(self._pending),
+                "max_running": self.max_running,
+            }
+
+    def _next_job(self) -> Optional[GenerationJob]:
+        if len(self._running) >= self.max_running:
+            return None
+        busy = {j.owner for j in self._running.values()}
+        for job in self._pending:
+            if job.owner not in busy:
+                return job
+        return None
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    self._cond.wait()
+                    job = self._next_job()
+                self._pending.remove(job)
+                self._running[job.id] = job
+                job.status = JOB_RUNNING
+                job.started = time.time()
+                job.stats = BuildStats()  # 대기 시간은 제외하고 계측
+            try:
+                self._run(job)
+            finally:
+                with self._cond:
+                    self._running.pop(job.id, None)
+                    self._cond.notify_all()
+
+    @staticmethod
+    def _run(job: GenerationJob):
+        def on_progress(done: int, total: int):
+            job.done, job.total = done, total
+            if job.cancel_event.is_set():
+                raise BuildCancelled(job.id)
+
+        def on_preview(preview: bytes):
+            job.preview_jpg = preview
+
+        memo = job.memo or BuildMemo(keep_pixels=False)
+        try:
+            with memo.lock:
+                jpg_bytes, zip_bytes, meta = build_outputs(
+                    job.items,
+                    job.base_name,
+                    job.top_pad,
+                    job.bottom_pad,
+                    job.gap,
+                    memo=memo,
+                    on_preview=on_preview,
+                    stats=job.stats,
+                    on_progress=on_progress,
+                    with_psd=job.with_psd,
+                    encode_profile=job.encode_profile,
+                    max_jpg_bytes=job.max_jpg_bytes,
+                    slice_height=job.slice_height,
+                    widths=job.widths,
+                    pad_mode=job.pad_mode,
+                )
+            store = get_result_store()
+            # 전체 JPG를 만들지 않은 경우(JPEG 최대 높이 초과)는 ZIP만 보관
+            jpg_file = store.put(jpg_bytes, ".jpg") if jpg_bytes else None
+            job.result = (jpg_file, store.put(zip_bytes, ".zip"), meta)
+            job.status = JOB_DONE
+        except BuildCancelled:
+            job.status = JOB_CANCELLED
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = JOB_FAILED
+        finally:
+            job.finished = time.time()
+            # 결과가 나왔으면 원본 bytes / 진행 중 미리보기는 더 필요 없음 (미리보기는 meta에 있음)
+            job.items = []
+            job.preview_jpg = None
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """프로세스 전체 공유 대기열 (동시 실행 수 MAX_RUNNING_JOBS)"""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(MAX_RUNNING_JOBS)
+        return _job_queue
+
+
+# =========================================================
+# SESSION MEMORY GOVERNOR (PROCESS-WIDE)
+# =========================================================
+def _held_bytes(obj, seen: set) -> int:
+    """bytes / PIL 이미지(픽셀) / 그 묶음(tuple/list/dict)이 차지하는 크기 (같은 객체는 한 번만)"""
+    if obj is None or id(obj) in seen:
+        return 0
+    if isinstance(obj, (bytes, bytearray)):
+        seen.add(id(obj))
+        return len(obj)
+    if isinstance(obj, Image.Image):
+        seen.add(id(obj))
+        return obj.width * obj.height * len(obj.getbands())
+    if isinstance(obj, dict):
+        return sum(_held_bytes(v, seen) for v in list(obj.values()))
+    if isinstance(obj, (list, tuple)):
+        return sum(_held_bytes(v, seen) for v in list(obj))
+    return 0
+
+
+@dataclass(eq=False)
+class SessionFootprint:
+    """
+    세션 1개가 메모리에 들고 있는 것 (세션 상태에 보관, 거버너는 약한 참조만 가짐 → 세션이 끝나면 자동으로 빠짐)
+    - items / jobs: 원본 업로드 bytes (비우지 않음: 사용자 입력)
+    - memo / thumbs: 리사이즈 픽셀 + img_NN.jpg + 직전 결과 + 썸네일 (언제든 다시 만들 수 있음 → 비움 대상)
+    - UI는 rerun마다 현재 객체로 참조를 갱신 (목록 초기화 등으로 객체가 바뀔 수 있음)
+    """
+    sid: str
+    label: str = ""
+    items: List[ImgItem] = field(default_factory=list)
+    jobs: List = field(default_factory=list)
+    memo: Optional[BuildMemo] = None
+    thumbs: Dict = field(default_factory=dict)
+    last_active: float = field(default_factory=time.time)
+    evictions: int = 0
+    evicted_bytes: int = 0
+    rejected_uploads: int = 0
+
+    def usage(self) -> Dict[str, int]:
+        """{"originals", "pixels", "artifacts", "previews", "total"} (bytes, 비움 대상은 pixels + artifacts)"""
+        seen: set = set()
+        originals = _held_bytes([it.bytes_data for it in list(self.items)], seen)
+        for job in list(self.jobs):
+            originals += _held_bytes([it.bytes_data for it in list(job.items)], seen)
+        pixels = artifacts = 0
+        memo = self.memo
+        if memo is not None:
+            for im, jpg, _ in list(memo.items.values()):
+                pixels += _held_bytes(im, seen)
+                artifacts += _held_bytes(jpg, seen)
+            artifacts += _held_bytes(memo.last, seen)
+        artifacts += _held_bytes(self.thumbs, seen)
+        previews = 0
+        for job in list(self.jobs):
+            previews += _held_bytes(job.preview_jpg, seen)
+            if job.result is not None:
+                previews += _held_bytes(job.result[2].get("preview_jpg"), seen)
+        return {
+            "originals": originals,
+            "pixels": pixels,
+            "artifacts": artifacts,
+            "previews": previews,
+            "total": originals + pixels + artifacts + previews,
+        }
+
+    def evict(self) -> int:
+        """다시 만들 수 있는 것만 비움 → 줄어든 바이트 (생성 중인 메모는 건드리지 않음)"""
+        before = self.usage()
+        memo = self.memo
+        if memo is not None and memo.lock.acquire(blocking=False):
+            try:
+                memo.items.clear()
+                memo.last = None
+            finally:
+                memo.lock.release()
+        self.thumbs.clear()
+        freed = before["total"] - self.usage()["total"]
+        if freed > 0:
+            self.evictions += 1
+            self.evicted_bytes += freed
+        return freed
+
+
+class MemoryGovernor:
+    """
+    프로세스 전체 세션 메모리 예산 관리
+    - track(): rerun마다 세션 참조/마지막 활동 시각 갱신 → 예산 초과 시 enforce()
+    - enforce(): 마지막 활동이 오래된 세션부터 비움 대상만 비움 (현재 세션은 가장 나중)
+    - admit(): 새 업로드 전 확인 → 비우고도 예산을 넘으면 거절 사유 반환
+    - report(): 관리자 화면용 세션별 사용량
+    """
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self._sessions: "weakref.WeakValueDictionary[str, SessionFootprint]" = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def _footprints(self) -> List[SessionFootprint]:
+        return [fp for fp in list(self._sessions.values()) if fp is not None]
+
+    def total(self) -> int:
+        return sum(fp.usage()["total"] for fp in self._footprints())
+
+    def track(self, fp: SessionFootprint) -> int:
+        """세션 등록/활동 갱신 → 현재 전체 사용량"""
+        fp.last_active = time.time()
+        with self._lock:
+            self._sessions[fp.sid] = fp
+            return self._enforce_locked(self.budget_bytes)
+
+    def _enforce_locked(self, limit: int) -> int:
+        total = sum(fp.usage()["total"] for fp in self._footprints())
+        for fp in sorted(self._footprints(), key=lambda f: f.last_active):
+            if total <= limit:
+                break
+            total -= fp.evict()
+        return total
+
+    def enforce(self) -> int:
+        with self._lock:
+            return self._enforce_locked(self.budget_bytes)
+
+    def admit(self, fp: SessionFootprint, incoming_bytes: int) -> Optional[str]:
+        """incoming_bytes를 더 올려도 되는지 → 괜찮으면 None, 아니면 거절 사유"""
+        fp.last_active = time.time()
+        with self._lock:
+            self._sessions[fp.sid] = fp
+            usages = [f.usage() for f in self._footprints()]
+            total = sum(u["total"] for u in usages)
+            floor = total - sum(u["pixels"] + u["artifacts"] for u in usages)
+            # 전부 비워도 모자라면 비우지 않고 거절 (다른 세션 메모를 괜히 잃지 않도록)
+            if floor + incoming_bytes <= self.budget_bytes:
+                self._enforce_locked(self.budget_bytes - incoming_bytes)
+                return None
+        fp.rejected_uploads += 1
+        mine = fp.usage()["originals"]
+        return (
+            f"서버 메모리 한도({self.budget_bytes / 1024 / 1024:,.0f}MB)를 넘어 업로드할 수 없습니다 "
+            f"(현재 전체 {total / 1024 / 1024:,.0f}MB · 이 세션 원본 {mine / 1024 / 1024:,.0f}MB · "
+            f"추가 {incoming_bytes / 1024 / 1024:,.0f}MB). "
+            "목록에서 사용하지 않는 이미지를 삭제하거나 잠시 후 다시 시도해 주세요."
+        )
+
+    def report(self) -> List[Dict]:
+        """세션별 사용량 (사용량 큰 순)"""
+        rows = []
+        for fp in self._footprints():
+            rows.append(dict(
+                fp.usage(),
+                sid=fp.sid,
+                label=fp.label,
+                last_active=fp.last_active,
+                evictions=fp.evictions,
+                evicted_bytes=fp.evicted_bytes,
+                rejected_uploads=fp.rejected_uploads,
+            ))
+        rows.sort(key=lambda r: r["total"], reverse=True)
+        return rows
+
+
+_memory_governor: Optional[MemoryGovernor] = None
+_memory_governor_lock = threading.Lock()
+
+
+def get_memory_governor() -> MemoryGovernor:
+    """프로세스 전체 공유 메모리 거버너 (예산 SESSION_MEMORY_BUDGET_BYTES)"""
+    global _memory_governor
+    with _memory_governor_lock:
+        if _memory_governor is None:
+            _memory_governor = MemoryGovernor(SESSION_MEMORY_BUDGET_BYTES)
+        return _memory_governor
@@ -0,0 +1,231 @@
+"""
+MISHARP 레이어 PSD 작성기 (Photoshop 없이 .psd 직접 생성)
+
+- 8bit RGB / 흰색 배경 레이어 + 이미지마다 픽셀 레이어 1개 (IMG_1, IMG_2, ...)
+- 레이어/합성 이미지 모두 채널별 RLE(PackBits) 압축
+- 압축 결과는 임시파일(SpooledTemporaryFile)에 모았다가 순서대로 기록
+  → 출력은 앞으로만 씀 (seek 불필요, ZIP 항목에 바로 스트리밍 가능)
+- 합성 이미지는 가로 띠(band) 단위로 받아 압축 → 캔버스 전체를 메모리에 만들지 않음
+
+사용 예:
+    with open("page.psd", "wb") as f:
+        write_layered_psd(f, 900, 4000, [("IMG_1", 180, im1), ("IMG_2", 1680, im2)], bands)
+"""
+import re
+import shutil
+import struct
+import tempfile
+from array import array
+from typing import BinaryIO, Iterable, List, Optional, Tuple
+
+from PIL import Image
+
+
+PSD_MAX_DIMENSION = 30000  # PSD(버전 1) 가로/세로 최대 (그 이상은 PSB 필요)
+PSD_SPOOL_MAX_BYTES = 64 * 1024 * 1024  # 압축 데이터 임시 보관: 넘으면 디스크로
+
+_RLE = 1
+_RUN_RE = re.compile(rb"(.)\1{2,}", re.DOTALL)
+
+
+def _packbits(row: bytes) -> bytes:
+    """한 줄 PackBits 압축 (3바이트 이상 반복은 run, 나머지는 literal / 최대 128바이트씩)"""
+    out = bytearray()
+
+    def literal(a: int, b: int):
+        while a < b:
+            n = min(128, b - a)
+            out.append(n - 1)
+            out.extend(row[a:a + n])
+            a += n
+
+    pos = 0
+    for m in _RUN_RE.finditer(row):
+        start, end = m.span()
+        literal(pos, start)
+        value = row[start]
+        n = end - start
+        while n > 0:
+            k = min(128, n)
+            out.append(257 - k if k > 1 else 0)
+            out.append(value)
+            n -= k
+        pos = end
+    literal(pos, len(row))
+    return bytes(out)
+
+
+class _ChannelSink:
+    """채널 1개의 줄별 압축 길이 + 압축 데이터(임시파일)"""
+
+    def __init__(self, spool_max_bytes: int):
+        self.counts = array("H")
+        self.data = tempfile.SpooledTemporaryFile(max_size=spool_max_bytes)
+        self.size = 0
+        self._uniform: dict = {}
+
+    def add_rows(self, plane: bytes, width: int):
+        for r in range(0, len(plane), width):
+            row = plane[r:r + width]
+            # 흰 여백처럼 한 가지 값으로 채워진 줄은 압축 결과 재사용
+            first = row[:1]
+            if row.count(first) == width:
+                packed = self._uniform.get(first)
+                if packed is None:
+                    packed = self._uniform[first] = _packbits(row)
+            else:
+                packed = _packbits(row)
+            self.counts.append(len(packed))
+            self.data.write(packed)
+            self.size += len(packed)
+
+    def add_uniform_rows(self, value: int, width: int, rows: int):
+        """한 가지 값으로 채운 rows줄 (배경 / 불투명 알파 채널)"""
+        packed = _packbits(bytes([value]) * width)
+        self.counts.extend([len(packed)] * rows)
+        for _ in range(rows):
+            self.data.write(packed)
+        self.size += len(packed) * rows
+
+    def counts_bytes(self) -> bytes:
+        counts = array("H", self.counts)
+        if struct.pack("=H", 1) != struct.pack(">H", 1):
+            counts.byteswap()
+        return counts.tobytes()
+
+    def copy_to(self, out: BinaryIO):
+        self.data.seek(0)
+        shutil.copyfileobj(self.data, out, 1024 * 1024)
+
+    def close(self):
+        self.data.close()
+
+
+def _planes(im: Image.Image) -> List[bytes]:
+    """RGB 이미지 → [R, G, B] 채널 bytes"""
+    if im.mode != "RGB":
+        im = im.convert("RGB")
+    return [band.tobytes() for band in im.split()]
+
+
+def _pascal_name(name: str) -> bytes:
+    """레이어 이름 (Pascal 문자열, 길이 바이트 포함 4의 배수로 채움)"""
+    raw = name.encode("latin-1", "replace")[:255]
+    data = bytes([len(raw)]) + raw
+    return data + b"\0" * (-len(data) % 4)
+
+
+def _unicode_name(name: str) -> bytes:
+    """추가 정보 'luni' (유니코드 레이어 이름)"""
+    utf16 = name.encode("utf-16-be")
+    body = struct.pack(">I", len(utf16) // 2) + utf16
+    body += b"\0" * (-len(body) % 4)
+    return b"8BIMluni" + struct.pack(">I", len(body)) + body
+
+
+def _layer_record(name: str, bounds: Tuple[int, int, int, int], channel_lengths: List[Tuple[int, int]]) -> bytes:
+    top, left, bottom, right = bounds
+    rec = struct.pack(">iiiiH", top, left, bottom, right, len(channel_lengths))
+    for cid, length in channel_lengths:
+        rec += struct.pack(">hI", cid, length)
+    # blend mode / 불투명도 255 / clipping 0 / flags 0(표시) / filler
+    rec += b"8BIMnorm" + struct.pack(">BBBB", 255, 0, 0, 0)
+    extra = struct.pack(">II", 0, 0) + _pascal_name(name) + _unicode_name(name)
+    return rec + struct.pack(">I", len(extra)) + extra
+
+
+def write_layered_psd(
+    out: BinaryIO,
+    width: int,
+    height: int,
+    layers: List[Tuple[str, int, Image.Image]],
+    bands: Iterable[Tuple[int, Image.Image]],
+    background: Tuple[int, int, int] = (255, 255, 255),
+    spool_max_bytes: int = PSD_SPOOL_MAX_BYTES,
+) -> int:
+    """
+    레이어 PSD 기록 → 기록한 바이트 수
+    - layers: [(레이어 이름, y 위치, RGB 이미지)] 아래 → 위 순서 (x는 항상 0)
+    - bands: 합성 이미지 가로 띠 [(y0, RGB 띠 이미지)] 위 → 아래 순서 (Photoshop 이외 프로그램용 미리보기)
+    - 맨 아래에 캔버스 전체 크기의 흰색 Background 레이어 추가
+    """
+    if not (0 < width <= PSD_MAX_DIMENSION and 0 < height <= PSD_MAX_DIMENSION):
+        raise ValueError(f"PSD 최대 크기({PSD_MAX_DIMENSION}px)를 벗어났습니다: {width}x{height}")
+
+    written = 0
+
+    def emit(data: bytes):
+        nonlocal written
+        out.write(data)
+        written += len(data)
+
+    # 1) 레이어 채널 압축 → 임시파일 (레코드에 채널별 길이가 먼저 나와야 함)
+    pixel_data = tempfile.SpooledTemporaryFile(max_size=spool_max_bytes)
+    records: List[bytes] = []
+    layer_specs = [("Background", 0, None, width, height)] + [
+        (n, y, im, im.size[0], im.size[1]) for n, y, im in layers
+    ]
+    try:
+        for name, top, im, w, rows in layer_specs:
+            # 채널 순서: 알파(-1, 전부 불투명) → R → G → B
+            planes: List[Optional[bytes]] = [None] + (_planes(im) if im is not None else [None, None, None])
+            fills = [255] + list(background)
+            channel_lengths = []
+            for cid, plane, fill in zip((-1, 0, 1, 2), planes, fills):
+                sink = _ChannelSink(spool_max_bytes)
+                try:
+                    if plane is None:
+                        sink.add_uniform_rows(fill, w, rows)
+                    else:
+                        sink.add_rows(plane, w)
+                    pixel_data.write(struct.pack(">H", _RLE))
+                    pixel_data.write(sink.counts_bytes())
+                    sink.copy_to(pixel_data)
+                    channel_lengths.append((cid, 2 + 2 * rows + sink.size))
+                finally:
+                    sink.close()
+            records.append(_layer_record(name, (top, 0, top + rows, w), channel_lengths))
+        pixel_size = pixel_data.tell()
+
+        # 2) 헤더 / 색상 모드 / 이미지 리소스 (비움)
+        emit(b"8BPS" + struct.pack(">H6xHIIHH", 1, 3, height, width, 8, 3))
+        emit(struct.pack(">I", 0))
+        emit(struct.pack(">I", 0))
+
+        # 3) 레이어 정보 (길이는 2의 배수로 맞춤)
+        layer_info_len = 2 + sum(len(r) for r in records) + pixel_size
+        pad = layer_info_len % 2
+        emit(struct.pack(">I", 4 + layer_info_len + pad + 4))
+        emit(struct.pack(">I", layer_info_len + pad))
+        emit(struct.pack(">h", len(records)))
+        for r in records:
+            emit(r)
+        pixel_data.seek(0)
+        shutil.copyfileobj(pixel_data, out, 1024 * 1024)
+        written += pixel_size
+        emit(b"\0" * pad)
+        emit(struct.pack(">I", 0))  # 전역 레이어 마스크 없음
+    finally:
+        pixel_data.close()
+
+    # 4) 합성 이미지 (채널별로 모든 줄 길이 → 채널별 데이터 순서)
+    sinks = [_ChannelSink(spool_max_bytes) for _ in range(3)]
+    try:
+        rows_done = 0
+        for _, band in bands:
+            for sink, plane in zip(sinks, _planes(band)):
+                sink.add_rows(plane, width)
+            rows_done += band.size[1]
+        if rows_done != height:
+            raise ValueError(f"합성 이미지 높이 불일치: {rows_done} != {height}")
+        emit(struct.pack(">H", _RLE))
+        for sink in sinks:
+            emit(sink.counts_bytes())
+        for sink in sinks:
+            sink.copy_to(out)
+            written += sink.size
+    finally:
+        for sink in sinks:
+            sink.close()
+    return written
+
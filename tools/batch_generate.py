@@ -0,0 +1,181 @@
+"""
+MISHARP 상세페이지 일괄 생성 도구 (Streamlit 없이 실행)
+
+- 입력 폴더 아래 하위 폴더 1개 = 상품 1개
+- 하위 폴더 안의 이미지(JPG/PNG/GIF/WEBP) 및 ZIP을 파일명 순서대로 사용
+- 상품별로 {상품명}.jpg / {상품명}_bundle.zip 생성
+  (전체 높이가 JPEG 최대 높이를 넘는 상품은 {상품명}.jpg 없이 ZIP 안의 분할 JPG로 제공)
+- 여러 상품을 프로세스 풀에서 동시에 처리, 한 상품이 실패해도 나머지는 계속 진행
+- 상품별 소요 시간/결과를 batch_report.csv로 저장
+
+사용법 (저장소 루트에서):
+    python tools/batch_generate.py ./season_2026ss ./out --processes 4
+"""
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import engine  # noqa: E402
+
+
+def _natural_key(fn: str):
+    return [int(t) if t.isdigit() else t.lower() for t in re.split(r"(\d+)", fn)]
+
+
+def _product_sources(folder: str) -> List[str]:
+    files = []
+    for fn in sorted(os.listdir(folder), key=_natural_key):
+        p = os.path.join(folder, fn)
+        if fn.startswith(".") or not os.path.isfile(p):
+            continue
+        if engine._is_image_filename(fn) or fn.lower().endswith(".zip"):
+            files.append(p)
+    return files
+
+
+def _init_worker(build_workers: int):
+    # 프로세스마다 스레드 풀을 크게 잡으면 코어 수를 초과하므로 제한
+    engine.BUILD_WORKERS = build_workers
+
+
+def _run_product(
+    folder: str,
+    out_dir: str,
+    top_pad: int,
+    bottom_pad: int,
+    gap: int,
+    with_psd: bool = False,
+    encode_profile: str = engine.DEFAULT_ENCODE_PROFILE,
+    max_jpg_bytes: int = 0,
+    slice_height: int = 0,
+    widths: Tuple[int, ...] = (engine.CANVAS_WIDTH,),
+    pad_mode: str = engine.DEFAULT_PAD_MODE,
+) -> Dict:
+    name = os.path.basename(os.path.normpath(folder))
+    base_name = engine._sanitize_filename(name)
+    row = {"product": name, "base_name": base_name, "status": "ok", "images": 0, "skipped": 0,
+           "total_height": 0, "jpg_bytes": 0, "jpg_quality": 0, "slices": 0, "zip_bytes": 0, "seconds": 0.0,
+           "error": ""}
+    t0 = time.perf_counter()
+    try:
+        sources = _product_sources(folder)
+        jpg_bytes, zip_bytes, meta = engine.render_page(
+            sources,
+            base_name,
+            top_pad,
+            bottom_pad,
+            gap,
+            with_psd=with_psd,
+            encode_profile=encode_profile,
+            max_jpg_bytes=max_jpg_bytes or None,
+            slice_height=slice_height or None,
+            widths=widths,
+            pad_mode=pad_mode,
+        )
+        # 전체 높이가 JPEG 최대 높이를 넘으면 전체 JPG 없이 분할 JPG만 ZIP에 들어 있음
+        if jpg_bytes:
+            with open(os.path.join(out_dir, f"{base_name}.jpg"), "wb") as f:
+                f.write(jpg_bytes)
+        with open(os.path.join(out_dir, f"{base_name}_bundle.zip"), "wb") as f:
+            f.write(zip_bytes)
+        row.update(
+            images=meta["count"],
+            skipped=meta.get("skipped_over_limit", 0),
+            total_height=meta["total_height"],
+            jpg_bytes=len(jpg_bytes),
+            jpg_quality=meta["jpg_quality"],
+            slices=len(meta["slice_heights"]),
+            zip_bytes=len(zip_bytes),
+        )
+    except Exception as e:
+        row["status"] = "failed"
+        row["error"] = f"{type(e).__name__}: {e}"
+        traceback.print_exc()
+    row["seconds"] = round(time.perf_counter() - t0, 3)
+    return row
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="MISHARP 상세페이지 일괄 생성")
+    ap.add_argument("input_dir", help="상품별 하위 폴더가 들어 있는 폴더")
+    ap.add_argument("output_dir", help="결과 저장 폴더")
+    ap.add_argument("--processes", type=int, default=max(1, (os.cpu_count() or 1) // 2))
+    ap.add_argument("--build-workers", type=int, default=2, help="상품 1개 안에서 쓰는 스레드 수")
+    ap.add_argument("--top", type=int, default=engine.DEFAULT_TOP_PAD)
+    ap.add_argument("--bottom", type=int, default=engine.DEFAULT_BOTTOM_PAD)
+    ap.add_argument("--gap", type=int, default=engine.DEFAULT_GAP)
+    ap.add_argument("--psd", action="store_true", help="ZIP에 레이어 PSD도 함께 생성")
+    ap.add_argument("--profile", default=engine.DEFAULT_ENCODE_PROFILE, choices=sorted(engine.ENCODE_PROFILES),
+                    help="JPG 저장 설정")
+    ap.add_argument("--max-jpg-mb", type=float, default=0, help="전체 JPG 최대 용량(MB, 0=제한 없음)")
+    ap.add_argument("--widths", default=str(engine.CANVAS_WIDTH),
+                    help="생성할 폭(px), 쉼표로 구분 (예: 900,860,640 / 첫 번째가 기본 결과)")
+    ap.add_argument("--pad-mode", default=engine.DEFAULT_PAD_MODE, choices=engine.PAD_MODES,
+                    help="폭별 여백/간격: scale(폭 비율) / fixed(그대로)")
+    ap.add_argument("--slice-height", type=int, default=0, help="오픈마켓용 분할 JPG 높이 상한(px, 0=분할 안 함)")
+    args = ap.parse_args(argv)
+    widths = tuple(int(w) for w in args.widths.split(",") if w.strip())
+
+    folders = [
+        os.path.join(args.input_dir, d)
+        for d in sorted(os.listdir(args.input_dir), key=_natural_key)
+        if not d.startswith(".") and os.path.isdir(os.path.join(args.input_dir, d))
+    ]
+    if not folders:
+        print("처리할 상품 폴더가 없습니다.")
+        return 1
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    print(f"=== MISHARP 일괄 생성: 상품 {len(folders)}개 · 프로세스 {args.processes}개 ===")
+    t0 = time.perf_counter()
+    rows: List[Dict] = []
+    with ProcessPoolExecutor(
+        max_workers=max(1, args.processes),
+        initializer=_init_worker,
+        initargs=(args.build_workers,),
+    ) as pool:
+        futures = {
+            pool.submit(
+                _run_product, d, args.output_dir, args.top, args.bottom, args.gap, args.psd,
+                args.profile, int(args.max_jpg_mb * 1024 * 1024), args.slice_height,
+                widths, args.pad_mode,
+            ): d
+            for d in folders
+        }
+        for fut in as_completed(futures):
+            try:
+                row = fut.result()
+            except Exception as e:
+                # 작업 프로세스 자체가 죽은 경우 (메모리 부족 등)
+                name = os.path.basename(futures[fut])
+                row = {"product": name, "base_name": name, "status": "failed", "error": f"{type(e).__name__}: {e}"}
+            rows.append(row)
+            mark = "✅" if row["status"] == "ok" else "❌"
+            print(f"{mark} {row['product']}: {row.get('seconds', '-')}s {row.get('error', '')}".rstrip())
+
+    rows.sort(key=lambda r: _natural_key(r["product"]))
+    report = os.path.join(args.output_dir, "batch_report.csv")
+    fields = ["product", "base_name", "status", "images", "skipped", "total_height",
+              "jpg_bytes", "jpg_quality", "slices", "zip_bytes", "seconds", "error"]
+    with open(report, "w", newline="", encoding="utf-8-sig") as f:
+        w = csv.DictWriter(f, fieldnames=fields)
+        w.writeheader()
+        for r in rows:
+            w.writerow({k: r.get(k, "") for k in fields})
+
+    failed = [r for r in rows if r["status"] != "ok"]
+    print(f"\n완료: 성공 {len(rows) - len(failed)} / 실패 {len(failed)} · 총 {time.perf_counter() - t0:.1f}s")
+    print("리포트:", report)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
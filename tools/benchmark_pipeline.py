@@ -0,0 +1,310 @@
+"""
+MISHARP 상세페이지 생성기 - 단계별 벤치마크
+
+- 합성 이미지 세트 생성: 장수(1~20장은 이전 결과와 비교 가능하도록 고정, 최대 등록 60장 추가) × 원본 해상도 × 입력 형식
+  (장수 × 원본 픽셀이 FULL_MAX_CASE_PIXELS를 넘는 조합은 건너뜀: 입력 bytes만으로도 수 GB)
+  (PNG / JPEG / WebP / 움직이는 GIF / ZIP 업로드)
+- 단계별 시간 + 메모리 측정:
+  _open_image_any → _fit_to_width_900 → _make_thumb → _compose_long_jpg → _save_jpg_bytes → _zip_bundle
+  (전체 높이가 JPEG 최대 높이를 넘으면 생성과 같이 _render_long_page로 분할 JPG만: "_render_long_page(split)")
+- 디코딩/리사이즈/썸네일 단계는 1장씩 디코딩 → 측정 → 해제 (디코딩 원본을 장수만큼 동시에 들고 있지 않음)
+- 결과는 JSON Lines로 저장 → 버전 간 비교 가능 (--compare 로 이전 결과와 비교)
+
+메모리:
+- peak_rss_mb: 단계 실행 중 프로세스 RSS 최고치(샘플링)
+- py_peak_mb: tracemalloc 기준 Python 할당 최고치 (Pillow 픽셀 버퍼는 포함되지 않음)
+
+사용법 (저장소 루트에서):
+    python tools/benchmark_pipeline.py --quick
+    python tools/benchmark_pipeline.py --out bench_v3.jsonl
+    python tools/benchmark_pipeline.py --out bench_new.jsonl --compare bench_v3.jsonl
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+import zipfile
+from typing import Callable, Dict, List, Tuple
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import engine  # noqa: E402
+
+
+FORMATS = ["jpeg", "png", "webp", "gif", "zip"]
+FULL_COUNTS = [1, 5, 10, 20, engine.MAX_TOTAL_IMAGES]
+FULL_SIZES = [(1200, 1600), (3000, 4000), (6000, 9000)]
+FULL_MAX_CASE_PIXELS = 20 * 6000 * 9000  # 기존 최대 조합(20장 × 6000x9000)까지만
+QUICK_COUNTS = [1, 5]
+QUICK_SIZES = [(1200, 1600), (3000, 4000)]
+
+
+# =========================================================
+# SYNTHETIC INPUTS
+# =========================================================
+def _synthetic(w: int, h: int, seed: int) -> Image.Image:
+    base = Image.linear_gradient("L").resize((w, h))
+    im = Image.merge("RGB", (base, base.rotate(90 + seed * 7).resize((w, h)), base.transpose(Image.Transpose.FLIP_TOP_BOTTOM)))
+    d = ImageDraw.Draw(im)
+    step = max(8, w // 50)
+    for x in range(-h, w, step):
+        d.line([(x + seed, 0), (x + seed + h // 2, h)], fill=((seed * 37) % 255, 40, 90), width=max(1, step // 5))
+    return im
+
+
+def _encode_source(im: Image.Image, fmt: str) -> bytes:
+    out = io.BytesIO()
+    if fmt == "jpeg":
+        im.save(out, format="JPEG", quality=92)
+    elif fmt == "png":
+        im.save(out, format="PNG", compress_level=6)
+    elif fmt == "webp":
+        im.save(out, format="WEBP", quality=90)
+    elif fmt == "gif":
+        frames = [im.convert("P", palette=Image.Palette.ADAPTIVE), im.rotate(180).convert("P", palette=Image.Palette.ADAPTIVE)]
+        frames[0].save(out, format="GIF", save_all=True, append_images=frames[1:], duration=200, loop=0)
+    else:
+        raise ValueError(fmt)
+    return out.getvalue()
+
+
+def make_input_set(count: int, size: Tuple[int, int], fmt: str) -> List[Tuple[str, bytes]]:
+    """업로드와 같은 형태의 (파일명, bytes) 목록 (zip은 JPEG 묶음 1개)"""
+    w, h = size
+    inner = "jpeg" if fmt == "zip" else fmt
+    ext = {"jpeg": "jpg", "png": "png", "webp": "webp", "gif": "gif"}[inner]
+    files = [(f"img_{i + 1:02d}.{ext}", _encode_source(_synthetic(w, h, i), inner)) for i in range(count)]
+    if fmt != "zip":
+        return files
+    zb = io.BytesIO()
+    with zipfile.ZipFile(zb, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for fn, b in files:
+            zf.writestr(f"product/{fn}", b)
+    return [("upload.zip", zb.getvalue())]
+
+
+# =========================================================
+# MEASUREMENT
+# =========================================================
+def _rss_mb() -> float:
+    return engine._rss_bytes() / 1e6
+
+
+class _RssSampler:
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+        self._t = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _rss_mb())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self.peak = _rss_mb()
+        self._t.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._t.join()
+        self.peak = max(self.peak, _rss_mb())
+
+
+def measure(fn: Callable, repeat: int):
+    """fn()을 repeat회 실행 → (마지막 결과, 측정값 dict)"""
+    times = []
+    result = None
+    rss_before = _rss_mb()
+    tracemalloc.start()
+    with _RssSampler() as sampler:
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            result = fn()
+            times.append(time.perf_counter() - t0)
+    _, py_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {
+        "seconds_median": round(statistics.median(times), 5),
+        "seconds_min": round(min(times), 5),
+        "repeat": repeat,
+        "peak_rss_mb": round(sampler.peak, 1),
+        "rss_delta_mb": round(sampler.peak - rss_before, 1),
+        "py_peak_mb": round(py_peak / 1e6, 2),
+    }
+
+
+def measure_per_image(sources: List[Tuple[str, bytes]], prepare: Callable, fn: Callable, repeat: int):
+    """이미지 1장씩 prepare(bytes) → fn(결과)만 시간 측정 → (마지막 결과 목록, 측정값 dict)
+
+    - 디코딩된 원본을 장수만큼 리스트로 들고 있지 않음 (6000x9000 20장이면 ~3.2GB)
+    - prepare(디코딩) 시간은 제외, 메모리는 1장분만 포함
+    """
+    times = []
+    results: List = []
+    rss_before = _rss_mb()
+    tracemalloc.start()
+    with _RssSampler() as sampler:
+        for _ in range(repeat):
+            results = []
+            total = 0.0
+            for _, b in sources:
+                src = prepare(b)
+                t0 = time.perf_counter()
+                results.append(fn(src))
+                total += time.perf_counter() - t0
+                src = None
+            times.append(total)
+    _, py_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return results, {
+        "seconds_median": round(statistics.median(times), 5),
+        "seconds_min": round(min(times), 5),
+        "repeat": repeat,
+        "peak_rss_mb": round(sampler.peak, 1),
+        "rss_delta_mb": round(sampler.peak - rss_before, 1),
+        "py_peak_mb": round(py_peak / 1e6, 2),
+    }
+
+
+def _decode(data: bytes, min_width=None) -> Image.Image:
+    # Image.open은 지연 디코딩 → load()까지 포함해야 실제 디코딩 시간
+    im = engine._open_image_any(data, min_width=min_width)
+    im.load()
+    return im
+
+
+def run_case(count: int, size: Tuple[int, int], fmt: str, repeat: int) -> List[Dict]:
+    files = make_input_set(count, size, fmt)
+    case = {"count": count, "src_w": size[0], "src_h": size[1], "format": fmt,
+            "input_bytes": sum(len(b) for _, b in files)}
+    rows = []
+
+    def emit(stage: str, stats: Dict, bytes_out: int = 0):
+        rows.append(dict(case, stage=stage, bytes_out=bytes_out, **stats))
+
+    if fmt == "zip":
+        sources, stats = measure(lambda: engine._extract_zip_images(files[0][1]), repeat)
+        emit("_extract_zip_images", stats, sum(len(b) for _, b in sources))
+    else:
+        sources = files
+
+    # 디코딩 단계는 1장씩 디코딩 후 바로 해제 (디코딩 결과를 목록으로 쌓지 않음)
+    _, stats = measure_per_image(sources, lambda b: b, lambda b: _decode(b).size, repeat)
+    emit("_open_image_any", stats)
+
+    _, stats = measure_per_image(sources, lambda b: b, lambda b: _decode(b, min_width=engine.CANVAS_WIDTH).size, repeat)
+    emit("_open_image_any(min_width)", stats)
+
+    # 리사이즈/썸네일: 디코딩은 측정 밖(prepare)에서 1장씩, 결과(900px/썸네일)만 보관
+    resized, stats = measure_per_image(sources, _decode, engine._fit_to_width_900, repeat)
+    emit("_fit_to_width_900", stats)
+
+    thumbs, stats = measure_per_image(sources, _decode, engine._make_thumb, repeat)
+    emit("_make_thumb", stats, sum(len(t) for t in thumbs))
+
+    pads = (engine.DEFAULT_TOP_PAD, engine.DEFAULT_BOTTOM_PAD, engine.DEFAULT_GAP)
+    heights = [im.size[1] for im in resized]
+    if engine._calc_total_height(heights, *pads) <= engine.JPEG_MAX_DIMENSION:
+        canvas, stats = measure(lambda: engine._compose_long_jpg(resized, *pads), repeat)
+        emit("_compose_long_jpg", stats)
+
+        jpg_bytes, stats = measure(lambda: engine._save_jpg_bytes(canvas), repeat)
+        emit("_save_jpg_bytes(long)", stats, len(jpg_bytes))
+        canvas = None
+    else:
+        # 전체 JPG를 만들 수 없는 높이 → 생성과 같이 띠 합성 + 분할 JPG
+        cuts = engine._slice_cuts(heights, *pads, engine.LONG_JPG_SPLIT_HEIGHT)
+        page, stats = measure(
+            lambda: engine._render_long_page(heights, resized.__getitem__, *pads, slice_cuts=cuts, with_full=False),
+            repeat,
+        )
+        emit("_render_long_page(split)", stats, sum(len(b) for b in page[3]))
+        jpg_bytes = b""
+
+    per_image, stats = measure(lambda: [engine._save_jpg_bytes(im) for im in resized], repeat)
+    emit("_save_jpg_bytes(per_image)", stats, sum(len(b) for b in per_image))
+
+    groups = [("images", [(f"img_{i + 1:02d}.jpg", b) for i, b in enumerate(per_image)])]
+    jsx = [("bench_psd_build.jsx", "// jsx")]
+    zip_bytes, stats = measure(lambda: engine._zip_bundle("bench", jpg_bytes, jsx, groups), repeat)
+    emit("_zip_bundle", stats, len(zip_bytes))
+    return rows
+
+
+# =========================================================
+# MAIN
+# =========================================================
+def _compare(rows: List[Dict], baseline_path: str):
+    def key(r):
+        return (r["count"], r["src_w"], r["src_h"], r["format"], r["stage"])
+
+    with open(baseline_path, encoding="utf-8") as f:
+        base = {key(r): r for r in (json.loads(line) for line in f) if "stage" in r}
+    print(f"\n=== 비교: {baseline_path} ===")
+    for r in rows:
+        b = base.get(key(r))
+        if not b or not b["seconds_median"]:
+            continue
+        ratio = r["seconds_median"] / b["seconds_median"]
+        flag = "  ⚠ 느려짐" if ratio > 1.2 else ""
+        print(f"{r['format']:>5} {r['count']:>2}장 {r['src_w']}x{r['src_h']} {r['stage']:<28} ×{ratio:.2f}{flag}")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="MISHARP 생성 파이프라인 벤치마크")
+    ap.add_argument("--out", default="bench_output.jsonl", help="결과 JSON Lines 파일")
+    ap.add_argument("--quick", action="store_true", help="작은 조합만 실행")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--formats", default=",".join(FORMATS))
+    ap.add_argument("--compare", help="비교할 이전 결과 파일")
+    args = ap.parse_args(argv)
+
+    counts = QUICK_COUNTS if args.quick else FULL_COUNTS
+    sizes = QUICK_SIZES if args.quick else FULL_SIZES
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+
+    env = {
+        "kind": "env",
+        "python": platform.python_version(),
+        "pillow": Image.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "jpeg_settings": engine.JPEG_SETTINGS,
+        "canvas_width": engine.CANVAS_WIDTH,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    all_rows: List[Dict] = []
+    with open(args.out, "w", encoding="utf-8") as f:
+        f.write(json.dumps(env, ensure_ascii=False) + "\n")
+        for fmt in formats:
+            for size in sizes:
+                for count in counts:
+                    if not args.quick and count * size[0] * size[1] > FULL_MAX_CASE_PIXELS:
+                        continue
+                    rows = run_case(count, size, fmt, args.repeat)
+                    for r in rows:
+                        f.write(json.dumps(r, ensure_ascii=False) + "\n")
+                        print(
+                            f"{fmt:>5} {count:>2}장 {size[0]}x{size[1]} {r['stage']:<28} "
+                            f"{r['seconds_median'] * 1000:9.1f}ms  rss {r['peak_rss_mb']:7.1f}MB"
+                        )
+                    all_rows.extend(rows)
+    print("\n결과 저장:", args.out)
+    if args.compare:
+        _compare(all_rows, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+"""
+MISHARP 상세페이지 생성기 - 화질 동일성(parity) 점검 도구
+
+- 합성 이미지로 "기존 경로"와 "빠른 경로" 결과를 비교
+- 평균 절대 오차(MAE) / 최대 오차 / PSNR 출력
+- 기준치 초과 시 종료코드 1
+- 여러 폭: 축소 피라미드 결과 vs 원본에서 바로 LANCZOS 리사이즈한 결과
+- 큰 PNG/WebP/GIF: reduce → LANCZOS 2단계 축소(900px / 썸네일) vs 원본에서 바로 LANCZOS (소요 시간도 출력)
+- 픽셀 예산: 예산 초과 PNG는 거절 / 큰 JPEG은 예산 안으로 축소 디코딩한 결과가 전체 디코딩 결과와 같은 수준인지
+- 레이어 PSD: 직접 파싱해 레이어 위치/픽셀이 원본과 정확히 같은지 확인
+- 헤더 기준 예상 높이(PSD 분할 / 전체 JPG 생략 판정에 사용)가 실제 리사이즈 높이 이상인지
+
+사용법 (저장소 루트에서):
+    python tools/check_quality_parity.py
+"""
+import io
+import math
+import os
+import struct
+import sys
+import time
+import zipfile
+
+from PIL import Image, ImageChops, ImageDraw, ImageStat
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import engine  # noqa: E402
+
+
+# 900px 최종 결과 기준 허용치 (JPEG q95 재인코딩 수준의 차이)
+MAX_MAE = 1.5
+MIN_PSNR = 38.0
+
+
+def _synthetic_photo(w: int, h: int) -> Image.Image:
+    """그라데이션 + 도형 + 가는 선(고주파)으로 구성된 테스트 이미지"""
+    base = Image.linear_gradient("L").resize((w, h))
+    im = Image.merge("RGB", (base, base.transpose(Image.Transpose.FLIP_LEFT_RIGHT), base.rotate(180)))
+    d = ImageDraw.Draw(im)
+    step = max(8, w // 60)
+    for x in range(0, w, step):
+        d.line([(x, 0), (x + h // 3, h)], fill=(30, 30, 30), width=max(1, step // 6))
+    d.ellipse([w // 4, h // 4, w * 3 // 4, h * 3 // 4], outline=(250, 40, 40), width=max(2, w // 200))
+    d.rectangle([w // 10, h // 10, w // 5, h // 5], fill=(20, 120, 220))
+    return im
+
+
+def _encode(im: Image.Image, fmt: str, **kw) -> bytes:
+    out = io.BytesIO()
+    im.save(out, format=fmt, **kw)
+    return out.getvalue()
+
+
+def _diff_stats(a: Image.Image, b: Image.Image) -> dict:
+    if a.size != b.size:
+        raise ValueError(f"size mismatch: {a.size} != {b.size}")
+    diff = ImageChops.difference(a.convert("RGB"), b.convert("RGB"))
+    stat = ImageStat.Stat(diff)
+    mae = sum(stat.mean) / 3.0
+    mse = sum(x / float(stat.count[0]) for x in stat.sum2) / 3.0
+    psnr = float("inf") if mse == 0 else 10.0 * math.log10(255.0 ** 2 / mse)
+    max_err = max(hi for _, hi in stat.extrema)
+    return {"mae": mae, "max": max_err, "psnr": psnr}
+
+
+def _report(name: str, stats: dict) -> bool:
+    ok = stats["mae"] <= MAX_MAE and stats["psnr"] >= MIN_PSNR
+    print(
+        f"[{'OK' if ok else 'FAIL'}] {name}: "
+        f"MAE={stats['mae']:.3f} max={stats['max']} PSNR={stats['psnr']:.2f}dB"
+    )
+    return ok
+
+
+def _direct_lanczos(im: Image.Image, width: int) -> Image.Image:
+    """기존 방식: 원본 크기에서 바로 LANCZOS 1회"""
+    h = max(1, int(round(im.size[1] * width / float(im.size[0]))))
+    return im.resize((width, h), resample=Image.Resampling.LANCZOS).convert("RGB")
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def check_jpeg_draft(sizes=((6000, 9000), (4000, 6000), (1900, 2500), (1200, 1600))) -> bool:
+    """_open_image_any(min_width=CANVAS_WIDTH) 축소 디코딩 vs 전체 디코딩"""
+    ok = True
+    for w, h in sizes:
+        raw = _encode(_synthetic_photo(w, h), "JPEG", quality=92)
+        full = engine._fit_to_width_900(engine._open_image_any(raw))
+        fast = engine._fit_to_width_900(engine._open_image_any(raw, min_width=engine.CANVAS_WIDTH))
+        ok = _report(f"jpeg draft {w}x{h}", _diff_stats(full, fast)) and ok
+    return ok
+
+
+def check_pyramid(sizes=((6000, 9000), (3000, 4000), (1200, 1600)), fmt="PNG") -> bool:
+    """_downscale_pyramid(RENDITION_WIDTHS) vs 폭마다 원본에서 바로 LANCZOS"""
+    ok = True
+    for w, h in sizes:
+        src = engine._open_image_any(_encode(_synthetic_photo(w, h), fmt))
+        pyramid = engine._downscale_pyramid(src, engine.RENDITION_WIDTHS)
+        for width in engine.RENDITION_WIDTHS:
+            direct = _direct_lanczos(src, width)
+            ok = _report(f"pyramid {w}x{h} → {width}", _diff_stats(direct, pyramid[width])) and ok
+    return ok
+
+
+def check_reduce_resample(sizes=((8000, 6000), (4000, 5000)), formats=("PNG", "WEBP", "GIF")) -> bool:
+    """_fit_to_width_900 / _make_thumb (reduce → LANCZOS) vs 원본에서 바로 LANCZOS"""
+    ok = True
+    for fmt in formats:
+        for w, h in sizes:
+            im = _synthetic_photo(w, h)
+            if fmt == "GIF":
+                im = im.convert("P", palette=Image.Palette.ADAPTIVE)
+            src = engine._open_image_any(_encode(im, fmt, **({"quality": 95} if fmt == "WEBP" else {})))
+            src.load()
+            for width, label in ((engine.CANVAS_WIDTH, "900px"), (engine.THUMB_W, "thumb")):
+                direct, t_direct = _timed(lambda: _direct_lanczos(src, width))
+                if label == "thumb":
+                    fast, t_fast = _timed(lambda: Image.open(io.BytesIO(engine._make_thumb(src, w=width))).convert("RGB"))
+                else:
+                    fast, t_fast = _timed(lambda: engine._fit_to_width_900(src, width=width))
+                name = f"reduce {fmt} {w}x{h} → {label} ({t_direct * 1000:.0f}ms → {t_fast * 1000:.0f}ms)"
+                ok = _report(name, _diff_stats(direct, fast)) and ok
+    return ok
+
+
+def check_pixel_budget() -> bool:
+    """픽셀 예산: 큰 PNG는 디코딩 전에 거절 / 큰 JPEG은 예산 안으로 축소 디코딩"""
+    side = int((engine.MAX_SOURCE_PIXELS + 1) ** 0.5) + 1
+    problems = []
+    png = _encode(Image.new("RGB", (side, side), (200, 200, 200)), "PNG", compress_level=1)
+    try:
+        engine.make_item("huge.png", png)
+        problems.append("큰 PNG 통과")
+    except ValueError:
+        pass
+    jw, jh = 9000, 7000  # 63MP > MAX_DECODE_PIXELS
+    jpg = _encode(_synthetic_photo(jw, jh), "JPEG", quality=90)
+    full = engine._fit_to_width_900(Image.open(io.BytesIO(jpg)))
+    opened = engine._open_image_any(jpg)
+    if opened.size[0] * opened.size[1] > engine.MAX_DECODE_PIXELS:
+        problems.append(f"JPEG 축소 디코딩 안 됨 {opened.size}")
+    stats = _diff_stats(full, engine._fit_to_width_900(opened))
+    ok = _report(f"budget JPEG {jw}x{jh} → {opened.size[0]}x{opened.size[1]}", stats) and not problems
+    print(f"[{'FAIL' if problems else 'OK'}] budget PNG {side}x{side} 거절 {' / '.join(problems)}".rstrip())
+    return ok
+
+
+def _unpackbits(data: bytes, size: int) -> bytes:
+    out = bytearray()
+    i = 0
+    while i < len(data):
+        h = data[i]
+        i += 1
+        if h < 128:
+            out += data[i:i + h + 1]
+            i += h + 1
+        elif h > 128:
+            out += bytes([data[i]]) * (257 - h)
+            i += 1
+    if len(out) != size:
+        raise ValueError(f"RLE row size {len(out)} != {size}")
+    return bytes(out)
+
+
+def _read_rle_planes(buf: bytes, pos: int, width: int, rows: int, channels: int):
+    """RLE 채널 데이터(줄 길이 표 → 데이터) → (채널 bytes 목록, 다음 위치)"""
+    counts = struct.unpack_from(f">{rows * channels}H", buf, pos)
+    pos += 2 * rows * channels
+    planes = []
+    for c in range(channels):
+        rows_data = []
+        for r in range(rows):
+            n = counts[c * rows + r]
+            rows_data.append(_unpackbits(buf[pos:pos + n], width))
+            pos += n
+        planes.append(b"".join(rows_data))
+    return planes, pos
+
+
+def _read_psd(data: bytes) -> dict:
+    """검증용 최소 PSD 파서 (8bit RGB, RLE)"""
+    if data[:4] != b"8BPS":
+        raise ValueError("PSD 시그니처 아님")
+    version, channels, height, width, depth, mode = struct.unpack_from(">H6xHIIHH", data, 4)
+    if (version, depth, mode) != (1, 8, 3):
+        raise ValueError(f"지원하지 않는 PSD: version={version} depth={depth} mode={mode}")
+    pos = 26
+    for _ in range(2):  # 색상 모드 데이터 / 이미지 리소스
+        (n,) = struct.unpack_from(">I", data, pos)
+        pos += 4 + n
+    (lm_len,) = struct.unpack_from(">I", data, pos)
+    lm_end = pos + 4 + lm_len
+    pos += 8  # layer & mask 길이 + layer info 길이
+    (count,) = struct.unpack_from(">h", data, pos)
+    pos += 2
+    records = []
+    for _ in range(abs(count)):
+        top, left, bottom, right, nch = struct.unpack_from(">iiiiH", data, pos)
+        pos += 18
+        chans = [struct.unpack_from(">hI", data, pos + 6 * k) for k in range(nch)]
+        pos += 6 * nch + 12  # 8BIM + blend key + opacity/clipping/flags/filler
+        (extra_len,) = struct.unpack_from(">I", data, pos)
+        extra = data[pos + 4:pos + 4 + extra_len]
+        pos += 4 + extra_len
+        mask_len = struct.unpack_from(">I", extra, 0)[0]
+        blend_len = struct.unpack_from(">I", extra, 4 + mask_len)[0]
+        name_at = 8 + mask_len + blend_len
+        name = extra[name_at + 1:name_at + 1 + extra[name_at]].decode("latin-1")
+        records.append((name, (top, left, bottom, right), chans))
+    layers = []
+    for name, (top, left, bottom, right), chans in records:
+        w, h = right - left, bottom - top
+        planes = {}
+        for cid, length in chans:
+            (comp,) = struct.unpack_from(">H", data, pos)
+            if comp != 1:
+                raise ValueError(f"RLE 아님: {comp}")
+            (plane,), end = _read_rle_planes(data, pos + 2, w, h, 1)
+            if end != pos + length:
+                raise ValueError(f"{name} 채널 {cid} 길이 불일치")
+            planes[cid] = plane
+            pos = end
+        im = Image.merge("RGB", [Image.frombytes("L", (w, h), planes[c]) for c in (0, 1, 2)])
+        layers.append({"name": name, "bounds": (top, left, bottom, right), "image": im, "alpha": planes.get(-1)})
+    (comp,) = struct.unpack_from(">H", data, lm_end)
+    planes, end = _read_rle_planes(data, lm_end + 2, width, height, channels)
+    if end != len(data):
+        raise ValueError(f"합성 이미지 뒤 남은 데이터: {len(data) - end}")
+    composite = Image.merge("RGB", [Image.frombytes("L", (width, height), p) for p in planes[:3]])
+    return {"width": width, "height": height, "layers": layers, "composite": composite}
+
+
+def check_psd_roundtrip(counts=(3, 12)) -> bool:
+    """build_outputs(with_psd=True)의 PSD를 다시 읽어 레이어 위치/픽셀과 합성 이미지를 원본과 비교"""
+    ok = True
+    top, bottom, gap = engine.DEFAULT_TOP_PAD, engine.DEFAULT_BOTTOM_PAD, engine.DEFAULT_GAP
+    for count in counts:
+        items = [
+            engine.make_item(f"p{i}.png", _encode(_synthetic_photo(1000 + 90 * i, 1300 + 70 * i), "PNG"))
+            for i in range(count)
+        ]
+        memo = engine.BuildMemo()
+        _, zip_bytes, meta = engine.build_outputs(items, "psdcheck", top, bottom, gap, memo=memo, with_psd=True)
+        resized = [next(v[0] for k, v in memo.items.items() if k[0] == it.sha1) for it in items]
+        heights = [im.size[1] for im in resized]
+        parts = engine.plan_page(items, top, bottom, gap)[0]["part_ranges"]
+        with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zf:
+            psd_names = sorted(n for n in zf.namelist() if n.endswith(".psd"))
+            if len(psd_names) != len(parts) or meta["psd_files"] != len(parts):
+                print(f"[FAIL] psd {count}장: PSD {len(psd_names)}개 != 파트 {len(parts)}개")
+                ok = False
+                continue
+            for pi, (p0, p1) in enumerate(parts, start=1):
+                name = "psdcheck.psd" if len(parts) == 1 else f"psdcheck_part{pi}.psd"
+                psd = _read_psd(zf.read(name))
+                part_h = heights[p0:p1]
+                ys = engine._layout_y_positions(part_h, top, gap)
+                problems = []
+                if (psd["width"], psd["height"]) != (engine.CANVAS_WIDTH, engine._calc_total_height(part_h, top, bottom, gap)):
+                    problems.append(f"캔버스 {psd['width']}x{psd['height']}")
+                bg, img_layers = psd["layers"][0], psd["layers"][1:]
+                if bg["name"] != "Background" or bg["image"].getextrema() != ((255, 255),) * 3:
+                    problems.append("배경 레이어")
+                if [lay["name"] for lay in img_layers] != [f"IMG_{i + 1}" for i in range(p1 - p0)]:
+                    problems.append("레이어 이름")
+                for lay, y, im in zip(img_layers, ys, resized[p0:p1]):
+                    if lay["bounds"] != (y, 0, y + im.size[1], engine.CANVAS_WIDTH):
+                        problems.append(f"{lay['name']} 위치 {lay['bounds']}")
+                    elif _diff_stats(lay["image"], im)["max"] != 0:
+                        problems.append(f"{lay['name']} 픽셀")
+                    if lay["alpha"] != b"\xff" * len(lay["alpha"] or b"x"):
+                        problems.append(f"{lay['name']} 알파")
+                canvas = engine._compose_long_jpg(resized[p0:p1], top, bottom, gap)
+                if _diff_stats(psd["composite"], canvas)["max"] != 0:
+                    problems.append("합성 이미지 픽셀")
+                print(f"[{'FAIL' if problems else 'OK'}] psd {count}장 {name}: 레이어 {len(img_layers)}개 "
+                      f"{psd['width']}x{psd['height']} {' / '.join(problems)}".rstrip())
+                ok = ok and not problems
+    return ok
+
+
+def check_planned_heights(
+    sizes=((6001, 9001), (4033, 3025), (2999, 4501), (1201, 1603), (800, 1333)),
+    formats=("JPEG", "PNG"),
+    widths=engine.RENDITION_WIDTHS,
+) -> bool:
+    """헤더 기준 예상 높이(_planned_heights) >= 실제 리사이즈 높이 (축소 디코딩 / 피라미드 포함)"""
+    ok = True
+    for fmt in formats:
+        items = [
+            engine.make_item(f"h{i}.{fmt.lower()}", _encode(_synthetic_photo(w, h), fmt))
+            for i, (w, h) in enumerate(sizes)
+        ]
+        for width in widths:
+            planned = engine._planned_heights(items, width)
+            actual = [engine._resized_set_for(it, [width])[width].size[1] for it in items]
+            diffs = [p - a for p, a in zip(planned, actual)]
+            problems = [f"{w}x{h} 실제 {a} > 예상 {p}" for (w, h), p, a in zip(sizes, planned, actual) if a > p]
+            print(f"[{'FAIL' if problems else 'OK'}] planned {fmt} → {width}px: 여유 {diffs} {' / '.join(problems)}".rstrip())
+            ok = ok and not problems
+    return ok
+
+
+def main() -> int:
+    checks = [
+        check_jpeg_draft,
+        check_pyramid,
+        check_reduce_resample,
+        check_pixel_budget,
+        check_psd_roundtrip,
+        check_planned_heights,
+    ]
+    results = [c() for c in checks]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
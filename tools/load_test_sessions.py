@@ -0,0 +1,309 @@
+"""
+MISHARP 상세페이지 생성기 - 동시 세션 부하 테스트 (브라우저/네트워크 없이 실행)
+
+- Streamlit 앱 테스트 API(AppTest)로 app.py를 세션 N개로 동시에 실행 (세션 1개 = 스레드 1개)
+  → 실제 서버처럼 한 프로세스 안에서 작업 대기열 / 작업 풀 / 캐시 / 메모리 거버너를 공유
+- 세션마다: 접속 코드 로그인(require_login, 테스트용 secrets) → 합성 이미지 등록 → 순서 변경 → 생성 → 결과 표시까지
+- 동시 세션 수를 늘려 가며(--sessions 1,2,4,8) 단계별 p50/p95 지연, 최고 RSS, 처리량(생성 완료/분) 출력
+- 결과는 JSON Lines로 저장 가능 (--out)
+
+참고:
+- 업로드: AppTest(1.37)는 file_uploader 조작을 지원하지 않음
+  → make_item()으로 만든 목록을 세션 상태에 넣고 rerun (업로드 후 목록/썸네일 그리기까지가 측정 대상)
+- 생성: 버튼 클릭 rerun(generate_click)과 클릭 → 결과 표시까지(generate_done)를 따로 기록
+  (결과 대기 중에는 JOB_POLL_SECONDS 간격으로 rerun, 실제 화면의 진행률 갱신 주기와 같음)
+- 캐시/결과 보관소는 단계(동시 세션 수)마다 새 임시 폴더, 합성 이미지도 단계마다 다른 seed
+  (앞 단계의 입력/캐시 적중으로 뒤 단계가 빨라지지 않도록)
+- 최고 RSS: 스크립트 실행 1회마다, 생성 대기 중에는 폴링마다 engine._rss_bytes()로 읽은 최고치
+- AppTest.run()은 프로세스 전역(Runtime 인스턴스 / st.secrets)을 바꾸므로 스크립트 실행은 한 번에 1개씩
+  → 지연에는 다른 세션 스크립트 실행을 기다린 시간이 포함됨 (GIL을 쓰는 서버의 rerun 경합과 같은 방향)
+  → 백그라운드 생성 작업(작업 대기열/작업 풀)은 스크립트 실행과 별개로 실제 동시 실행
+
+사용법 (저장소 루트에서):
+    python tools/load_test_sessions.py --sessions 1,2,4 --images 5
+    python tools/load_test_sessions.py --sessions 1,4,8 --images 10 --src 3000x4000 --out load.jsonl
+"""
+import argparse
+import hashlib
+import io
+import json
+import logging
+import math
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from typing import Dict, List, Tuple
+
+from PIL import Image, ImageDraw
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 엔진을 import하기 전에 캐시 위치 지정 (단계마다 _fresh_stores()로 다시 바꿈)
+_TMP = tempfile.mkdtemp(prefix="misharp_load_")
+os.environ["MISHARP_CACHE_DIR"] = os.path.join(_TMP, "cache")
+os.environ["MISHARP_RESULT_DIR"] = os.path.join(_TMP, "results")
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import app  # noqa: E402
+import engine  # noqa: E402
+
+
+APP_PATH = os.path.join(ROOT, "app.py")
+INTERACTIONS = ["open", "login", "upload", "reorder", "generate_click", "generate_done"]
+GENERATE_TIMEOUT = 600.0
+
+_SCRIPT_LOCK = threading.Lock()
+
+# 세션 스레드에서 at.session_state를 읽을 때마다 나오는 경고 (스크립트 밖 접근이라 정상)
+# (Streamlit이 실행마다 로그 레벨을 다시 설정하므로 레벨 대신 필터 사용)
+logging.getLogger("streamlit.runtime.scriptrunner.script_run_context").addFilter(
+    lambda rec: "missing ScriptRunContext" not in rec.getMessage()
+)
+
+
+# =========================================================
+# SYNTHETIC INPUTS / SECRETS
+# =========================================================
+def _synthetic_jpeg(w: int, h: int, seed: int) -> bytes:
+    base = Image.linear_gradient("L").resize((w, h))
+    im = Image.merge("RGB", (base, base.transpose(Image.Transpose.FLIP_LEFT_RIGHT), base.rotate(180)))
+    d = ImageDraw.Draw(im)
+    step = max(8, w // 40)
+    off = (seed * 3) % step  # seed가 커도 선이 화면 밖으로 밀려나지 않도록
+    for x in range(-h, w, step):
+        d.line([(x + off, 0), (x + off + h // 2, h)], fill=((seed * 53) % 255, 60, 120), width=max(1, step // 5))
+    d.text((step, step), f"#{seed}", fill=(255, 255, 255))  # seed마다 다른 입력 보장
+    out = io.BytesIO()
+    im.save(out, format="JPEG", quality=90)
+    return out.getvalue()
+
+
+def _code(i: int) -> Tuple[str, str]:
+    """세션 i의 (label, 접속 코드)"""
+    return f"load{i:03d}", f"LOADTEST-{i:04d}"
+
+
+def _secrets(n: int) -> Dict:
+    return {
+        "AUTH_ENABLED": True,
+        "ACCESS_CODE_HASHES": [
+            f"{label}:{hashlib.sha256(code.encode('utf-8')).hexdigest()}" for label, code in map(_code, range(n))
+        ],
+        "REVOKED_LABELS": [],
+        "ADMIN_LABELS": [],
+    }
+
+
+# =========================================================
+# ONE SESSION
+# =========================================================
+class _Session:
+    """AppTest 1개 = 브라우저 세션 1개 (단계별 소요 시간 기록)"""
+
+    def __init__(self, idx: int, secrets: Dict, images: List[Tuple[str, bytes]]):
+        self.idx = idx
+        self.images = images
+        self.secrets = secrets
+        self.timings: Dict[str, List[float]] = {k: [] for k in INTERACTIONS}
+        self.error = ""
+        self.generated = 0
+        self.peak_rss = engine._rss_bytes()
+        self.at = self._new_app()
+
+    def _new_app(self) -> AppTest:
+        at = AppTest.from_file(APP_PATH, default_timeout=GENERATE_TIMEOUT)
+        for k, v in self.secrets.items():
+            at.secrets[k] = v
+        return at
+
+    def _rerun(self, fn=None):
+        """스크립트 실행 1회 (fn: 위젯 조작 후 .run()까지, 없으면 그냥 rerun)"""
+        with _SCRIPT_LOCK:
+            (fn or self.at.run)()
+        self.peak_rss = max(self.peak_rss, engine._rss_bytes())
+        if self.at.exception:
+            raise RuntimeError(self.at.exception[0].value)
+
+    def _timed(self, name: str, fn=None):
+        t0 = time.perf_counter()
+        try:
+            self._rerun(fn)
+        except RuntimeError as e:
+            raise RuntimeError(f"{name}: {e}") from None
+        self.timings[name].append(time.perf_counter() - t0)
+
+    def _button(self, label: str):
+        for b in self.at.button:
+            if b.label == label:
+                return b
+        raise RuntimeError(f"버튼 없음: {label}")
+
+    def run(self, rounds: int):
+        at = self.at
+        try:
+            self._timed("open")
+            label, code = _code(self.idx)
+            at.text_input[0].set_value(code)
+            self._timed("login", lambda: self._button("로그인").click().run())
+            if at.session_state[app.STATE_AUTH_LABEL] != label:
+                raise RuntimeError("로그인 실패")
+            # AppTest(1.37)는 st.rerun() 뒤에도 로그인 화면 위젯을 요소 트리에 남겨 다음 run()이 실패
+            # → 로그인된 세션 상태만 새 AppTest로 옮김 (브라우저 새로고침과 같은 상태)
+            auth = {k: at.session_state[k] for k in (app.STATE_AUTH_OK, app.STATE_AUTH_LABEL, app.STATE_AUTH_SID)}
+            at = self.at = self._new_app()
+            for k, v in auth.items():
+                at.session_state[k] = v
+            self._rerun()
+
+            items = [engine.make_item(fn, raw) for fn, raw in self.images]
+            at.session_state[app.STATE_ITEMS] = items
+            at.session_state[app.STATE_SEEN] = {it.sha1 for it in items}
+            self._timed("upload")
+
+            for r in range(rounds):
+                self._timed("reorder", lambda: at.button(key=f"down_{r % max(1, len(items) - 1)}").click().run())
+                before = at.session_state[app.STATE_LAST_JPG]
+                t0 = time.perf_counter()
+                self._timed("generate_click", lambda: self._button("상세페이지 생성하기").click().run())
+                while at.session_state[app.STATE_LAST_JPG] in (None, before):
+                    if time.perf_counter() - t0 > GENERATE_TIMEOUT:
+                        raise RuntimeError("생성 시간 초과")
+                    failed = [e.value for e in at.error]
+                    if failed:
+                        raise RuntimeError(failed[0])
+                    time.sleep(app.JOB_POLL_SECONDS)
+                    self._rerun()
+                self.timings["generate_done"].append(time.perf_counter() - t0)
+                self.generated += 1
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+
+
+# =========================================================
+# MEASUREMENT
+# =========================================================
+def _fresh_stores(level: int):
+    """단계마다 빈 캐시 / 결과 보관소 (싱글턴을 비워 다음 접근 때 새 폴더로 생성)"""
+    base = os.path.join(_TMP, f"level{level:03d}")
+    with engine._artifact_cache_lock:
+        engine.ARTIFACT_CACHE_DIR = os.path.join(base, "cache")
+        engine._artifact_cache = None
+    with engine._result_store_lock:
+        engine.RESULT_STORE_DIR = os.path.join(base, "results")
+        engine._result_store = None
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """최근접 순위 백분위수 (q: 0~100)"""
+    if not values:
+        return 0.0
+    s = sorted(values)
+    return s[max(0, min(len(s), math.ceil(q / 100.0 * len(s))) - 1)]
+
+
+def run_level(level: int, n: int, images: int, src: Tuple[int, int], rounds: int) -> Dict:
+    _fresh_stores(level)
+    secrets = _secrets(n)
+    sessions = [
+        _Session(
+            i,
+            secrets,
+            [
+                (f"s{i:03d}_{k + 1:02d}.jpg", _synthetic_jpeg(src[0], src[1], level * 10_000 + i * 100 + k))
+                for k in range(images)
+            ],
+        )
+        for i in range(n)
+    ]
+    threads = [threading.Thread(target=s.run, args=(rounds,), name=f"load-session-{s.idx}") for s in sessions]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    row = {
+        "sessions": n,
+        "images": images,
+        "src_w": src[0],
+        "src_h": src[1],
+        "rounds": rounds,
+        "wall_seconds": round(wall, 2),
+        "generated": sum(s.generated for s in sessions),
+        "throughput_per_min": round(sum(s.generated for s in sessions) / wall * 60.0, 2),
+        "peak_rss_mb": round(max(s.peak_rss for s in sessions) / 1e6, 1),
+        "errors": [f"session {s.idx}: {s.error}" for s in sessions if s.error],
+        "interactions": {},
+    }
+    for name in INTERACTIONS:
+        values = [v for s in sessions for v in s.timings[name]]
+        row["interactions"][name] = {
+            "count": len(values),
+            "p50_ms": round(_percentile(values, 50) * 1000, 1),
+            "p95_ms": round(_percentile(values, 95) * 1000, 1),
+            "max_ms": round(max(values) * 1000, 1) if values else 0.0,
+        }
+    return row
+
+
+def _print_level(row: Dict):
+    print(
+        f"\n--- 동시 세션 {row['sessions']}개 · 이미지 {row['images']}장 ({row['src_w']}x{row['src_h']}) · "
+        f"{row['wall_seconds']}s · 생성 {row['generated']}건 ({row['throughput_per_min']}/분) · "
+        f"최고 RSS {row['peak_rss_mb']:,.0f}MB"
+    )
+    for name, agg in row["interactions"].items():
+        print(f"  {name:<15} n={agg['count']:>3}  p50 {agg['p50_ms']:9.1f}ms  p95 {agg['p95_ms']:9.1f}ms  max {agg['max_ms']:9.1f}ms")
+    for err in row["errors"]:
+        print("  ❌", err)
+
+
+# =========================================================
+# MAIN
+# =========================================================
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="MISHARP 동시 세션 부하 테스트")
+    ap.add_argument("--sessions", default="1,2,4", help="동시 세션 수 단계, 쉼표로 구분")
+    ap.add_argument("--images", type=int, default=5, help="세션당 이미지 수")
+    ap.add_argument("--src", default="2000x2600", help="합성 원본 크기 (가로x세로)")
+    ap.add_argument("--rounds", type=int, default=1, help="세션당 (순서 변경 → 생성) 반복 횟수")
+    ap.add_argument("--out", help="결과 JSON Lines 파일")
+    args = ap.parse_args(argv)
+    levels = [int(x) for x in args.sessions.split(",") if x.strip()]
+    src = tuple(int(x) for x in args.src.lower().split("x"))
+
+    env = {
+        "kind": "env",
+        "python": platform.python_version(),
+        "pillow": Image.__version__,
+        "cpus": os.cpu_count(),
+        "build_workers": engine.BUILD_WORKERS,
+        "max_running_jobs": engine.MAX_RUNNING_JOBS,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    print(f"=== MISHARP 부하 테스트: 세션 {levels} · 작업 동시 실행 {engine.MAX_RUNNING_JOBS} · "
+          f"작업 풀 {engine.BUILD_WORKERS} · 임시 폴더 {_TMP} ===")
+    rows = []
+    for level, n in enumerate(levels):
+        row = run_level(level, n, args.images, src, args.rounds)
+        _print_level(row)
+        rows.append(row)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            for r in [env] + rows:
+                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+        print("\n결과 저장:", args.out)
+    return 1 if any(r["errors"] for r in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+"""
+MISHARP 상세페이지 생성기 - 이미지 목록 클릭(▲/▼) 응답 시간 측정: fragment rerun vs 전체 rerun
+
+- 같은 세션 상태(이미지 N장 등록)에서 ▼ 클릭을 두 방식으로 반복 실행해 스크립트 실행 시간 비교
+  - full: 클릭 위젯 상태로 앱 전체 rerun (3) 목록을 fragment로 바꾸기 전의 동작)
+  - fragment: 클릭한 버튼이 속한 fragment만 rerun (서버가 fragment 안 위젯 클릭에 보내는 요청과 같은 RerunData)
+- 측정 구간: rerun 요청 → 스크립트 종료 (콜백 + 스크립트 실행 + 요소 전송, 브라우저 렌더링/네트워크 제외)
+- 생성 결과가 없는 화면 / 있는 화면(미리보기 + 다운로드, 작업 완료 직후와 같은 세션 상태) 각각 측정
+- 클릭마다 목록 순서가 실제로 바뀌었는지 확인, 실행 1회에 전송한 메시지 수도 기록
+- 결과는 JSON Lines로 저장 가능 (--out)
+
+참고:
+- AppTest(1.37)는 매번 전체 스크립트를 실행하고 fragment 저장소도 실행마다 새로 만듦
+  → AppTest 내부 실행기(LocalScriptRunner)를 fragment 저장소를 공유하도록 직접 구동 (Streamlit 1.37 내부 API)
+- 로그인은 끈 상태(AUTH_ENABLED = false), 합성 이미지는 make_item()으로 만들어 세션 상태에 넣음
+
+사용법 (저장소 루트에서):
+    python tools/measure_list_click.py
+    python tools/measure_list_click.py --counts 20,50 --clicks 30 --out list_click.jsonl
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+from unittest.mock import MagicMock
+
+from PIL import Image, ImageDraw
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 엔진을 import하기 전에 캐시 위치 지정 (실행마다 빈 캐시)
+_TMP = tempfile.mkdtemp(prefix="misharp_click_")
+os.environ["MISHARP_CACHE_DIR"] = os.path.join(_TMP, "cache")
+os.environ["MISHARP_RESULT_DIR"] = os.path.join(_TMP, "results")
+
+import streamlit as st  # noqa: E402
+from streamlit.proto.WidgetStates_pb2 import WidgetStates  # noqa: E402
+from streamlit.runtime import Runtime  # noqa: E402
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager  # noqa: E402
+from streamlit.runtime.fragment import MemoryFragmentStorage  # noqa: E402
+from streamlit.runtime.media_file_manager import MediaFileManager  # noqa: E402
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage  # noqa: E402
+from streamlit.runtime.pages_manager import PagesManager  # noqa: E402
+from streamlit.runtime.scriptrunner.script_requests import RerunData  # noqa: E402
+from streamlit.runtime.secrets import Secrets  # noqa: E402
+from streamlit.runtime.state.safe_session_state import SafeSessionState  # noqa: E402
+from streamlit.runtime.state.session_state import SessionState  # noqa: E402
+from streamlit.testing.v1.element_tree import ElementTree, parse_tree_from_messages  # noqa: E402
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner, require_widgets_deltas  # noqa: E402
+
+import app  # noqa: E402
+import engine  # noqa: E402
+
+
+APP_PATH = os.path.join(ROOT, "app.py")
+RUN_TIMEOUT = 60.0
+
+# 스크립트 스레드 밖에서 session_state를 읽을 때 나오는 경고 (정상)
+logging.getLogger("streamlit.runtime.scriptrunner.script_run_context").addFilter(
+    lambda rec: "missing ScriptRunContext" not in rec.getMessage()
+)
+# 클릭마다 남는 list_click 로그 숨김 (앱이 로그 레벨을 INFO로 설정하므로 필터 사용)
+logging.getLogger("misharp.perf").addFilter(lambda rec: False)
+
+
+# =========================================================
+# SYNTHETIC INPUTS
+# =========================================================
+def _synthetic_jpeg(w: int, h: int, seed: int) -> bytes:
+    im = Image.new("RGB", (w, h), ((seed * 53) % 255, (seed * 29) % 255, 120))
+    ImageDraw.Draw(im).text((20, 20), f"#{seed}", fill=(255, 255, 255))
+    out = io.BytesIO()
+    im.save(out, format="JPEG", quality=85)
+    return out.getvalue()
+
+
+# =========================================================
+# SCRIPT RUNNER (fragment 저장소를 실행 간 공유)
+# =========================================================
+class _Runner(LocalScriptRunner):
+    def __init__(self, session_state: SafeSessionState, fragments: MemoryFragmentStorage):
+        super().__init__(APP_PATH, session_state, PagesManager(APP_PATH, setup_watcher=False))
+        self._fragment_storage = fragments
+
+    def run_data(self, rerun_data: RerunData) -> ElementTree:
+        self.request_rerun(rerun_data)
+        self.start()
+        require_widgets_deltas(self, RUN_TIMEOUT)
+        return parse_tree_from_messages(self.forward_msgs())
+
+    def fragment_of(self, widget_key: str) -> str:
+        """widget_key 위젯을 그린 fragment id (없으면 빈 문자열)"""
+        for msg in self.forward_msgs():
+            if msg.HasField("delta") and msg.delta.HasField("new_element"):
+                el = msg.delta.new_element
+                kind = el.WhichOneof("type")
+                if kind and getattr(getattr(el, kind), "id", "").endswith(f"-{widget_key}"):
+                    return msg.delta.fragment_id
+        return ""
+
+
+class _Session:
+    """세션 1개 (session_state / fragment 저장소 유지, 실행마다 새 실행기 = AppTest와 같은 방식)"""
+
+    def __init__(self):
+        self.state = SafeSessionState(SessionState(), lambda: None)
+        self.fragments = MemoryFragmentStorage()
+        self.tree: ElementTree = None
+        self.last_runner: _Runner = None
+        self.last_msgs: list = []
+
+    def run(self, rerun_data: RerunData) -> float:
+        runtime = MagicMock(spec=Runtime)
+        runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+        runtime.cache_storage_manager = MemoryCacheStorageManager()
+        Runtime._instance = runtime
+        runner = _Runner(self.state, self.fragments)
+        t0 = time.perf_counter()
+        tree = runner.run_data(rerun_data)
+        elapsed = time.perf_counter() - t0
+        Runtime._instance = None
+        if tree.exception:
+            raise RuntimeError(tree.exception[0].value)
+        self.last_msgs = runner.forward_msgs()
+        if not rerun_data.fragment_id_queue:
+            self.tree, self.last_runner = tree, runner
+        return elapsed
+
+    def widget_states(self, click_key: str = "") -> WidgetStates:
+        """현재 위젯 값 전체 + (click_key) 버튼 클릭 (브라우저가 rerun 요청에 싣는 값과 같음)"""
+        states = WidgetStates()
+        states.widgets.extend(self.state.get_widget_states())
+        if click_key:
+            button_id = self.tree.button(key=click_key).id
+            kept = [w for w in states.widgets if w.id != button_id]
+            del states.widgets[:]
+            states.widgets.extend(kept)
+            states.widgets.add(id=button_id, trigger_value=True)
+        return states
+
+
+# =========================================================
+# MEASUREMENT
+# =========================================================
+def _percentile(values: List[float], q: float) -> float:
+    s = sorted(values)
+    return s[max(0, min(len(s), -(-int(q * len(s)) // 100)) - 1)]
+
+
+def _set_result(sess: "_Session", items: List[engine.ImgItem]):
+    """작업 완료 직후와 같은 결과 상태 (_show_job_result와 같은 키)"""
+    jpg_bytes, zip_bytes, meta = engine.build_outputs(items, "measure")
+    store = engine.get_result_store()
+    sess.state[app.STATE_LAST_PREVIEW] = meta["preview_jpg"]
+    sess.state[app.STATE_LAST_JPG] = store.put(jpg_bytes, ".jpg") if jpg_bytes else None
+    sess.state[app.STATE_LAST_ZIP] = store.put(zip_bytes, ".zip")
+    sess.state[app.STATE_LAST_META] = meta
+
+
+def measure(count: int, clicks: int, src: Tuple[int, int], with_result: bool) -> Dict:
+    sess = _Session()
+    items = [engine.make_item(f"img_{k + 1:02d}.jpg", _synthetic_jpeg(src[0], src[1], count * 1000 + k)) for k in range(count)]
+    sess.state[app.STATE_ITEMS] = items
+    sess.state[app.STATE_SEEN] = {it.sha1 for it in items}
+    if with_result:
+        _set_result(sess, items)
+    sess.run(RerunData())
+    fragment_id = sess.last_runner.fragment_of("down_0")
+    if not fragment_id:
+        raise RuntimeError("▼ 버튼이 fragment 안에 없음")
+
+    timings: Dict[str, List[float]] = {"full": [], "fragment": []}
+    sizes: Dict[str, int] = {}
+    for i in range(clicks):
+        for mode in ("full", "fragment") if i % 2 == 0 else ("fragment", "full"):
+            states = sess.widget_states("down_0")
+            if mode == "full":
+                data = RerunData(widget_states=states)
+            else:
+                data = RerunData(widget_states=states, fragment_id_queue=[fragment_id], is_fragment_scoped_rerun=True)
+            before = [it.sha1 for it in sess.state[app.STATE_ITEMS]]
+            timings[mode].append(sess.run(data))
+            if [it.sha1 for it in sess.state[app.STATE_ITEMS]] == before:
+                raise RuntimeError(f"{mode}: 클릭이 반영되지 않음")
+            sizes[mode] = len(sess.last_msgs)
+            # 다음 클릭을 위해 전체 트리 갱신 (측정 밖)
+            sess.run(RerunData(widget_states=sess.widget_states()))
+
+    row = {"images": count, "with_result": with_result, "src_w": src[0], "src_h": src[1], "clicks": clicks}
+    for mode, values in timings.items():
+        row[mode] = {
+            "p50_ms": round(statistics.median(values) * 1000, 1),
+            "p95_ms": round(_percentile(values, 95) * 1000, 1),
+            "max_ms": round(max(values) * 1000, 1),
+            "messages": sizes[mode],
+        }
+    row["speedup_p50"] = round(row["full"]["p50_ms"] / max(row["fragment"]["p50_ms"], 0.1), 2)
+    return row
+
+
+# =========================================================
+# MAIN
+# =========================================================
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="MISHARP 목록 클릭 응답 시간 (fragment vs 전체 rerun)")
+    ap.add_argument("--counts", default="20,50", help="등록 이미지 수 단계, 쉼표로 구분")
+    ap.add_argument("--clicks", type=int, default=20, help="방식별 ▼ 클릭 횟수")
+    ap.add_argument("--src", default="1200x1600", help="합성 원본 크기 (가로x세로)")
+    ap.add_argument("--out", help="결과 JSON Lines 파일")
+    args = ap.parse_args(argv)
+    counts = [min(int(x), engine.MAX_TOTAL_IMAGES) for x in args.counts.split(",") if x.strip()]
+    src = tuple(int(x) for x in args.src.lower().split("x"))
+
+    saved = st.secrets
+    st.secrets = Secrets([])
+    st.secrets._secrets = {"AUTH_ENABLED": False}
+    env = {
+        "kind": "env",
+        "python": platform.python_version(),
+        "streamlit": st.__version__,
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    rows = []
+    try:
+        for n in counts:
+            for with_result in (False, True):
+                row = measure(n, args.clicks, src, with_result)
+                rows.append(row)
+                print(
+                    f"이미지 {n:>3}장 · 결과 {'있음' if with_result else '없음'} · 클릭 {args.clicks}회: "
+                    f"full p50 {row['full']['p50_ms']:7.1f}ms p95 {row['full']['p95_ms']:7.1f}ms | "
+                    f"fragment p50 {row['fragment']['p50_ms']:7.1f}ms p95 {row['fragment']['p95_ms']:7.1f}ms | "
+                    f"x{row['speedup_p50']} (전송 메시지 {row['full']['messages']} → {row['fragment']['messages']}개)"
+                )
+    finally:
+        st.secrets = saved
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            for r in [env] + rows:
+                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+        print("\n결과 저장:", args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())